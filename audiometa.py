@@ -0,0 +1,563 @@
+"""Extract duration, BPM and key for uploaded tracks.
+
+    python audiometa.py uploads/                     # JSON line per track
+    python audiometa.py uploads/ --duration-only     # headers only, no NumPy needed
+    python audiometa.py uploads/ --sql > backfill.sql
+
+Duration comes from the container headers, never from a full decode: WAV /
+RF64 and AIFF sample counts, FLAC STREAMINFO, the MP3 Xing/Info (with LAME
+encoder delay and padding) or VBRI frame count, the last Ogg page's granule
+position and the MP4 ``mvhd`` box. Constant bitrate MP3s without a VBR
+header fall back to size / bitrate and are reported as not exact; anything
+else falls back to ``ffprobe``.
+
+Tempo and key are estimated on a mono stream downsampled to
+``ANALYSIS_RATE`` (decoded in chunks by ``peaks.decode``): a short-time
+Fourier transform gives a spectral-flux onset envelope, whose
+autocorrelation, weighted towards 120 BPM, picks the tempo, and a chroma
+vector whose correlation with the Krumhansl-Schmuckler major and minor
+profiles picks the key, written like ``constants.ts`` (``C#``, ``F#m``).
+
+Results are cached by content hash in ``<root>/.patchkit/audiometa.json``, so
+renamed or re-uploaded files are not analysed again and unchanged files cost a
+``stat``; ``--sql`` prints ``assets.duration_seconds`` updates keyed by the
+storage path relative to the scanned directory. Libraries are backfilled with
+a process pool.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import struct
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from patchkit.store import STATE_DIR, JsonStore
+from peaks import decode, find_audio, sql_string
+
+#: Sample rate the tempo and key analysis runs at.
+ANALYSIS_RATE = 11025
+N_FFT = 1024
+HOP = 256
+
+KEY_NAMES = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+# Krumhansl-Schmuckler key profiles, tonic first.
+MAJOR_PROFILE = (6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88)
+MINOR_PROFILE = (6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17)
+
+_MP3_BITRATES = {  # (MPEG-1?, layer) -> kbit/s by index
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_BITRATES[False, 3] = _MP3_BITRATES[False, 2]
+_MP3_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+class HeaderError(ValueError):
+    """The container header could not be parsed."""
+
+
+def _info(codec: str, duration: float, rate: int = 0, channels: int = 0,
+          exact: bool = True) -> dict:
+    return {'codec': codec, 'duration': round(duration, 3), 'sample_rate': rate,
+            'channels': channels, 'exact': exact}
+
+
+def _skip_id3(f) -> int:
+    head = f.read(10)
+    if len(head) == 10 and head[:3] == b'ID3':
+        size = 0
+        for b in head[6:10]:
+            size = size << 7 | (b & 0x7F)
+        return 10 + size + (10 if head[5] & 0x10 else 0)
+    return 0
+
+
+def _wav(f, size: int) -> dict:
+    riff = f.read(12)
+    big = riff[:4] == b'RF64'
+    fmt = None
+    data_size = None
+    ds64 = None
+    while True:
+        head = f.read(8)
+        if len(head) < 8:
+            break
+        cid, csize = struct.unpack('<4sI', head)
+        if cid == b'ds64':
+            ds64 = struct.unpack('<QQQ', f.read(24))[1]
+            f.seek(csize - 24 + (csize & 1), 1)
+        elif cid == b'fmt ':
+            fmt = struct.unpack('<HHIIHH', f.read(16))
+            f.seek(csize - 16 + (csize & 1), 1)
+        elif cid == b'data':
+            if big and csize == 0xFFFFFFFF and ds64 is not None:
+                csize = ds64
+            elif csize in (0, 0xFFFFFFFF):  # streamed: data runs to the end of the file
+                csize = size - f.tell()
+            data_size = min(csize, size - f.tell())
+            break
+        else:
+            f.seek(csize + (csize & 1), 1)
+    if fmt is None or data_size is None or not fmt[2] or not fmt[4]:
+        raise HeaderError('no fmt/data chunk')
+    _tag, channels, rate, _byte_rate, block_align, _bits = fmt
+    return _info('wav', data_size // block_align / rate, rate, channels)
+
+
+def _extended(data: bytes) -> float:
+    """Decode an 80-bit IEEE 754 extended float (AIFF sample rates)."""
+    exponent, mantissa = struct.unpack('>HQ', data)
+    sign = -1 if exponent & 0x8000 else 1
+    exponent &= 0x7FFF
+    if exponent == 0 and mantissa == 0:
+        return 0.0
+    return sign * mantissa * 2.0 ** (exponent - 16383 - 63)
+
+
+def _aiff(f, size: int) -> dict:
+    f.read(12)
+    while True:
+        head = f.read(8)
+        if len(head) < 8:
+            raise HeaderError('no COMM chunk')
+        cid, csize = struct.unpack('>4sI', head)
+        if cid == b'COMM':
+            channels, frames, _bits = struct.unpack('>HIH', f.read(8))
+            rate = _extended(f.read(10))
+            if not rate:
+                raise HeaderError('zero sample rate')
+            return _info('aiff', frames / rate, int(rate), channels)
+        f.seek(csize + (csize & 1), 1)
+
+
+def _flac(f, size: int) -> dict:
+    f.seek(_skip_id3(f))
+    if f.read(4) != b'fLaC':
+        raise HeaderError('missing fLaC marker')
+    head = f.read(4)
+    if len(head) < 4 or head[0] & 0x7F != 0:
+        raise HeaderError('STREAMINFO is not the first metadata block')
+    info = f.read(34)
+    bits = int.from_bytes(info[10:18], 'big')
+    rate = bits >> 44
+    channels = (bits >> 41 & 0x7) + 1
+    samples = bits & 0xFFFFFFFFF
+    if not rate or not samples:
+        raise HeaderError('STREAMINFO without rate or sample count')
+    return _info('flac', samples / rate, rate, channels)
+
+
+def _mp3(f, size: int) -> dict:
+    start = _skip_id3(f)
+    f.seek(start)
+    buf = f.read(64 * 1024)
+    pos = 0
+    while True:
+        pos = buf.find(b'\xff', pos)
+        if pos == -1 or pos + 4 > len(buf):
+            raise HeaderError('no MPEG frame header')
+        h = int.from_bytes(buf[pos:pos + 4], 'big')
+        version, layer = h >> 19 & 3, 4 - (h >> 17 & 3)
+        bitrate_index, rate_index = h >> 12 & 0xF, h >> 10 & 3
+        if h >> 21 == 0x7FF and version != 1 and layer != 4 and 0 < bitrate_index < 15 \
+                and rate_index != 3:
+            break
+        pos += 1
+    mpeg1 = version == 3
+    rate = _MP3_RATES[version][rate_index]
+    channels = 1 if h >> 6 & 3 == 3 else 2
+    spf = 384 if layer == 1 else 1152 if mpeg1 or layer == 2 else 576
+    bitrate = _MP3_BITRATES[mpeg1, layer][bitrate_index] * 1000
+
+    side = (32 if channels == 2 else 17) if mpeg1 else (17 if channels == 2 else 9)
+    xing = pos + 4 + side
+    if buf[xing:xing + 4] in (b'Xing', b'Info'):
+        flags = int.from_bytes(buf[xing + 4:xing + 8], 'big')
+        if flags & 1:
+            frames = int.from_bytes(buf[xing + 8:xing + 12], 'big')
+            tag = xing + 8 + 4 * bool(flags & 1) + 4 * bool(flags & 2) \
+                + 100 * bool(flags & 4) + 4 * bool(flags & 8)
+            samples = frames * spf
+            if buf[tag:tag + 4] == b'LAME':
+                delay_padding = int.from_bytes(buf[tag + 21:tag + 24], 'big')
+                samples -= (delay_padding >> 12) + (delay_padding & 0xFFF)
+            return _info('mp3', max(samples, 0) / rate, rate, channels)
+    vbri = pos + 36
+    if buf[vbri:vbri + 4] == b'VBRI':
+        frames = int.from_bytes(buf[vbri + 14:vbri + 18], 'big')
+        return _info('mp3', frames * spf / rate, rate, channels)
+
+    end = size
+    f.seek(max(0, size - 128))
+    if f.read(3) == b'TAG':
+        end -= 128
+    return _info('mp3', (end - start - pos) * 8 / bitrate, rate, channels, exact=False)
+
+
+def _ogg(f, size: int) -> dict:
+    first = f.read(4096)
+    if first[:4] != b'OggS':
+        raise HeaderError('missing OggS capture pattern')
+    body = 27 + first[26]
+    packet = first[body:body + 32]
+    if packet[:7] == b'\x01vorbis':
+        channels, rate = struct.unpack_from('<BI', packet, 11)
+        codec, offset = 'vorbis', 0
+    elif packet[:8] == b'OpusHead':
+        channels, pre_skip = struct.unpack_from('<BH', packet, 9)
+        codec, rate, offset = 'opus', 48000, pre_skip
+    else:
+        raise HeaderError('unsupported Ogg codec')
+    f.seek(max(0, size - 64 * 1024))
+    tail = f.read()
+    last = tail.rfind(b'OggS')
+    while last != -1:
+        granule = struct.unpack_from('<q', tail, last + 6)[0]
+        if granule >= 0:
+            return _info(codec, (granule - offset) / rate, rate, channels)
+        last = tail.rfind(b'OggS', 0, last)
+    raise HeaderError('no granule position in the last pages')
+
+
+def _mp4(f, size: int) -> dict:
+    def boxes(start: int, end: int):
+        pos = start
+        while pos + 8 <= end:
+            f.seek(pos)
+            box_size, kind = struct.unpack('>I4s', f.read(8))
+            header = 8
+            if box_size == 1:
+                box_size = struct.unpack('>Q', f.read(8))[0]
+                header = 16
+            elif box_size == 0:
+                box_size = end - pos
+            if box_size < header:
+                return
+            yield kind, pos + header, pos + box_size
+            pos += box_size
+
+    for kind, start, end in boxes(0, size):
+        if kind != b'moov':
+            continue
+        for inner, istart, _iend in boxes(start, end):
+            if inner == b'mvhd':
+                f.seek(istart)
+                version = f.read(4)[0]
+                if version == 1:
+                    timescale, duration = struct.unpack('>16xIQ', f.read(28))
+                else:
+                    timescale, duration = struct.unpack('>8xII', f.read(16))
+                if not timescale:
+                    raise HeaderError('zero mvhd timescale')
+                return _info('mp4', duration / timescale)
+    raise HeaderError('no moov/mvhd box')
+
+
+def _ffprobe(path: Path) -> dict:
+    try:
+        out = subprocess.run(
+            ['ffprobe', '-v', 'error', '-select_streams', 'a:0', '-of', 'json',
+             '-show_entries', 'format=duration:stream=sample_rate,channels,codec_name', str(path)],
+            capture_output=True, text=True, check=True)
+        data = json.loads(out.stdout)
+        stream = data.get('streams', [{}])[0]
+        return _info(stream.get('codec_name', 'unknown'), float(data['format']['duration']),
+                     int(stream.get('sample_rate', 0)), int(stream.get('channels', 0)))
+    except (OSError, subprocess.CalledProcessError, ValueError, KeyError, IndexError) as e:
+        raise HeaderError(f'no header parser matched and ffprobe failed: {e}') from e
+
+
+def sniff(head: bytes, suffix: str):
+    """The header parser for a file starting with ``head``."""
+    if head[:4] in (b'RIFF', b'RF64') and head[8:12] == b'WAVE':
+        return _wav
+    if head[:4] == b'FORM' and head[8:12] in (b'AIFF', b'AIFC'):
+        return _aiff
+    if head[:4] == b'fLaC' or (head[:3] == b'ID3' and suffix == '.flac'):
+        return _flac
+    if head[:4] == b'OggS':
+        return _ogg
+    if head[4:8] == b'ftyp':
+        return _mp4
+    if head[:3] == b'ID3' or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+        return _mp3
+    return None
+
+
+def read_header(path: Path) -> dict:
+    """Codec, exact duration, sample rate and channels without decoding audio."""
+    size = os.stat(path).st_size
+    with open(path, 'rb') as f:
+        parser = sniff(f.read(12), path.suffix.lower())
+        if parser is not None:
+            f.seek(0)
+            try:
+                return parser(f, size)
+            except (HeaderError, struct.error, KeyError, IndexError):
+                pass
+    return _ffprobe(path)
+
+
+def _downsampled(path: Path):
+    """Mono float32 chunks of ``path`` at ANALYSIS_RATE (approximately, for
+    WAV files whose rate is not a multiple of it)."""
+    import numpy as np
+
+    rate, chunks = decode(path, ANALYSIS_RATE)
+    step = max(1, round(rate / ANALYSIS_RATE))
+    tail = np.empty(0, np.float32)
+    for chunk in chunks:
+        if step > 1:
+            chunk = np.concatenate((tail, chunk))
+            n = len(chunk) // step * step
+            tail = chunk[n:]
+            chunk = chunk[:n].reshape(-1, step).mean(axis=1)
+        yield rate / step, chunk
+
+
+def analyse(path: Path) -> dict:
+    """Estimate tempo (BPM) and key from the onset envelope and chroma."""
+    import numpy as np
+
+    window = np.hanning(N_FFT).astype(np.float32)
+    carry = np.empty(0, np.float32)
+    previous = None
+    onsets = []
+    chroma = np.zeros(12)
+    rate = ANALYSIS_RATE
+    classes = None
+    for rate, chunk in _downsampled(path):
+        x = np.concatenate((carry, chunk))
+        if len(x) < N_FFT:
+            carry = x
+            continue
+        frames = np.lib.stride_tricks.sliding_window_view(x, N_FFT)[::HOP]
+        carry = x[len(frames) * HOP:]
+        spectrum = np.abs(np.fft.rfft(frames * window, axis=1))
+        if classes is None:
+            freqs = np.fft.rfftfreq(N_FFT, 1 / rate)
+            pitched = (freqs >= 55) & (freqs <= 2000)
+            classes = np.full(len(freqs), -1)
+            classes[pitched] = np.rint(12 * np.log2(freqs[pitched] / 440) + 9).astype(int) % 12
+        log = np.log1p(100 * spectrum)
+        if previous is not None:
+            log = np.vstack((previous, log))
+        flux = np.maximum(np.diff(log, axis=0), 0).sum(axis=1)
+        onsets.append(flux)
+        previous = log[-1:]
+        energy = (spectrum ** 2).sum(axis=0)
+        chroma += np.bincount(classes[classes >= 0], weights=energy[classes >= 0], minlength=12)
+
+    result = {'bpm': None, 'key': None, 'key_confidence': None}
+    envelope = np.concatenate(onsets) if onsets else np.empty(0)
+    frame_rate = rate / HOP
+    if len(envelope) > frame_rate * 4:
+        e = envelope - envelope.mean()
+        n = 1 << int(np.ceil(np.log2(2 * len(e))))
+        spectrum = np.fft.rfft(e, n)
+        acf = np.fft.irfft(spectrum * np.conj(spectrum), n)[:len(e)]
+        lags = np.arange(int(frame_rate * 60 / 200), int(frame_rate * 60 / 60) + 1)
+        bpms = 60 * frame_rate / lags
+        weights = np.exp(-0.5 * (np.log2(bpms / 120) / 0.9) ** 2)
+        best = int(np.argmax(acf[lags] * weights))
+        lag = float(lags[best])
+        if 0 < best < len(lags) - 1:  # parabolic refinement between neighbouring lags
+            a, b, c = acf[lags[best] - 1], acf[lags[best]], acf[lags[best] + 1]
+            if a - 2 * b + c:
+                lag += 0.5 * (a - c) / (a - 2 * b + c)
+        result['bpm'] = round(float(60 * frame_rate / lag), 1)
+    if chroma.any():
+        scores = []
+        for profile, suffix in ((MAJOR_PROFILE, ''), (MINOR_PROFILE, 'm')):
+            for tonic in range(12):
+                r = np.corrcoef(chroma, np.roll(profile, tonic))[0, 1]
+                scores.append((r, f'{KEY_NAMES[tonic]}{suffix}'))
+        scores.sort(reverse=True)
+        result['key'] = scores[0][1]
+        result['key_confidence'] = round(float(scores[0][0] - scores[1][0]), 3)
+    return result
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        while chunk := f.read(1 << 20):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class MetaCache(JsonStore):
+    """Metadata per file, reused by content hash for renamed or copied files."""
+
+    def __init__(self, root: str | Path, cache_path: str | Path | None = None):
+        super().__init__(root, cache_path)
+        self._by_hash = {r['hash']: r['meta'] for r in self._files.values()}
+
+    def lookup(self, path: Path, st: os.stat_result, analysed: bool) -> tuple[str | None, dict | None]:
+        """(content hash if known, cached metadata); unchanged stats skip hashing."""
+        record = self._files.get(self._key(path))
+        if record and (record['mtime_ns'], record['size']) == (st.st_mtime_ns, st.st_size):
+            content_hash = record['hash']
+        else:
+            content_hash = None
+        return content_hash, self.by_hash(content_hash, analysed) if content_hash else None
+
+    def by_hash(self, content_hash: str, analysed: bool) -> dict | None:
+        """Cached metadata for ``content_hash``; header-only or failed analyses
+        do not count when ``analysed`` is asked for."""
+        meta = self._by_hash.get(content_hash)
+        if meta is not None and analysed and ('bpm' not in meta or 'analysis_error' in meta):
+            return None
+        return meta
+
+    def record(self, path: Path, st: os.stat_result, content_hash: str, meta: dict) -> None:
+        self._files[self._key(path)] = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size,
+                                        'hash': content_hash, 'meta': meta}
+        self._by_hash[content_hash] = meta
+        self._dirty = True
+
+
+def process(path: Path, content_hash: str | None, analysed: bool) -> dict:
+    """Worker entry point: hash (if needed), read the header and analyse ``path``."""
+    started = time.perf_counter()
+    result = {'path': str(path)}
+    try:
+        result['hash'] = content_hash or file_digest(path)
+        result['meta'] = meta = read_header(path)
+        if analysed:
+            meta.update(analyse(path))
+    except Exception as e:  # one unreadable upload must not stop the backfill
+        if 'meta' in result:
+            # Keep the duration; the analysis is retried on the next run.
+            result['meta'].update(bpm=None, key=None, key_confidence=None,
+                                  analysis_error=f'{type(e).__name__}: {e}')
+        else:
+            result['error'] = f'{type(e).__name__}: {e}'
+    result['elapsed'] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def _digest_or_none(path: Path) -> str | None:
+    try:
+        return file_digest(path)
+    except OSError:
+        return None
+
+
+class _Inline:
+    """Stand-in for a one-worker pool: maps in this process."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def map(self, fn, *iterables, chunksize=1):
+        return map(fn, *iterables)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='audiometa.py', description='Extract duration, BPM and key for audio files.')
+    parser.add_argument('paths', nargs='+', type=Path, help='audio files or directories to scan')
+    parser.add_argument('--duration-only', action='store_true',
+                        help='only read container headers (no decode, no NumPy)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='worker processes (default: CPU count)')
+    parser.add_argument('--sql', action='store_true',
+                        help='print assets.duration_seconds updates instead of JSON lines')
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f'do not read or write {STATE_DIR}/audiometa.json')
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    analysed = not args.duration_only
+    root = next((p for p in args.paths if p.is_dir()), Path('.')).resolve()
+    cache = MetaCache(root, None if args.no_cache else root / STATE_DIR / 'audiometa.json')
+
+    started = time.perf_counter()
+    tracks = find_audio(args.paths)
+    results: dict[Path, dict] = {}
+    todo: list[tuple[Path, str | None]] = []
+    stats = {}
+    for path in tracks:
+        try:
+            stats[path] = os.stat(path)
+        except OSError as e:
+            results[path] = {'path': str(path), 'error': str(e)}
+            continue
+        content_hash, meta = cache.lookup(path, stats[path], analysed)
+        if meta is not None:
+            results[path] = {'path': str(path), 'hash': content_hash, 'meta': meta, 'cached': True}
+        else:
+            todo.append((path, content_hash))
+
+    jobs = max(1, min(args.jobs, len(todo)))
+    with ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else _Inline() as pool:
+        # Hash first, so copies and renames of analysed files are not decoded again.
+        unhashed = [path for path, content_hash in todo if content_hash is None]
+        hashes = dict(zip(unhashed, pool.map(_digest_or_none, unhashed, chunksize=16)))
+        pending = []
+        duplicates = []
+        for path, content_hash in todo:
+            content_hash = content_hash or hashes[path]
+            meta = content_hash and cache.by_hash(content_hash, analysed)
+            if meta:
+                cache.record(path, stats[path], content_hash, meta)
+                results[path] = {'path': str(path), 'hash': content_hash, 'meta': meta,
+                                 'cached': True}
+            elif content_hash and any(content_hash == h for _, h in pending):
+                duplicates.append((path, content_hash))
+            else:
+                pending.append((path, content_hash))
+        done = list(pool.map(process, [p for p, _ in pending], [h for _, h in pending],
+                             [analysed] * len(pending), chunksize=4))
+    for (path, _), result in zip(pending, done):
+        if 'meta' in result:
+            cache.record(path, stats[path], result['hash'], result['meta'])
+        results[path] = result
+    for path, content_hash in duplicates:
+        meta = cache.by_hash(content_hash, False)
+        if meta is not None:
+            cache.record(path, stats[path], content_hash, meta)
+            results[path] = {'path': str(path), 'hash': content_hash, 'meta': meta, 'cached': True}
+        else:
+            results[path] = {'path': str(path), 'hash': content_hash,
+                             'error': 'identical file failed to parse'}
+    cache.save()
+
+    failed = cached = 0
+    for path in tracks:
+        result = results[path]
+        failed += 'error' in result
+        cached += bool(result.get('cached'))
+        if not args.sql:
+            print(json.dumps(result))
+        elif 'meta' in result:
+            try:
+                key = path.resolve().relative_to(root).as_posix()
+            except ValueError:
+                key = path.name
+            print(f'update public.assets set duration_seconds = {round(result["meta"]["duration"])} '
+                  f'where storage_path = {sql_string(key)};')
+    print(f'{len(tracks)} track(s) in {time.perf_counter() - started:.2f}s with {jobs} job(s): '
+          f'{len(tracks) - cached - failed} analysed, {cached} cached, {failed} failed',
+          file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -234,7 +234,11 @@ const DiscoverFeedItem = ({
 
                             <div className="mt-6 w-full opacity-90">
                                 {/* Minimal Waveform Visualization */}
-                                <WaveformVisualizer isPlaying={active && isPlaying} />
+                                <WaveformVisualizer
+                                    isPlaying={active && isPlaying}
+                                    peaks={displayTrack.waveformData}
+                                    peaksUrl={displayTrack.files?.peaks}
+                                />
                             </div>
                         </div>
 
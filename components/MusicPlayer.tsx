@@ -437,7 +437,11 @@ const MusicPlayer: React.FC<MusicPlayerProps> = ({
 
                                 {/* Visualizer */}
                                 <div className="w-full mb-2 opacity-80">
-                                    <WaveformVisualizer isPlaying={isPlaying} />
+                                    <WaveformVisualizer
+                                        isPlaying={isPlaying}
+                                        peaks={currentTrack?.waveformData}
+                                        peaksUrl={currentTrack?.files?.peaks}
+                                    />
                                 </div>
 
                                 {/* Unified Command Deck - Clean, Performant Scrubber */}
@@ -342,33 +342,16 @@ const UploadPage: React.FC<UploadPageProps> = ({ onPlayTrack, onTogglePlay, isPl
     // --- Load Files on Mount ---
     // --- Load Files on Mount & Listen for Updates ---
     // --- Load Files on Mount & Listen for Updates ---
-    const getAudioDuration = (url: string): Promise<number> => {
-        return new Promise((resolve) => {
-            const audio = new Audio(url);
-            audio.onloadedmetadata = () => resolve(audio.duration);
-            audio.onerror = () => resolve(0); // Fail silently
-        });
-    };
-
     const loadFiles = async () => {
         try {
             const dbFiles = await getUserFiles();
 
-            // Map initial structure
-            const mappedFilesPromise = dbFiles.map(async (f: any) => {
-                let duration = f.duration || 180; // Use stored duration or fallback
+            // Durations come from assets.duration_seconds: measured from the local
+            // file at upload time, or backfilled by `audiometa.py --sql`. Remote
+            // files are never fetched just to learn their length.
+            const mappedFiles = dbFiles.map((f: any) => {
                 const isAudio = f.type && f.type.startsWith('audio');
 
-                // Try to calc duration if audio and not already in DB
-                if (isAudio && (!f.duration || f.duration === 180) && f.url) {
-                    try {
-                        const d = await getAudioDuration(f.url);
-                        if (d > 0) duration = Math.round(d);
-                    } catch (e) {
-                        // ignore
-                    }
-                }
-
                 return {
                     id: f.id,
                     parentId: f.parentId || null,
@@ -377,13 +360,11 @@ const UploadPage: React.FC<UploadPageProps> = ({ onPlayTrack, onTogglePlay, isPl
                     size: f.size,
                     created: new Date().toLocaleDateString(), // TODO: use f.created_at
                     format: f.name.split('.').pop()?.toUpperCase(),
-                    duration: duration,
+                    duration: f.duration || undefined,
                     src: f.url
                 } as FileSystemItem;
             });
 
-            const mappedFiles = await Promise.all(mappedFilesPromise);
-
             // Force state update with new files
             setItems(mappedFiles);
         } catch (error) {
@@ -646,7 +627,7 @@ const UploadPage: React.FC<UploadPageProps> = ({ onPlayTrack, onTogglePlay, isPl
                 tracks: folderFiles.map(f => ({
                     id: f.id,
                     title: f.name,
-                    duration: f.duration || 180,
+                    duration: f.duration || 0,
                     files: { mp3: f.src || '' } // Ensure src is populated
                 })),
                 created: new Date().toISOString()
@@ -1171,7 +1152,7 @@ const UploadPage: React.FC<UploadPageProps> = ({ onPlayTrack, onTogglePlay, isPl
                                         <div className="flex items-center gap-3 mt-1">
                                             <span className="text-[10px] uppercase font-bold text-neutral-600 bg-white/5 px-1.5 py-0.5 rounded">{file.format || file.type}</span>
                                             <span className="text-[10px] font-mono text-neutral-500">{file.size}</span>
-                                            {file.type === 'audio' && <span className="text-[10px] font-mono text-neutral-500">{Math.floor(file.duration! / 60)}:{(file.duration! % 60).toString().padStart(2, '0')}</span>}
+                                            {file.type === 'audio' && !!file.duration && <span className="text-[10px] font-mono text-neutral-500">{Math.floor(file.duration! / 60)}:{(file.duration! % 60).toString().padStart(2, '0')}</span>}
                                         </div>
                                     </div>
 
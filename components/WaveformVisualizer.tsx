@@ -1,17 +1,47 @@
-import React, { useMemo } from 'react';
+import React, { useEffect, useMemo, useState } from 'react';
+import { fetchPeaks } from '../services/peaksService';
+
+const BAR_COUNT = 24;
 
 interface WaveformVisualizerProps {
     isPlaying: boolean;
     color?: string;
+    // Waveform amplitudes (e.g. track.waveformData), resampled to BAR_COUNT
+    peaks?: number[];
+    // Uploaded peak file (track.files.peaks), used when `peaks` is not given
+    peaksUrl?: string;
 }
 
-const WaveformVisualizer: React.FC<WaveformVisualizerProps> = ({ isPlaying, color = 'bg-white' }) => {
-    // Generate bars with random characteristics
-    const bars = useMemo(() => Array.from({ length: 24 }).map(() => ({
-        peakHeight: 40 + Math.random() * 60, // 40% to 100%
+// Pick `length` values and scale them so the loudest is 1
+const resample = (values: number[], length: number) => {
+    const picked = Array.from({ length }, (_, i) => Math.abs(values[Math.floor(i * values.length / length)] ?? 0));
+    const loudest = Math.max(...picked);
+    return loudest > 0 ? picked.map(v => v / loudest) : picked;
+};
+
+const WaveformVisualizer: React.FC<WaveformVisualizerProps> = ({ isPlaying, color = 'bg-white', peaks, peaksUrl }) => {
+    const [fetchedPeaks, setFetchedPeaks] = useState<number[] | null>(null);
+
+    useEffect(() => {
+        setFetchedPeaks(null);
+        if (peaks?.length || !peaksUrl) return;
+        let cancelled = false;
+        fetchPeaks(peaksUrl, BAR_COUNT).then(result => {
+            if (!cancelled) setFetchedPeaks(result);
+        });
+        return () => { cancelled = true; };
+    }, [peaks, peaksUrl]);
+
+    // Real peaks set the bar heights; without them the bars are random
+    const heights = useMemo(
+        () => (peaks?.length ? resample(peaks, BAR_COUNT) : fetchedPeaks),
+        [peaks, fetchedPeaks]
+    );
+    const bars = useMemo(() => Array.from({ length: BAR_COUNT }).map((_, i) => ({
+        peakHeight: heights ? 20 + heights[i] * 80 : 40 + Math.random() * 60, // 20-100% from peaks, 40-100% random
         speed: 0.6 + Math.random() * 0.6,
         delay: Math.random() * -1.0 // Random start time modifier
-    })), []);
+    })), [heights]);
 
     return (
         <div className="w-full h-12 flex items-center justify-center gap-[3px] px-2 overflow-hidden">
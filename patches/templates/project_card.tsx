@@ -1,24 +1,12 @@
-const fs = require('fs');
-
-const filePath = 'c:\\Users\\Shadow\\Desktop\\Music Access V4.0 (Mobile Support)\\components\\ProjectCard.tsx';
-const text = fs.readFileSync(filePath, 'utf-8');
-
-const startMarker = '// Default Layout (Beat Tape / Sound Pack)';
-const endMarker = 'export default ProjectCard;';
-
-const startIdx = text.indexOf(startMarker);
-const endIdx = text.indexOf(endMarker);
-
-if (startIdx !== -1 && endIdx !== -1) {
-    const newCard = `// Default Layout (Beat Tape / Sound Pack)
+// Default Layout (Beat Tape / Sound Pack)
     return (
         <>
             <div
-                className={\`
+                className={`
                     group h-full flex flex-col bg-[#050505] transition-colors duration-300 relative cursor-pointer
-                    \${isLocked ? 'opacity-50 grayscale' : 'hover:bg-[#0a0a0a]'}
-                    \${className}
-                \`}
+                    ${isLocked ? 'opacity-50 grayscale' : 'hover:bg-[#0a0a0a]'}
+                    ${className}
+                `}
                 onMouseEnter={() => setIsHovered(true)}
                 onMouseLeave={() => setIsHovered(false)}
                 onClick={() => {
@@ -30,7 +18,7 @@ if (startIdx !== -1 && endIdx !== -1) {
                         onAction(project);
                         return;
                     }
-                    navigate(\`/listen/\${project.shortId || project.id}\`);
+                    navigate(`/listen/${project.shortId || project.id}`);
                 }}
             >
                 {/* Locked Overlay */}
@@ -82,7 +70,7 @@ if (startIdx !== -1 && endIdx !== -1) {
                                                         const totalSeconds = project.tracks.reduce((acc, t) => acc + t.duration, 0);
                                                         const minutes = Math.floor(totalSeconds / 60);
                                                         const seconds = Math.floor(totalSeconds % 60);
-                                                        return \`\${minutes}:\${seconds.toString().padStart(2, '0')}\`;
+                                                        return `${minutes}:${seconds.toString().padStart(2, '0')}`;
                                                     })()}
                                                 </span>
                                             </div>
@@ -128,10 +116,10 @@ if (startIdx !== -1 && endIdx !== -1) {
                                                 {customMenuItems?.map((item, idx) => (
                                                     <button
                                                         key={idx}
-                                                        className={\`w-full flex items-center gap-2 px-3 py-2 transition-colors text-left \${item.variant === 'danger' ? 'text-red-400 hover:bg-red-500/10' :
+                                                        className={`w-full flex items-center gap-2 px-3 py-2 transition-colors text-left ${item.variant === 'danger' ? 'text-red-400 hover:bg-red-500/10' :
                                                             item.variant === 'success' ? 'text-green-400 hover:bg-green-500/10' :
                                                                 'text-neutral-400 hover:text-white hover:bg-white/5'
-                                                            }\`}
+                                                            }`}
                                                         onClick={(e) => {
                                                             e.stopPropagation();
                                                             setShowMenu(false);
@@ -190,10 +178,10 @@ if (startIdx !== -1 && endIdx !== -1) {
                 </div>
 
                 {/* AI Analysis Overlay */}
-                <div className={\`
+                <div className={`
                     overflow-hidden transition-all duration-300 bg-[#0a0a0a]
-                    \${description ? 'max-h-32 opacity-100' : 'max-h-0 opacity-0'}
-               \`}>
+                    ${description ? 'max-h-32 opacity-100' : 'max-h-0 opacity-0'}
+               `}>
                     <div className="px-4 py-3 md:px-5 md:py-4 flex items-start gap-3">
                         <div className="mt-0.5 text-primary">
                             <Sparkles size={12} className="animate-pulse" />
@@ -213,8 +201,8 @@ if (startIdx !== -1 && endIdx !== -1) {
                         {(() => {
                             const tracksToShow = [...project.tracks];
                             if (!hideEmptySlots) {
-                                while (tracksToShow.length < 6) {
-                                    tracksToShow.push({ id: \`empty-\${tracksToShow.length}\`, title: 'EMPTY_SLOT', duration: 0, isPlaceholder: true } as any);
+                                while (tracksToShow.length < {%empty_slots|6%}) {
+                                    tracksToShow.push({ id: `empty-${tracksToShow.length}`, title: 'EMPTY_SLOT', duration: 0, isPlaceholder: true } as any);
                                 }
                             }
 
@@ -239,18 +227,18 @@ if (startIdx !== -1 && endIdx !== -1) {
                                     );
                                 }
 
-                                const trackId = track.id || \`track-\${idx}\`;
+                                const trackId = track.id || `track-${idx}`;
                                 const isTrackPlaying = isPlaying && currentTrackId === trackId;
                                 return (
                                     <div
                                         key={trackId}
-                                        className={\`
+                                        className={`
                                             flex items-center px-4 md:px-5 py-2.5 transition-colors duration-200 cursor-pointer group/track font-mono
-                                            \${isTrackPlaying
+                                            ${isTrackPlaying
                                                 ? 'bg-[#0a0a0a] text-primary'
                                                 : 'text-neutral-500 hover:text-neutral-300 hover:bg-white/[0.02]'
                                             }
-                                        \`}
+                                        `}
                                         onClick={(e) => {
                                             e.stopPropagation();
                                             isTrackPlaying ? onTogglePlay() : onPlayTrack(trackId);
@@ -270,7 +258,7 @@ if (startIdx !== -1 && endIdx !== -1) {
                                         </div>
 
                                         <div className="flex-1 min-w-0 mr-3">
-                                            <div className={\`text-[11px] uppercase tracking-wider truncate transition-colors \${isTrackPlaying ? 'text-primary' : ''}\`}>
+                                            <div className={`text-[11px] uppercase tracking-wider truncate transition-colors ${isTrackPlaying ? 'text-primary' : ''}`}>
                                                 {track.title}
                                             </div>
                                         </div>
@@ -311,7 +299,7 @@ if (startIdx !== -1 && endIdx !== -1) {
                             onClick={(e) => {
                                 e.stopPropagation();
                                 const handle = project.producerHandle || project.producer;
-                                navigate(\`/@\${handle}\`);
+                                navigate(`/@${handle}`);
                             }}
                             className="h-6 w-6 bg-[#0a0a0a] flex items-center justify-center text-[10px] font-mono font-bold uppercase shrink-0 transition-colors cursor-pointer"
                         >
@@ -325,7 +313,7 @@ if (startIdx !== -1 && endIdx !== -1) {
                             onClick={(e) => {
                                 e.stopPropagation();
                                 const handle = project.producerHandle || project.producer;
-                                navigate(\`/@\${handle}\`);
+                                navigate(`/@${handle}`);
                             }}
                             className="text-[10px] font-mono font-bold text-neutral-500 hover:text-white transition-colors uppercase tracking-widest cursor-pointer truncate"
                         >
@@ -333,16 +321,16 @@ if (startIdx !== -1 && endIdx !== -1) {
                         </span>
                     </div>
 
-                    <div className={\`flex items-center gap-2 shrink-0 \${hideActions ? 'hidden' : ''}\`}>
+                    <div className={`flex items-center gap-2 shrink-0 ${hideActions ? 'hidden' : ''}`}>
                         <button
                             onClick={(e) => {
                                 e.stopPropagation();
                                 handleAnalyze();
                             }}
-                            className={\`
+                            className={`
                                 p-1.5 transition-colors
-                                \${description ? 'text-primary' : 'text-neutral-600 hover:text-white'}
-                            \`}
+                                ${description ? 'text-primary' : 'text-neutral-600 hover:text-white'}
+                            `}
                             title="Generate AI Analysis"
                         >
                             <Cpu size={14} className={loadingDesc ? "animate-spin" : ""} />
@@ -350,7 +338,7 @@ if (startIdx !== -1 && endIdx !== -1) {
 
                         <button
                             onClick={handleToggleSave}
-                            className={\`p-1.5 transition-colors \${isSaved ? 'text-primary' : 'text-neutral-600 hover:text-white'}\`}
+                            className={`p-1.5 transition-colors ${isSaved ? 'text-primary' : 'text-neutral-600 hover:text-white'}`}
                             title={isSaved ? "Unsave Project" : "Save Project"}
                         >
                             <Bookmark size={14} fill={isSaved ? "currentColor" : "none"} />
@@ -360,15 +348,15 @@ if (startIdx !== -1 && endIdx !== -1) {
                         <button
                             onClick={canUndo ? handleUndoGem : handleGiveGem}
                             disabled={(isOwnProject && !canUndo) || isGemLoading}
-                            className={\`
+                            className={`
                                 flex items-center gap-1.5 p-1.5 transition-colors
-                                \${isOwnProject && !canUndo
+                                ${isOwnProject && !canUndo
                                     ? 'text-neutral-700 cursor-not-allowed'
                                     : hasGivenGem
                                         ? 'text-primary'
                                         : 'text-neutral-600 hover:text-primary'
                                 }
-                            \`}
+                            `}
                             title={
                                 isOwnProject
                                     ? "Cannot give gems to own project"
@@ -378,7 +366,7 @@ if (startIdx !== -1 && endIdx !== -1) {
                             }
                         >
                             <Gem size={14} />
-                            <span className={\`text-[10px] font-mono \${hasGivenGem ? 'text-primary' : 'text-neutral-600'}\`}>
+                            <span className={`text-[10px] font-mono ${hasGivenGem ? 'text-primary' : 'text-neutral-600'}`}>
                                 {canUndo ? "UNDO" : localGems}
                             </span>
                         </button>
@@ -390,13 +378,13 @@ if (startIdx !== -1 && endIdx !== -1) {
                                     if (!isOwnProject) openPurchaseModal(project);
                                 }}
                                 disabled={isOwnProject}
-                                className={\`
+                                className={`
                                     p-1.5 transition-colors
-                                    \${isOwnProject
+                                    ${isOwnProject
                                         ? 'text-neutral-700 cursor-not-allowed'
                                         : 'text-neutral-600 hover:text-primary'
                                     }
-                                \`}
+                                `}
                                 title={isOwnProject ? "Cannot purchase own project" : "Add to Cart"}
                             >
                                 <ShoppingCart size={14} />
@@ -409,33 +397,3 @@ if (startIdx !== -1 && endIdx !== -1) {
     );
 };
 
-export default ProjectCard;
-
-export const ProjectSkeleton: React.FC = () => (
-    <div className="flex flex-col h-full bg-[#050505] animate-pulse">
-        <div className="p-4 md:p-5">
-            <div className="h-6 w-3/4 bg-neutral-900 mb-2"></div>
-        </div>
-        <div className="flex-1 p-0">
-            {[...Array(6)].map((_, i) => (
-                <div key={i} className="h-10 w-full bg-[#0a0a0a]"></div>
-            ))}
-        </div>
-        <div className="p-4 md:p-5 flex justify-between items-center">
-            <div className="flex items-center gap-3">
-                <div className="h-6 w-6 bg-neutral-900"></div>
-                <div className="h-3 w-20 bg-neutral-900"></div>
-            </div>
-            <div className="flex gap-2">
-                <div className="h-4 w-4 bg-neutral-900"></div>
-                <div className="h-4 w-4 bg-neutral-900"></div>
-            </div>
-        </div>
-    </div>
-);
-`;
-    fs.writeFileSync(filePath, text.slice(0, startIdx) + newCard);
-    console.log("Successfully replaced layout");
-} else {
-    console.log("Markers not found");
-}
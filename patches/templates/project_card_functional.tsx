@@ -1,24 +1,12 @@
-const fs = require('fs');
-
-const filePath = 'c:\\Users\\Shadow\\Desktop\\Music Access V4.0 (Mobile Support)\\components\\ProjectCard.tsx';
-const text = fs.readFileSync(filePath, 'utf-8');
-
-const startMarker = '// Default Layout (Beat Tape / Sound Pack)';
-const endMarker = 'export default ProjectCard;';
-
-const startIdx = text.indexOf(startMarker);
-const endIdx = text.indexOf(endMarker);
-
-if (startIdx !== -1 && endIdx !== -1) {
-    const newCard = `// Default Layout (Beat Tape / Sound Pack)
+// Default Layout (Beat Tape / Sound Pack)
     return (
         <>
             <div
-                className={\`
+                className={`
                     group h-full flex flex-col bg-[#050505] transition-colors duration-300 relative cursor-pointer
-                    \${isLocked ? 'opacity-50 grayscale' : 'hover:bg-[#0a0a0a]'}
-                    \${className}
-                \`}
+                    ${isLocked ? 'opacity-50 grayscale' : 'hover:bg-[#0a0a0a]'}
+                    ${className}
+                `}
                 onMouseEnter={() => setIsHovered(true)}
                 onMouseLeave={() => setIsHovered(false)}
                 onClick={() => {
@@ -30,7 +18,7 @@ if (startIdx !== -1 && endIdx !== -1) {
                         onAction(project);
                         return;
                     }
-                    navigate(\`/listen/\${project.shortId || project.id}\`);
+                    navigate(`/listen/${project.shortId || project.id}`);
                 }}
             >
                 {/* Locked Overlay */}
@@ -78,10 +66,10 @@ if (startIdx !== -1 && endIdx !== -1) {
                                                     {customMenuItems?.map((item, idx) => (
                                                         <button
                                                             key={idx}
-                                                            className={\`w-full flex items-center gap-2 px-3 py-2 transition-colors text-left \${item.variant === 'danger' ? 'text-red-400 hover:bg-red-500/10' :
+                                                            className={`w-full flex items-center gap-2 px-3 py-2 transition-colors text-left ${item.variant === 'danger' ? 'text-red-400 hover:bg-red-500/10' :
                                                                 item.variant === 'success' ? 'text-green-400 hover:bg-green-500/10' :
                                                                     'text-neutral-400 hover:text-white hover:bg-white/5'
-                                                                }\`}
+                                                                }`}
                                                             onClick={(e) => {
                                                                 e.stopPropagation();
                                                                 setShowMenu(false);
@@ -166,10 +154,10 @@ if (startIdx !== -1 && endIdx !== -1) {
                 </div>
 
                 {/* AI Analysis Overlay */}
-                <div className={\`
+                <div className={`
                     overflow-hidden transition-all duration-300 bg-[#0a0a0a]
-                    \${description ? 'max-h-32 opacity-100' : 'max-h-0 opacity-0'}
-               \`}>
+                    ${description ? 'max-h-32 opacity-100' : 'max-h-0 opacity-0'}
+               `}>
                     <div className="px-4 py-3 md:px-5 md:py-4 flex items-start gap-3">
                         <div className="mt-0.5 text-primary">
                             <Sparkles size={12} className="animate-pulse" />
@@ -189,8 +177,8 @@ if (startIdx !== -1 && endIdx !== -1) {
                         {(() => {
                             const tracksToShow = [...project.tracks];
                             if (!hideEmptySlots) {
-                                while (tracksToShow.length < 5) {
-                                    tracksToShow.push({ id: \`empty-\${tracksToShow.length}\`, title: 'EMPTY_SLOT', duration: 0, isPlaceholder: true } as any);
+                                while (tracksToShow.length < {%empty_slots|5%}) {
+                                    tracksToShow.push({ id: `empty-${tracksToShow.length}`, title: 'EMPTY_SLOT', duration: 0, isPlaceholder: true } as any);
                                 }
                             }
 
@@ -215,18 +203,18 @@ if (startIdx !== -1 && endIdx !== -1) {
                                     );
                                 }
 
-                                const trackId = track.id || \`track-\${idx}\`;
+                                const trackId = track.id || `track-${idx}`;
                                 const isTrackPlaying = isPlaying && currentTrackId === trackId;
                                 return (
                                     <div
                                         key={trackId}
-                                        className={\`
+                                        className={`
                                             flex items-center px-4 md:px-5 py-2 transition-colors duration-200 cursor-pointer group/track
-                                            \${isTrackPlaying
+                                            ${isTrackPlaying
                                                 ? 'bg-[#0a0a0a] text-primary'
                                                 : 'text-neutral-500 hover:text-neutral-300 hover:bg-white/[0.04]'
                                             }
-                                        \`}
+                                        `}
                                         onClick={(e) => {
                                             e.stopPropagation();
                                             isTrackPlaying ? onTogglePlay() : onPlayTrack(trackId);
@@ -246,7 +234,7 @@ if (startIdx !== -1 && endIdx !== -1) {
                                         </div>
 
                                         <div className="flex-1 min-w-0 mr-3">
-                                            <div className={\`text-[12px] font-medium tracking-tight truncate transition-colors \${isTrackPlaying ? 'text-primary' : ''}\`}>
+                                            <div className={`text-[12px] font-medium tracking-tight truncate transition-colors ${isTrackPlaying ? 'text-primary' : ''}`}>
                                                 {track.title}
                                             </div>
                                         </div>
@@ -286,7 +274,7 @@ if (startIdx !== -1 && endIdx !== -1) {
                         <div className="flex items-center gap-3 overflow-hidden" onClick={(e) => {
                                 e.stopPropagation();
                                 const handle = project.producerHandle || project.producer;
-                                navigate(\`/@\${handle}\`);
+                                navigate(`/@${handle}`);
                             }}>
                             <div className="h-6 w-6 bg-white text-black flex items-center justify-center text-[10px] font-mono font-bold uppercase shrink-0 transition-colors cursor-pointer">
                                 {project.producerAvatar ? (
@@ -301,10 +289,10 @@ if (startIdx !== -1 && endIdx !== -1) {
                         </div>
                     </div>
 
-                    <div className={\`grid grid-cols-4 gap-2 shrink-0 \${hideActions ? 'hidden' : ''}\`}>
+                    <div className={`grid grid-cols-4 gap-2 shrink-0 ${hideActions ? 'hidden' : ''}`}>
                         <button
                             onClick={(e) => { e.stopPropagation(); handleAnalyze(); }}
-                            className={\`flex items-center justify-center gap-1.5 py-2 px-1 transition-colors text-[9px] font-mono tracking-widest uppercase \${description ? 'bg-primary/10 text-primary' : 'bg-white/5 text-neutral-400 hover:bg-white/10 hover:text-white'}\`}
+                            className={`flex items-center justify-center gap-1.5 py-2 px-1 transition-colors text-[9px] font-mono tracking-widest uppercase ${description ? 'bg-primary/10 text-primary' : 'bg-white/5 text-neutral-400 hover:bg-white/10 hover:text-white'}`}
                         >
                             <Cpu size={10} className={loadingDesc ? "animate-spin" : ""} />
                             <span className="hidden sm:inline">Analyze</span>
@@ -312,7 +300,7 @@ if (startIdx !== -1 && endIdx !== -1) {
 
                         <button
                             onClick={handleToggleSave}
-                            className={\`flex items-center justify-center gap-1.5 py-2 px-1 transition-colors text-[9px] font-mono tracking-widest uppercase \${isSaved ? 'bg-white/10 text-white' : 'bg-white/5 text-neutral-400 hover:bg-white/10 hover:text-white'}\`}
+                            className={`flex items-center justify-center gap-1.5 py-2 px-1 transition-colors text-[9px] font-mono tracking-widest uppercase ${isSaved ? 'bg-white/10 text-white' : 'bg-white/5 text-neutral-400 hover:bg-white/10 hover:text-white'}`}
                         >
                             <Bookmark size={10} fill={isSaved ? "currentColor" : "none"} />
                             <span className="hidden sm:inline">Save</span>
@@ -321,7 +309,7 @@ if (startIdx !== -1 && endIdx !== -1) {
                         <button
                             onClick={canUndo ? handleUndoGem : handleGiveGem}
                             disabled={(isOwnProject && !canUndo) || isGemLoading}
-                            className={\`flex items-center justify-center gap-1.5 py-2 px-1 transition-colors text-[9px] font-mono tracking-widest uppercase \${isOwnProject && !canUndo ? 'bg-white/5 text-neutral-600 cursor-not-allowed' : hasGivenGem ? 'bg-primary/10 text-primary' : 'bg-white/5 text-neutral-400 hover:bg-white/10 hover:text-white'}\`}
+                            className={`flex items-center justify-center gap-1.5 py-2 px-1 transition-colors text-[9px] font-mono tracking-widest uppercase ${isOwnProject && !canUndo ? 'bg-white/5 text-neutral-600 cursor-not-allowed' : hasGivenGem ? 'bg-primary/10 text-primary' : 'bg-white/5 text-neutral-400 hover:bg-white/10 hover:text-white'}`}
                         >
                             <Gem size={10} />
                             <span>{canUndo ? "UNDO" : localGems}</span>
@@ -334,10 +322,10 @@ if (startIdx !== -1 && endIdx !== -1) {
                                     if (!isOwnProject) openPurchaseModal(project);
                                 }}
                                 disabled={isOwnProject}
-                                className={\`col-span-1 flex items-center justify-center gap-1.5 py-2 px-1 transition-colors text-[10px] font-mono font-bold tracking-widest uppercase \${isOwnProject ? 'bg-white/5 text-neutral-600 cursor-not-allowed' : 'bg-primary text-black hover:bg-primary/80'}\`}
+                                className={`col-span-1 flex items-center justify-center gap-1.5 py-2 px-1 transition-colors text-[10px] font-mono font-bold tracking-widest uppercase ${isOwnProject ? 'bg-white/5 text-neutral-600 cursor-not-allowed' : 'bg-primary text-black hover:bg-primary/80'}`}
                             >
                                 <ShoppingCart size={11} />
-                                <span>\${project.price || '0.00'}</span>
+                                <span>${project.price || '0.00'}</span>
                             </button>
                         ) : (
                            <div className="col-span-1 flex items-center justify-center gap-1.5 py-2 px-1 bg-green-500/10 text-green-500 text-[10px] font-mono font-bold tracking-widest uppercase">
@@ -350,10 +338,4 @@ if (startIdx !== -1 && endIdx !== -1) {
         </>
     );
 };
-`;
 
-    fs.writeFileSync(filePath, text.slice(0, startIdx) + newCard + '\n\n' + endMarker + '\n');
-    console.log("Successfully overhauled layout to Functional Brutalism");
-} else {
-    console.log("Markers not found");
-}
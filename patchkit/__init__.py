@@ -0,0 +1,27 @@
+"""Manifest-driven region splicing for the source tree (the engine behind patch.py)."""
+
+from .cache import ApplyCache, entries_digest
+from .engine import ENGINES, apply_file
+from .errors import ManifestError, MarkerError, PatchError
+from .instrument import Instrumentation
+from .journal import Transaction, TransactionError, recover, rollback
+from .manifest import Entry, Manifest, group_by_file, load_manifest, load_manifests
+from .markers import (MarkerAutomaton, MarkerIndex, Problem, automaton_for, entry_markers,
+                      find_markers, search_markers)
+from .report import ABORTED, ALREADY_APPLIED, APPLIED, ERROR, MARKERS_MISSING, FileResult, Report
+from .runner import apply_manifest
+from .splice import Region, locate, splice
+from .templates import Template, compile_template, load_template, render_template
+from .tsx import TokenStream, find_region, tokenize
+from .watch import watch
+
+__all__ = [
+    'ABORTED', 'ALREADY_APPLIED', 'APPLIED', 'ENGINES', 'ERROR', 'MARKERS_MISSING',
+    'ApplyCache', 'Entry', 'FileResult', 'Instrumentation', 'Manifest', 'ManifestError',
+    'MarkerAutomaton', 'MarkerError', 'MarkerIndex', 'PatchError', 'Problem', 'Region', 'Report',
+    'Template', 'TokenStream', 'Transaction', 'TransactionError',
+    'apply_file', 'apply_manifest', 'automaton_for', 'compile_template', 'entries_digest',
+    'entry_markers', 'find_markers', 'find_region', 'group_by_file', 'load_manifest',
+    'load_manifests', 'load_template', 'locate', 'recover', 'render_template', 'rollback',
+    'search_markers', 'splice', 'tokenize', 'watch',
+]
@@ -0,0 +1,466 @@
+"""Benchmarks for the patch engine on synthetic TSX corpora.
+
+    python -m patchkit.bench                          # 'small' preset
+    python -m patchkit.bench --preset large -o HEAD.json
+    python -m patchkit.bench --compare BASE.json -o HEAD.json
+
+A corpus shaped like ``components/`` is generated in a temporary directory:
+``--files`` components whose sizes are log-uniformly distributed between
+``--min-size`` and ``--max-size``, each carrying 1..``--regions`` marker
+delimited regions, plus a manifest addressing every region.
+
+Three kinds of numbers are collected, all written to the JSON report so
+that runs on different commits can be compared with ``--compare``:
+
+``stages``
+    per-engine time spent in each stage of splicing a file (read, decode,
+    search, splice, encode, write for the text engine; map, search, encode,
+    write for the mmap engine, which splices while writing; map, search,
+    diff, write for 'minimal', the minimal-diff write mode, which copies the
+    unchanged spans in the kernel and writes only the changed bytes),
+    measured by driving the engine's building blocks directly, plus the
+    bytes each engine writes from user space. Staged output is discarded,
+    so the corpus is not modified; 'minimal' therefore always assembles a
+    copy here rather than writing in place.
+``runs``
+    end-to-end ``apply_manifest`` wall time per engine and job count, cold
+    and again with a warm apply cache, with the bytes written and copied.
+    'minimal' runs use the 'auto' engine in minimal write mode. Runs
+    alternate between two replacement variants of equal length, so every
+    cold run really rewrites every region, and a cold 'minimal' run on a
+    corpus an earlier run already patched writes in place.
+``markers``
+    time to find ``--marker-counts`` markers in the first
+    ``MARKER_SAMPLE_BYTES`` of the corpus with one ``str.find`` scan per
+    marker and with the Aho-Corasick automaton, to check where
+    ``markers.AUTOMATON_MIN_MARKERS`` switches from one to the other.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from .cache import ApplyCache
+from .inplace import minimal_edits, new_size, stage_copied
+from .instrument import Instrumentation, totals
+from .manifest import Entry, Manifest, group_by_file, load_manifest
+from .markers import (AUTOMATON_MIN_MARKERS, MarkerAutomaton, MarkerIndex, entry_markers,
+                      find_markers, search_markers)
+from .runner import apply_manifest, default_jobs
+from .splice import locate, splice
+from .staging import discard, stage_bytes
+from .store import STATE_DIR
+from .stream import locate_bytes, mapped, stage_spliced
+
+#: Corpus shapes. Sizes are log-uniform, so the mean file is
+#: ``(max - min) / ln(max / min)``: about 15 KB for 1 KB..64 KB and 3.9 MB for
+#: 1 MB..10 MB, i.e. roughly 15 MB, 150 MB, 1.5 GB and 800 MB of corpus.
+PRESETS = {
+    'small': dict(files=1000, min_size=1024, max_size=64 * 1024, regions=4),
+    'medium': dict(files=10_000, min_size=1024, max_size=64 * 1024, regions=8),
+    'large': dict(files=100_000, min_size=1024, max_size=64 * 1024, regions=8),
+    'big-files': dict(files=200, min_size=1024 * 1024, max_size=10 * 1024 * 1024, regions=16),
+}
+
+STAGE_ENGINES = ('text', 'mmap', 'minimal')
+
+#: Text searched by the marker benchmark, about the size of ``components/``.
+MARKER_SAMPLE_BYTES = 2_000_000
+
+_HEADER = """import React, {{ useState }} from 'react';
+import {{ Project }} from '../types';
+
+interface Bench{n}Props {{
+    project: Project;
+    onOpen?: (id: string) => void;
+}}
+
+"""
+
+_BLOCK = """const Row{n}_{i}: React.FC<Bench{n}Props> = ({{ project, onOpen }}) => {{
+    const [open, setOpen] = useState(false);
+    return (
+        <div className="flex items-center px-4 py-2 border-b border-white/5" onClick={{() => onOpen?.(project.id)}}>
+            <span className="text-[10px] font-mono text-neutral-500">{{project.title}}</span>
+            {{open && <div className="ml-auto text-xs">{{project.tracks.length}} tracks</div>}}
+        </div>
+    );
+}};
+
+"""
+
+_REPLACEMENT = """// @bench-region {k} start
+    return (
+        <section className="grid grid-cols-2 gap-{v}">
+            <h3 className="text-sm font-bold">{{project.title}}</h3>
+            <p className="text-xs text-neutral-{v}00">variant {v}</p>
+        </section>
+    );
+"""
+
+
+def _start(k: int) -> str:
+    return f'// @bench-region {k} start'
+
+
+def _end(k: int) -> str:
+    return f'// @bench-region {k} end'
+
+
+def generate(root: Path, files: int, min_size: int, max_size: int, regions: int,
+             seed: int = 0) -> list[int]:
+    """Write a synthetic corpus under ``root``; returns each file's region count."""
+    rng = random.Random(seed)
+    components = root / 'components'
+    components.mkdir(parents=True, exist_ok=True)
+    layout = []
+    for n in range(files):
+        size = int(math.exp(rng.uniform(math.log(min_size), math.log(max_size))))
+        count = rng.randint(1, regions)
+        header = _HEADER.format(n=n)
+        block = _BLOCK.format(n=n, i='{i}')
+        # Regions are spread evenly through the filler blocks.
+        blocks = max(count, (size - len(header)) // len(block))
+        every = blocks // count
+        parts = [header]
+        for i in range(blocks):
+            if i % every == 0 and i // every < count:
+                k = i // every
+                parts.append(f'{_start(k)}\n    return null;\n{_end(k)}\n\n')
+            parts.append(block.replace('{i}', str(i)))
+        data = ''.join(parts).encode('utf-8')
+        (components / f'Bench{n}.tsx').write_bytes(data)
+        layout.append(count)
+    return layout
+
+
+def write_manifest(root: Path, layout: list[int], variant: int) -> Path:
+    path = root / 'patches' / f'bench-{variant}.json'
+    path.parent.mkdir(exist_ok=True)
+    entries = [
+        {'file': f'components/Bench{n}.tsx', 'start': _start(k), 'end': _end(k),
+         'text': _REPLACEMENT.format(k=k, v=variant + 1)}
+        for n, count in enumerate(layout) for k in range(count)
+    ]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'root': '..', 'entries': entries}, f)
+    return path
+
+
+def scan(root: Path) -> list[int]:
+    """Region counts of a corpus generated by an earlier run."""
+    layout = []
+    for n in range(len(os.listdir(root / 'components'))):
+        with open(root / 'components' / f'Bench{n}.tsx', 'rb') as f:
+            layout.append(f.read().count(b'// @bench-region ') // 2)
+    return layout
+
+
+def _stages_text(path: Path, entries: list[Entry], clock) -> tuple[dict[str, int], int]:
+    t0 = clock()
+    with open(path, 'rb') as f:
+        raw = f.read()
+    t1 = clock()
+    text = raw.decode('utf-8')
+    t2 = clock()
+    hits = search_markers(entry_markers(entries), text)
+    regions = [locate(text, entry, hits) for entry in entries]
+    t3 = clock()
+    new_text = splice(text, regions)
+    t4 = clock()
+    data = new_text.encode('utf-8')
+    t5 = clock()
+    discard(stage_bytes(path, data))
+    t6 = clock()
+    return {'read': t1 - t0, 'decode': t2 - t1, 'search': t3 - t2, 'splice': t4 - t3,
+            'encode': t5 - t4, 'write': t6 - t5}, len(data)
+
+
+def _stages_mmap(path: Path, entries: list[Entry], clock) -> tuple[dict[str, int], int]:
+    t0 = clock()
+    with mapped(path) as buf:
+        t1 = clock()
+        spans = []
+        for entry in entries:
+            start, end, _ = locate_bytes(buf, entry)
+            spans.append((start, end))
+        t2 = clock()
+        regions = [(start, end, entry.replacement.encode('utf-8'))
+                   for (start, end), entry in zip(spans, entries)]
+        t3 = clock()
+        tmp, _ = stage_spliced(path, buf, regions)
+        t4 = clock()
+        written = new_size(len(buf), regions)
+    discard(tmp)
+    return {'map': t1 - t0, 'search': t2 - t1, 'encode': t3 - t2, 'write': t4 - t3}, written
+
+
+def _stages_minimal(path: Path, entries: list[Entry], clock) -> tuple[dict[str, int], int]:
+    t0 = clock()
+    with mapped(path) as buf:
+        t1 = clock()
+        regions = [locate_bytes(buf, entry) for entry in entries]
+        t2 = clock()
+        edits = minimal_edits(buf, regions)
+        t3 = clock()
+        size = len(buf)
+    tmp = stage_copied(path, size, edits)
+    t4 = clock()
+    discard(tmp)
+    return ({'map': t1 - t0, 'search': t2 - t1, 'diff': t3 - t2, 'write': t4 - t3},
+            sum(len(data) for _, _, data in edits))
+
+
+_STAGES = {'text': _stages_text, 'mmap': _stages_mmap, 'minimal': _stages_minimal}
+
+
+def bench_stages(manifest: Manifest, engines: tuple[str, ...], repeat: int) -> dict:
+    """Per-stage totals for each engine; the best of ``repeat`` passes is kept."""
+    groups = group_by_file(manifest.entries)
+    sizes = {path: os.stat(path).st_size for path in groups}
+    total_bytes = sum(sizes.values())
+    clock = time.perf_counter_ns
+    out = {}
+    for engine in engines:
+        measure = _STAGES[engine]
+        best: dict[str, int] | None = None
+        per_file: list[int] = []
+        for _ in range(repeat):
+            spent: dict[str, int] = {}
+            files = []
+            written = 0
+            for path, entries in groups.items():
+                stages, nbytes = measure(path, entries, clock)
+                for stage, ns in stages.items():
+                    spent[stage] = spent.get(stage, 0) + ns
+                files.append(sum(stages.values()))
+                written += nbytes
+            if best is None or sum(spent.values()) < sum(best.values()):
+                best, per_file = spent, files
+        per_file.sort()
+        out[engine] = {
+            'stages': {
+                stage: {'seconds': round(ns / 1e9, 6),
+                        'mb_per_s': round(total_bytes / 1e6 / (ns / 1e9), 1) if ns else None}
+                for stage, ns in best.items()
+            },
+            'total_seconds': round(sum(best.values()) / 1e9, 6),
+            'written_bytes': written,
+            'per_file_us': {
+                'median': round(statistics.median(per_file) / 1e3, 1),
+                'p95': round(per_file[int(len(per_file) * 0.95)] / 1e3, 1),
+                'max': round(per_file[-1] / 1e3, 1),
+            },
+        }
+    return out
+
+
+def bench_runs(root: Path, manifests: list[Path], engines: tuple[str, ...],
+               jobs: list[int]) -> list[dict]:
+    """End-to-end ``apply_manifest`` runs: cold, then warm (apply cache hit)."""
+    runs = []
+    variant = 0
+    for name in engines:
+        engine, write_mode = ('auto', 'minimal') if name == 'minimal' else (name, 'replace')
+        for n in jobs:
+            state = root / STATE_DIR
+            shutil.rmtree(state, ignore_errors=True)
+            # Switching variant makes every region differ from the file.
+            variant = 1 - variant
+            manifest = load_manifest(manifests[variant])
+            for phase in ('cold', 'warm'):
+                index = MarkerIndex(root, state / 'markers.json')
+                cache = ApplyCache(root, state / 'applied.json')
+                report = apply_manifest(manifest, index=index, cache=cache, engine=engine, jobs=n,
+                                        instrument=Instrumentation(), write_mode=write_mode)
+                stages = totals(report)
+                runs.append({'engine': name, 'jobs': report.jobs, 'phase': phase,
+                             'seconds': round(report.elapsed, 6), 'counts': dict(report.counts()),
+                             'written_bytes': stages.get('write', {}).get('bytes', 0),
+                             'copied_bytes': stages.get('copy', {}).get('bytes', 0)})
+    return runs
+
+
+def bench_markers(root: Path, counts: list[int], repeat: int) -> list[dict]:
+    """Best-of-``repeat`` search time per marker count for both searches.
+
+    Half of the markers open and half close a region; markers past the
+    corpus's last region do not occur, which still costs a full scan.
+    """
+    parts, size = [], 0
+    for path in sorted((root / 'components').iterdir()):
+        parts.append(path.read_text(encoding='utf-8'))
+        size += len(parts[-1])
+        if size >= MARKER_SAMPLE_BYTES:
+            break
+    text = ''.join(parts)[:MARKER_SAMPLE_BYTES]
+    clock = time.perf_counter_ns
+    out = []
+    for count in counts:
+        markers = [f(k) for k in range((count + 1) // 2) for f in (_start, _end)][:count]
+        automaton = MarkerAutomaton(markers)
+        best = {}
+        for name, search in (('find', lambda: find_markers(markers, text)),
+                             ('automaton', lambda: automaton.search(text))):
+            spent = []
+            for _ in range(repeat):
+                t0 = clock()
+                search()
+                spent.append(clock() - t0)
+            best[name] = min(spent)
+        out.append({'markers': count, 'find_seconds': round(best['find'] / 1e9, 6),
+                    'automaton_seconds': round(best['automaton'] / 1e9, 6),
+                    'searched_with': 'automaton' if count >= AUTOMATON_MIN_MARKERS else 'find'})
+    return out
+
+
+def _commit() -> str | None:
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                             text=True, cwd=Path(__file__).parent, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def _metrics(report: dict) -> dict[str, float]:
+    """Flatten a report into comparable ``name -> seconds`` pairs."""
+    flat = {}
+    for engine, data in report.get('stages', {}).items():
+        for stage, values in data['stages'].items():
+            flat[f'stage {engine}/{stage}'] = values['seconds']
+        flat[f'stage {engine}/total'] = data['total_seconds']
+    for run in report.get('runs', []):
+        flat[f'run {run["engine"]} -j{run["jobs"]} {run["phase"]}'] = run['seconds']
+    for case in report.get('markers', []):
+        for name in ('find', 'automaton'):
+            flat[f'markers {case["markers"]} {name}'] = case[f'{name}_seconds']
+    return flat
+
+
+def compare(base: dict, head: dict) -> list[str]:
+    old, new = _metrics(base), _metrics(head)
+    lines = [f'{"metric":<32} {"base":>10} {"head":>10} {"change":>8}']
+    for name in new:
+        if name not in old:
+            continue
+        change = f'{(new[name] / old[name] - 1) * 100:+.1f}%' if old[name] else 'n/a'
+        lines.append(f'{name:<32} {old[name]:>10.4f} {new[name]:>10.4f} {change:>8}')
+    return lines
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m patchkit.bench',
+        description='Benchmark the patch engine on a synthetic TSX corpus.',
+    )
+    parser.add_argument('--preset', choices=PRESETS, default='small',
+                        help='corpus shape (default: small); the options below override it')
+    parser.add_argument('--files', type=int, help='number of components')
+    parser.add_argument('--min-size', type=int, help='smallest component in bytes')
+    parser.add_argument('--max-size', type=int, help='largest component in bytes')
+    parser.add_argument('--regions', type=int, help='most marker regions per component')
+    parser.add_argument('--seed', type=int, default=0, help='corpus random seed (default: 0)')
+    parser.add_argument('--engines', default=','.join(STAGE_ENGINES),
+                        help='comma separated engines to measure (default: text,mmap,minimal)')
+    parser.add_argument('-j', '--jobs', default=f'1,{default_jobs()}',
+                        help='comma separated job counts for end-to-end runs (default: 1,CPUs)')
+    parser.add_argument('--marker-counts', default='2,8,16,32,64,128',
+                        help='comma separated marker set sizes for the marker search '
+                             'benchmark (default: 2,8,16,32,64,128)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='stage passes per engine, best one kept (default: 3)')
+    parser.add_argument('--corpus', type=Path,
+                        help='generate into (or reuse) this directory instead of a temporary one')
+    parser.add_argument('-o', '--output', type=Path, help='write the JSON report here')
+    parser.add_argument('--compare', type=Path, metavar='BASE',
+                        help='print the change against an earlier JSON report')
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    shape = dict(PRESETS[args.preset])
+    for key in shape:
+        if getattr(args, key) is not None:
+            shape[key] = getattr(args, key)
+    engines = tuple(e for e in args.engines.split(',') if e)
+    unknown = [e for e in engines if e not in STAGE_ENGINES]
+    if unknown:
+        print(f'bench: unknown engine(s): {", ".join(unknown)}', file=sys.stderr)
+        return 2
+    jobs = sorted({int(n) for n in args.jobs.split(',') if n})
+    if not jobs or jobs[0] < 1:
+        print('bench: job counts must be at least 1', file=sys.stderr)
+        return 2
+    marker_counts = sorted({int(n) for n in args.marker_counts.split(',') if n})
+    if marker_counts and marker_counts[0] < 1:
+        print('bench: marker counts must be at least 1', file=sys.stderr)
+        return 2
+
+    root = args.corpus or Path(tempfile.mkdtemp(prefix='patchkit-bench-'))
+    try:
+        started = time.perf_counter()
+        reused = args.corpus is not None and (root / 'components').is_dir()
+        layout = scan(root) if reused else generate(root, seed=args.seed, **shape)
+        manifests = [write_manifest(root, layout, variant) for variant in (0, 1)]
+        corpus = dict(shape, files=len(layout), regions=sum(layout), seed=args.seed,
+                      reused=reused, generate_seconds=round(time.perf_counter() - started, 3),
+                      bytes=sum(p.stat().st_size for p in (root / 'components').iterdir()))
+        print(f'corpus: {len(layout)} files, {sum(layout)} regions, '
+              f'{corpus["bytes"] / 1e6:.1f} MB in {root}', file=sys.stderr)
+
+        stages = bench_stages(load_manifest(manifests[0]), engines, args.repeat)
+        runs = bench_runs(root, manifests, engines, jobs)
+        markers = bench_markers(root, marker_counts, args.repeat)
+    finally:
+        if args.corpus is None:
+            shutil.rmtree(root, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'commit': _commit(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'preset': args.preset,
+            'repeat': args.repeat,
+        },
+        'corpus': corpus,
+        'stages': stages,
+        'runs': runs,
+        'markers': markers,
+    }
+    text = json.dumps(report, indent=1)
+    if args.output:
+        args.output.write_text(text + '\n', encoding='utf-8')
+    else:
+        print(text)
+    faster = [case['markers'] for case in markers
+              if case['automaton_seconds'] < case['find_seconds']]
+    if markers:
+        print(f'markers: automaton faster from {faster[0] if faster else "none"} of '
+              f'{",".join(map(str, marker_counts))} marker(s); it is used from '
+              f'{AUTOMATON_MIN_MARKERS}', file=sys.stderr)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            for line in compare(json.load(f), report):
+                print(line, file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
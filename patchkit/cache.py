@@ -0,0 +1,91 @@
+"""Idempotency cache: remember which files already carry their manifest entries.
+
+For every file the engine has brought up to date, ``ApplyCache`` records the
+file's mtime/size, a digest of the entries applied to it and a hash of the
+resulting content. On the next run:
+
+* an unchanged stat and entries digest means the file is already patched,
+  so it is skipped after a single ``stat`` call -- unless the file's mtime
+  was within one timestamp tick of the time the record was made, in which
+  case a same-size rewrite in that tick would leave the stat unchanged;
+* a changed stat (e.g. a checkout touched the file) but identical content
+  hash means it is still patched, so the marker search and splice are skipped
+  and only the stat is refreshed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import Iterable
+
+from .manifest import Entry
+from .store import JsonStore
+
+#: Assumed timestamp granularity: whole-second mtimes suggest a filesystem
+#: that stores seconds (FAT stores two), finer ones a kernel clock tick.
+COARSE_TICK_NS = 2_000_000_000
+FINE_TICK_NS = 20_000_000
+
+
+def _tick_ns(mtime_ns: int) -> int:
+    return COARSE_TICK_NS if mtime_ns % 1_000_000_000 == 0 else FINE_TICK_NS
+
+
+def digest(data: str | bytes | memoryview) -> str:
+    """Content hash of ``data``; text is hashed as its UTF-8 encoding."""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def entries_digest(entries: Iterable[Entry]) -> str:
+    """Digest of what is applied to a file: markers or locator plus replacement hashes."""
+    h = hashlib.blake2b(digest_size=16)
+    for entry in entries:
+        for part in (entry.start, entry.end or '', entry.locator or '', digest(entry.replacement)):
+            h.update(part.encode('utf-8'))
+            h.update(b'\0')
+    return h.hexdigest()
+
+
+class ApplyCache(JsonStore):
+    """On-disk record of applied files keyed by path, stat and content hash."""
+
+    version = 2
+
+    def is_applied(self, path: Path, entries_hash: str, st: os.stat_result) -> bool:
+        """True when ``path`` has the mtime and size the last run left behind
+        and the record is trustworthy for them.
+
+        A record made within one timestamp tick of the file's mtime is not
+        trusted: a same-size rewrite in that tick would keep the stat, so
+        the caller has to fall back to the content hash.
+        """
+        record = self._files.get(self._key(path))
+        return (record is not None
+                and record['entries'] == entries_hash
+                and record['mtime_ns'] == st.st_mtime_ns
+                and record['size'] == st.st_size
+                and record['recorded_ns'] - st.st_mtime_ns >= _tick_ns(st.st_mtime_ns))
+
+    def content_matches(self, path: Path, entries_hash: str, content_hash: str) -> bool:
+        """True when ``path`` was touched but still holds the applied content."""
+        record = self._files.get(self._key(path))
+        return (record is not None
+                and record['entries'] == entries_hash
+                and record['content'] == content_hash)
+
+    def record(self, path: Path, entries_hash: str, content_hash: str,
+               st: os.stat_result | None = None) -> None:
+        st = st or os.stat(path)
+        self._files[self._key(path)] = {
+            'entries': entries_hash,
+            'content': content_hash,
+            'mtime_ns': st.st_mtime_ns,
+            'size': st.st_size,
+            'recorded_ns': time.time_ns(),
+        }
+        self._dirty = True
@@ -0,0 +1,618 @@
+"""Tailwind ``className`` usage index, duplication report and rewrites.
+
+    python -m patchkit.classnames                      # report for the tree
+    python -m patchkit.classnames --class 'text-[10px]'  # where a class is used
+    python -m patchkit.classnames --rewrite -n         # what --rewrite would change
+    python -m patchkit.classnames --rewrite --min-count 5
+
+Every ``.tsx``/``.jsx`` file of the scanned tree (see ``markers.iter_tree``)
+is tokenized once and every class list of a ``className`` attribute is
+extracted: plain ``"..."`` values, string literals inside ``{...}``
+expressions (both arms of a ternary, say) and the static chunks of template
+literals. Strings compared against (``x === 'card'``) or passed to calls are
+not class lists and are skipped; fully dynamic values are not analysed.
+
+The lists are kept per file in ``<root>/.patchkit/classnames.json`` with the
+file's mtime and size, so repeated runs only re-tokenize changed files. From
+them the report derives:
+
+* an inverted index, class -> ``file:line`` of every use (``--class``);
+* arbitrary-value classes (``text-[10px]``, ``bg-[#0a0a0a]``), which Tailwind
+  emits one rule each for and which usually want a theme token;
+* repeated bundles: class lists (compared as sets, order is irrelevant to
+  Tailwind) used at least ``--min-count`` times with at least
+  ``--min-classes`` classes, ranked by the bytes of duplicated class text.
+
+``--rewrite`` moves those bundles into exported constants of a shared module
+(``components/classNames.ts`` by default) and replaces every whole-literal
+use with a reference, adding the import to each file. The component edits
+are manifest entries applied by the regular engine, so they get the same
+locking, atomic renames, ``--dry-run`` and ``--transaction`` behaviour as
+``patch.py``. Constants already in the module are reused by value. With
+``--transaction`` the module is staged and committed together with the
+components; without it, it is written after them with only the constants
+the rewritten files import. Inserted imports use each file's line ending.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+from bisect import bisect_right
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .cache import digest
+from .cli import positive_int
+from .journal import Transaction
+from .manifest import Entry, Manifest
+from .markers import iter_tree
+from .report import APPLIED, FileResult
+from .runner import apply_manifest, default_jobs
+from .staging import discard, stage_bytes
+from .store import STATE_DIR, JsonStore
+from .tsx import COMMENT, IDENT, JSX_ATTR, OP, PUNCT, STRING, TEMPLATE, TokenStream, tokenize
+
+ROOT = Path(__file__).resolve().parent.parent
+
+#: File types that can carry JSX.
+SUFFIXES = ('.tsx', '.jsx')
+
+DEFAULT_MODULE = Path('components') / 'classNames.ts'
+
+# Where a class list sits, which decides how a use is rewritten.
+ATTR = 'attr'          # className="..."            -> className={NAME}
+LITERAL = 'string'     # {'...'}, {`...`}, ternary arms -> NAME
+CHUNK = 'template'     # static part of `... ${x}`  -> ${NAME}
+
+_ARBITRARY = re.compile(r'(?:^|[-:])\[[^\]]+\]')
+_CLASS = re.compile(r'[^\s\'"`{}\\]+')
+_COMPARISON = frozenset({'===', '!==', '==', '!=', 'in'})
+_NOT_CALLEE = frozenset({'return', 'typeof', 'case', 'in', 'of', 'void', 'await', 'yield'})
+_IMPORT = re.compile(r'^import\b(?!\s*\()[^;\'"]*?[\'"][^\'"\n]*[\'"][ \t]*;?', re.M)
+_MODULE_CONST = re.compile(r'^export const (\w+) = \'([^\'\\\n]*)\';\r?$', re.M)
+
+MODULE_HEADER = (
+    '// Shared Tailwind class bundles, maintained by `python -m patchkit.classnames --rewrite`.\n'
+    '// Names are derived from the classes and may be changed; bundles are matched by value.\n'
+)
+
+
+@dataclass(frozen=True)
+class ClassList:
+    """One class list: ``[start, end)`` is the span a rewrite replaces."""
+
+    line: int
+    start: int
+    end: int
+    context: str
+    text: str
+
+    @property
+    def classes(self) -> tuple[str, ...]:
+        return tuple(self.text.split())
+
+    @property
+    def key(self) -> tuple[str, ...]:
+        return tuple(sorted(set(self.text.split())))
+
+
+def is_arbitrary(cls: str) -> bool:
+    """``text-[10px]``, ``md:w-[calc(100%-2rem)]``, ``[mask-type:luminance]``."""
+    return _ARBITRARY.search(cls) is not None
+
+
+def _class_text(value: str) -> str | None:
+    text = ' '.join(value.split())
+    if not text or not all(_CLASS.fullmatch(c) for c in text.split()):
+        return None
+    return text
+
+
+def _significant(ts: TokenStream, i: int, step: int, stop: int) -> int:
+    i += step
+    while i != stop and ts.kinds[i] == COMMENT:
+        i += step
+    return i
+
+
+def _expression_lists(ts: TokenStream, open_i: int, close_i: int, emit) -> None:
+    """Class lists among the tokens strictly between ``open_i`` and ``close_i``."""
+    calls: list[bool] = []
+    for i in range(open_i + 1, close_i):
+        kind = ts.kinds[i]
+        if kind == PUNCT:
+            ch = ts.text[ts.starts[i]]
+            if ch in '([':
+                prev = _significant(ts, i, -1, open_i)
+                calls.append(prev != open_i and (
+                    (ts.kinds[prev] == IDENT and ts.value(prev) not in _NOT_CALLEE)
+                    or (ts.kinds[prev] == PUNCT and ts.value(prev) in ')]')
+                    or (ts.kinds[prev] == OP and ts.value(prev).endswith('?.'))))
+            elif ch in ')]' and calls:
+                calls.pop()
+            continue
+        if kind not in (STRING, TEMPLATE) or any(calls):
+            continue
+        prev = _significant(ts, i, -1, open_i)
+        nxt = _significant(ts, i, 1, close_i)
+        if ((prev != open_i and ts.kinds[prev] in (OP, IDENT) and ts.value(prev) in _COMPARISON)
+                or (nxt != close_i and ts.kinds[nxt] in (OP, IDENT)
+                    and ts.value(nxt) in _COMPARISON)):
+            continue
+        value = ts.value(i)
+        if kind == STRING or (value[0] == '`' and value.endswith('`') and len(value) > 1):
+            emit(LITERAL, ts.starts[i], ts.ends[i], value[1:-1])
+            continue
+        # A template chunk runs from '`' or '}' to '${' or the closing '`'.
+        start = ts.starts[i] + 1
+        end = ts.ends[i] - (2 if value.endswith('${') else value.endswith('`'))
+        chunk = ts.text[start:end]
+        stripped = chunk.strip()
+        if stripped:
+            start += len(chunk) - len(chunk.lstrip())
+            emit(CHUNK, start, start + len(stripped), stripped)
+
+
+def extract(text: str, ts: TokenStream | None = None) -> list[ClassList]:
+    """Every class list of every ``className`` attribute in ``text``."""
+    ts = ts or tokenize(text)
+    newlines = [m.start() for m in re.finditer('\n', text)]
+    found: list[ClassList] = []
+
+    def emit(context: str, start: int, end: int, raw: str) -> None:
+        classes = _class_text(raw)
+        if classes is not None:
+            found.append(ClassList(bisect_right(newlines, start - 1) + 1, start, end, context,
+                                   classes))
+
+    kinds = ts.kinds
+    n = len(ts)
+    for i, kind in enumerate(kinds):
+        if kind != JSX_ATTR or ts.value(i) != 'className':
+            continue
+        if i + 2 >= n or ts.value(i + 1) != '=':
+            continue
+        v = i + 2
+        if kinds[v] == STRING:
+            emit(ATTR, ts.starts[v], ts.ends[v], ts.value(v)[1:-1])
+        elif kinds[v] == PUNCT and ts.value(v) == '{' and v in ts.match:
+            _expression_lists(ts, v, ts.match[v], emit)
+    return found
+
+
+class ClassNameIndex(JsonStore):
+    """Class lists per file, persisted with the file's mtime and size."""
+
+    def lists(self, path: Path, st: os.stat_result | None = None) -> list[ClassList]:
+        key = self._key(path)
+        st = st or os.stat(path)
+        cached = self._files.get(key)
+        if cached and cached['mtime_ns'] == st.st_mtime_ns and cached['size'] == st.st_size:
+            return [ClassList(*record) for record in cached['lists']]
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            found = extract(f.read())
+        self._files[key] = {
+            'mtime_ns': st.st_mtime_ns, 'size': st.st_size,
+            'lists': [[c.line, c.start, c.end, c.context, c.text] for c in found],
+        }
+        self._dirty = True
+        return found
+
+    def build(self, paths: Iterable[Path] | None = None) -> None:
+        """Index ``paths`` (default: the JSX files of the scanned tree) and drop
+        records of files that no longer exist."""
+        seen = set()
+        for path in iter_tree(self.root) if paths is None else paths:
+            if path.suffix not in SUFFIXES:
+                continue
+            seen.add(self._key(path))
+            try:
+                self.lists(path)
+            except (OSError, UnicodeDecodeError):
+                self.forget(path)
+        if paths is None:
+            for key in set(self._files) - seen:
+                del self._files[key]
+                self._dirty = True
+
+    def usages(self) -> Iterator[tuple[str, ClassList]]:
+        for key in sorted(self._files):
+            for record in self._files[key]['lists']:
+                yield key, ClassList(*record)
+
+    def inverted(self) -> dict[str, list[tuple[str, int]]]:
+        """Class -> ``(file, line)`` of every use."""
+        index: dict[str, list[tuple[str, int]]] = defaultdict(list)
+        for key, usage in self.usages():
+            for cls in usage.classes:
+                index[cls].append((key, usage.line))
+        return dict(index)
+
+
+@dataclass
+class Bundle:
+    """A set of classes used together as a whole class list more than once."""
+
+    key: tuple[str, ...]
+    text: str
+    uses: list[tuple[str, ClassList]] = field(default_factory=list)
+
+    @property
+    def files(self) -> int:
+        return len({key for key, _ in self.uses})
+
+    @property
+    def duplicated_bytes(self) -> int:
+        return (len(self.uses) - 1) * len(self.text)
+
+    def to_dict(self) -> dict:
+        return {
+            'classes': self.text,
+            'uses': len(self.uses),
+            'files': self.files,
+            'duplicated_bytes': self.duplicated_bytes,
+            'locations': [f'{key}:{usage.line}' for key, usage in self.uses],
+        }
+
+
+def arbitrary_classes(inverted: dict[str, list[tuple[str, int]]]) -> list[tuple[str, int, int]]:
+    """``(class, uses, files)`` for every arbitrary-value class, most used first."""
+    found = [(cls, len(uses), len({key for key, _ in uses}))
+             for cls, uses in inverted.items() if is_arbitrary(cls)]
+    return sorted(found, key=lambda item: (-item[1], item[0]))
+
+
+def repeated_bundles(index: ClassNameIndex, min_count: int = 3,
+                     min_classes: int = 3) -> list[Bundle]:
+    """Class lists used at least ``min_count`` times, most duplicated bytes first.
+
+    The first use's spelling is the bundle's canonical text.
+    """
+    bundles: dict[tuple[str, ...], Bundle] = {}
+    for key, usage in index.usages():
+        classes = usage.key
+        if len(classes) < min_classes:
+            continue
+        bundle = bundles.get(classes)
+        if bundle is None:
+            bundle = bundles[classes] = Bundle(classes, usage.text)
+        bundle.uses.append((key, usage))
+    found = [b for b in bundles.values() if len(b.uses) >= min_count]
+    return sorted(found, key=lambda b: (-b.duplicated_bytes, b.text))
+
+
+# -- rewriting ---------------------------------------------------------------
+
+def constant_name(classes: list[str], taken: set[str]) -> str:
+    """``TW_FLEX_ITEMS_CENTER`` from the leading classes: three, or as many as
+    it takes to be unique, numbered only when the whole list is taken."""
+    words = [w for w in (re.sub(r'[^A-Za-z0-9]+', '_', c).strip('_').upper() for c in classes) if w]
+    words = words or ['CLASSES']
+    for n in range(min(3, len(words)), len(words) + 1):
+        name = 'TW_' + '_'.join(words[:n])
+        if name not in taken:
+            break
+    base, n = name, 2
+    while name in taken:
+        name, n = f'{base}_{n}', n + 1
+    taken.add(name)
+    return name
+
+
+def read_module(path: Path) -> dict[str, str]:
+    """Constants of an existing shared module: value -> name."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+    except FileNotFoundError:
+        return {}
+    return {value: name for name, value in _MODULE_CONST.findall(text)}
+
+
+def render_module(constants: dict[str, str], newline: str = '\n') -> str:
+    lines = MODULE_HEADER.splitlines()
+    for value, name in sorted(constants.items(), key=lambda item: item[1]):
+        lines.append(f"export const {name} = '{value}';")
+    return newline.join(lines) + newline
+
+
+def _newline(text: str) -> str:
+    """The line ending of ``text``'s first line; ``\\n`` when it has none."""
+    i = text.find('\n')
+    return '\r\n' if i > 0 and text[i - 1] == '\r' else '\n'
+
+
+def import_specifier(path: Path, module: Path) -> str:
+    spec = Path(os.path.relpath(module.with_suffix(''), path.parent)).as_posix()
+    return spec if spec.startswith('.') else f'./{spec}'
+
+
+def _import_of(text: str, spec: str) -> re.Match | None:
+    return re.search(r'^import \{([^}]*)\} from ' + f"'{re.escape(spec)}'" + r';?', text, re.M)
+
+
+def _imported_names(text: str, spec: str) -> set[str]:
+    existing = _import_of(text, spec)
+    if existing is None:
+        return set()
+    return {n.strip() for n in existing.group(1).split(',') if n.strip()}
+
+
+def _with_import(text: str, names: set[str], spec: str) -> tuple[int, int, str]:
+    """The span of ``text`` to replace and its replacement so that ``names``
+    are imported from ``spec``."""
+    existing = _import_of(text, spec)
+    if existing is not None:
+        names = names | _imported_names(text, spec)
+        return existing.start(), existing.end(), \
+            f"import {{ {', '.join(sorted(names))} }} from '{spec}';"
+    line = f"import {{ {', '.join(sorted(names))} }} from '{spec}';"
+    newline = _newline(text)
+    last = None
+    for last in _IMPORT.finditer(text):
+        pass
+    if last is None:
+        return 0, 0, line + newline
+    return last.end(), last.end(), newline + line
+
+
+def _first_at(text: str, at: int, limit: int, after: int = 0) -> str | None:
+    """The shortest prefix of ``text[at:limit]`` (doubling from 32 characters)
+    whose first occurrence at or after ``after`` is ``at``."""
+    size = 32
+    while True:
+        marker = text[at:min(at + size, limit)]
+        if marker and text.find(marker, after) == at:
+            return marker
+        if at + size >= limit:
+            return None
+        size *= 2
+
+
+def rewrite_entry(path: Path, text: str, replacements: list[tuple[ClassList, str]],
+                  spec: str) -> Entry:
+    """One manifest entry for ``path`` replacing each class list with its
+    constant and adding the import."""
+    names = {name for _, name in replacements}
+    edits = []
+    for usage, name in replacements:
+        if usage.context == ATTR:
+            edits.append((usage.start, usage.end, f'{{{name}}}'))
+        elif usage.context == LITERAL:
+            edits.append((usage.start, usage.end, name))
+        else:
+            edits.append((usage.start, usage.end, f'${{{name}}}'))
+    edits.append(_with_import(text, names, spec))
+    edits.sort()
+    a, b = edits[0][0], max(end for _, end, _ in edits)
+    parts, pos = [], a
+    for start, end, new in edits:
+        parts.append(text[pos:start])
+        parts.append(new)
+        pos = end
+    parts.append(text[pos:b])
+    replacement = ''.join(parts)
+
+    # Anchor the region with the shortest markers that resolve to exactly
+    # [a, b); fall back to the file start / end when nothing shorter does.
+    start = _first_at(text, a, b)
+    if start is None:
+        start, replacement, a = text[:b], text[:a] + replacement, 0
+    end = _first_at(text, b, len(text), a + len(start)) if b < len(text) else None
+    if end is None and b < len(text):
+        replacement += text[b:]
+    return Entry(file=path, start=start, end=end, replacement=replacement,
+                 name=f'classnames:{path.name}')
+
+
+def plan_rewrites(index: ClassNameIndex, bundles: list[Bundle],
+                  module: Path) -> tuple[Manifest, dict[str, str]]:
+    """Manifest moving ``bundles`` into constants of ``module`` (which holds
+    value -> name as returned), skipping uses that would shadow a local name."""
+    constants = read_module(module)
+    taken = set(constants.values())
+    by_key = {tuple(sorted(set(value.split()))): name for value, name in constants.items()}
+    per_file: dict[str, list[tuple[ClassList, str]]] = defaultdict(list)
+    used: dict[str, str] = {}
+    for bundle in bundles:
+        name = by_key.get(bundle.key)
+        if name is None:
+            name = constant_name(bundle.text.split(), taken)
+        for key, usage in bundle.uses:
+            per_file[key].append((usage, name))
+        used[bundle.text] = name
+
+    entries = []
+    for key, replacements in sorted(per_file.items()):
+        path = index.root / key
+        if path.resolve() == module.resolve():
+            continue
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            text = f.read()
+        fresh = {(u.start, u.end, u.text) for u in extract(text)}
+        spec = import_specifier(path, module)
+        imported = _imported_names(text, spec)
+        keep = []
+        for usage, name in replacements:
+            if (usage.start, usage.end, usage.text) not in fresh:
+                continue  # file changed since it was indexed
+            if re.search(rf'\b{name}\b', text) and name not in imported:
+                continue  # the name already means something else here
+            keep.append((usage, name))
+        if keep:
+            entries.append(rewrite_entry(path, text, keep, spec))
+    for value, name in used.items():
+        if name not in constants.values():
+            constants[value] = name
+    return Manifest(root=index.root, entries=entries), constants
+
+
+def stage_module(path: Path, constants: dict[str, str], durable: bool = False) -> FileResult:
+    """``constants`` rendered into a temporary file next to ``path``, keeping
+    the line endings of an existing module, as a result a ``Transaction``
+    can commit (``old_stat`` is None when the module is new)."""
+    try:
+        with open(path, 'rb') as f:
+            old = f.read()
+            st = os.fstat(f.fileno())
+    except FileNotFoundError:
+        old, old_stat, newline = None, None, '\n'
+    else:
+        old_stat, newline = (st.st_mtime_ns, st.st_size), _newline(old.decode('utf-8'))
+    data = render_module(constants, newline).encode('utf-8')
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return FileResult(path, APPLIED, message='shared class constants',
+                      old_hash=digest(old) if old is not None else '', new_hash=digest(data),
+                      old_stat=old_stat, staged=stage_bytes(path, data, durable))
+
+
+def write_module(path: Path, constants: dict[str, str]) -> None:
+    tmp = stage_module(path, constants).staged
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        discard(tmp)
+        raise
+
+
+def referenced(constants: dict[str, str], module: Path, entries: list[Entry]) -> dict[str, str]:
+    """``constants`` already in ``module`` or used by one of ``entries``."""
+    existing = set(read_module(module).values())
+    text = '\n'.join(entry.replacement for entry in entries)
+    return {value: name for value, name in constants.items()
+            if name in existing or re.search(rf'\b{name}\b', text)}
+
+
+# -- report ------------------------------------------------------------------
+
+def summary(index: ClassNameIndex, bundles: list[Bundle], top: int) -> dict:
+    inverted = index.inverted()
+    arbitrary = arbitrary_classes(inverted)
+    lists = sum(len(record['lists']) for record in index._files.values())
+    return {
+        'files': len(index._files),
+        'class_lists': lists,
+        'classes': len(inverted),
+        'class_uses': sum(len(uses) for uses in inverted.values()),
+        'arbitrary': {
+            'classes': len(arbitrary),
+            'uses': sum(uses for _, uses, _ in arbitrary),
+            'top': [{'class': c, 'uses': u, 'files': f} for c, u, f in arbitrary[:top]],
+        },
+        'bundles': {
+            'count': len(bundles),
+            'duplicated_bytes': sum(b.duplicated_bytes for b in bundles),
+            'top': [b.to_dict() for b in bundles[:top]],
+        },
+    }
+
+
+def format_summary(data: dict, min_count: int, min_classes: int) -> str:
+    lines = [f"{data['files']} file(s), {data['class_lists']} class list(s), "
+             f"{data['class_uses']} class use(s) of {data['classes']} distinct class(es)"]
+    arbitrary = data['arbitrary']
+    lines.append(f"\narbitrary values: {arbitrary['classes']} class(es), {arbitrary['uses']} use(s)")
+    for item in arbitrary['top']:
+        lines.append(f"  {item['uses']:>6}  {item['files']:>3} file(s)  {item['class']}")
+    bundles = data['bundles']
+    lines.append(f"\nrepeated bundles (>= {min_count} uses, >= {min_classes} classes): "
+                 f"{bundles['count']}, {bundles['duplicated_bytes'] / 1024:.1f} KiB duplicated")
+    for item in bundles['top']:
+        lines.append(f"  {item['uses']:>6}  {item['files']:>3} file(s)  "
+                     f"{item['duplicated_bytes']:>6} B  {item['classes']}")
+    return '\n'.join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m patchkit.classnames',
+        description='Index Tailwind className usage and report or extract repeated bundles.')
+    parser.add_argument('--root', type=Path, default=ROOT,
+                        help='tree to scan (default: the repository)')
+    parser.add_argument('--class', dest='cls', metavar='CLASS',
+                        help='list every use of CLASS and exit')
+    parser.add_argument('--min-count', type=int, default=3,
+                        help='uses before a bundle is reported (default: 3)')
+    parser.add_argument('--min-classes', type=int, default=3,
+                        help='classes a bundle needs to be reported (default: 3)')
+    parser.add_argument('--top', type=int, default=20,
+                        help='entries per report section (default: 20)')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    parser.add_argument('--rewrite', action='store_true',
+                        help='move the reported bundles into shared constants')
+    parser.add_argument('--module', type=Path, default=DEFAULT_MODULE,
+                        help='with --rewrite, module holding the constants, relative to the root '
+                             '(default: components/classNames.ts)')
+    parser.add_argument('-n', '--dry-run', action='store_true',
+                        help='with --rewrite, report what would change without writing')
+    parser.add_argument('-t', '--transaction', action='store_true',
+                        help='with --rewrite, commit all files atomically or none of them')
+    parser.add_argument('-j', '--jobs', type=positive_int, default=default_jobs(),
+                        help='with --rewrite, worker processes (default: CPU count)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f'do not read or write {STATE_DIR}/classnames.json')
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    root = args.root.resolve()
+    state_dir = root / STATE_DIR
+    index = ClassNameIndex(root, None if args.no_cache else state_dir / 'classnames.json')
+    index.build()
+    index.save()
+
+    if args.cls:
+        uses = index.inverted().get(args.cls, [])
+        for key, line in uses:
+            print(f'{key}:{line}')
+        return 0 if uses else 1
+
+    bundles = repeated_bundles(index, args.min_count, args.min_classes)
+    if not args.rewrite:
+        data = summary(index, bundles, args.top)
+        print(json.dumps(data, indent=2) if args.json
+              else format_summary(data, args.min_count, args.min_classes))
+        return 0
+
+    module = root / args.module
+    manifest, constants = plan_rewrites(index, bundles, module)
+    if not manifest.entries:
+        print('nothing to rewrite')
+        return 0
+    transaction = Transaction(state_dir) if args.transaction else None
+    if transaction is not None and not args.dry_run:
+        # Committed with the components, so an aborted run leaves no module.
+        transaction.add(stage_module(module, constants, durable=True))
+    try:
+        report = apply_manifest(manifest, dry_run=args.dry_run, jobs=args.jobs,
+                                transaction=transaction)
+    finally:
+        if transaction is not None:
+            transaction.abort([])  # no-op once committed
+    rewritten = [entry for r in report.results if r.status == APPLIED for entry in r.entries]
+    if transaction is not None:
+        # Committed with the components, or discarded with them.
+        wrote = report.ok
+    else:
+        # Only the constants the files rewritten so far import.
+        wrote = bool(rewritten)
+        if wrote and not args.dry_run:
+            write_module(module, referenced(constants, module, rewritten))
+    print(report.to_json() if args.json else report.format())
+    if wrote:
+        prefix = 'would write ' if args.dry_run else ''
+        print(f'{prefix}{len(bundles)} bundle(s) -> {args.module.as_posix()}')
+    else:
+        print(f'{args.module.as_posix()} not written')
+    return 0 if report.ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""Command line interface behind ``python patch.py``."""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from .cache import ApplyCache
+from .engine import ENGINES, WRITE_MODES
+from .errors import PatchError
+from .instrument import Instrumentation, format_summary, profile_summary, profiled, write_jsonl
+from .journal import Transaction, recover, rollback
+from .manifest import Manifest, load_manifests
+from .markers import MarkerIndex, entry_markers
+from .runner import apply_manifest
+from .store import STATE_DIR
+from .tsx import find_region
+from .watch import watch
+
+DEFAULT_MANIFEST = Path(__file__).resolve().parent.parent / 'patches' / 'manifest.json'
+
+
+def positive_int(value: str) -> int:
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f'must be at least 1, got {n}')
+    return n
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='patch.py',
+        description='Splice marker-delimited regions of source files from a manifest.',
+    )
+    parser.add_argument('manifests', nargs='*', type=Path, default=[DEFAULT_MANIFEST],
+                        help='manifest JSON files (default: patches/manifest.json)')
+    parser.add_argument('--root', type=Path,
+                        help="directory target paths are relative to (overrides the manifest's root)")
+    parser.add_argument('-n', '--dry-run', action='store_true',
+                        help='report what would change without writing')
+    parser.add_argument('--engine', choices=ENGINES, default='auto',
+                        help='text splicer, mmap-backed byte splicer, or auto (mmap for large files)')
+    parser.add_argument('--write-mode', choices=WRITE_MODES, default='replace',
+                        help='rewrite whole files atomically, or write only the changed bytes '
+                             '(in place when lengths match; not crash-atomic without -t)')
+    parser.add_argument('-j', '--jobs', type=positive_int,
+                        help='worker processes for independent files (default: CPU count)')
+    parser.add_argument('--json', action='store_true',
+                        help='print the run report as JSON')
+    parser.add_argument('-t', '--transaction', action='store_true',
+                        help='commit all files atomically (journalled, fsynced) or none of them')
+    parser.add_argument('--rollback', action='store_true',
+                        help='undo the last transaction recorded in the journal and exit')
+    parser.add_argument('-w', '--watch', action='store_true',
+                        help='stay resident and re-apply whenever a manifest, source or target changes')
+    parser.add_argument('--poll', action='store_true',
+                        help='with --watch, poll file stats instead of using inotify')
+    parser.add_argument('--debounce', type=float, default=50, metavar='MS',
+                        help='with --watch, quiet period that ends a burst of events (default: 50)')
+    parser.add_argument('--check', action='store_true',
+                        help='index the tree and report missing, duplicate and out-of-order markers')
+    parser.add_argument('--locate', nargs=2, metavar=('FILE', 'SELECTOR'),
+                        help='print the line span a structural selector resolves to and exit')
+    parser.add_argument('--stats', action='store_true',
+                        help='time every stage per file and print a summary with the slowest files')
+    parser.add_argument('--metrics', type=Path, metavar='FILE',
+                        help='like --stats, and write one JSON line per file to FILE')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='with --stats/--metrics, record peak allocations per file (slow)')
+    parser.add_argument('--profile', type=Path, metavar='FILE',
+                        help='run under cProfile (single process) and dump the stats to FILE')
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f'do not read or write the on-disk caches in {STATE_DIR}/')
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help='only print failures')
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.trace_memory and not (args.stats or args.metrics):
+        print('patch.py: --trace-memory needs --stats or --metrics')
+        return 2
+    if args.watch:
+        # A watch run applies one batch at a time in this process and only
+        # prints the files that changed.
+        ignored = [flag for flag, value in (('--jobs', args.jobs), ('--json', args.json),
+                                            ('--stats', args.stats), ('--metrics', args.metrics),
+                                            ('--profile', args.profile)) if value]
+        if ignored:
+            print(f'patch.py: --watch does not support {", ".join(ignored)}')
+            return 2
+    if args.locate:
+        return show_region(*args.locate)
+    try:
+        manifest = load_manifests(args.manifests, args.root)
+    except PatchError as e:
+        print(f'patch.py: {e}')
+        return 2
+    state_dir = manifest.root / STATE_DIR
+    state = None if args.no_cache else state_dir
+    index = MarkerIndex(manifest.root, state and state / 'markers.json')
+    cache = None if state is None else ApplyCache(manifest.root, state / 'applied.json')
+
+    try:
+        if args.rollback:
+            for path, outcome in rollback(state_dir):
+                print(f'{outcome:>15}  {path}')
+            return 0
+        # A dry run or check never writes, so an interrupted transaction is
+        # only reported and left for the next real run to roll back.
+        pending = args.dry_run or args.check
+        label = ('interrupted transaction, rolled back on the next run' if pending
+                 else 'recovered interrupted transaction')
+        for path, outcome in recover(state_dir, dry_run=pending):
+            print(f'{label}: {outcome}  {path}')
+    except PatchError as e:
+        print(f'patch.py: {e}')
+        return 1
+
+    if args.check:
+        return check(manifest, index)
+    if args.watch:
+        return watch(args.manifests, args.root, index, cache, engine=args.engine,
+                     debounce=args.debounce / 1000, polling=args.poll,
+                     transaction_factory=(lambda: Transaction(state_dir)) if args.transaction else None,
+                     write_mode=args.write_mode, dry_run=args.dry_run)
+
+    instrument = None
+    if args.stats or args.metrics:
+        instrument = Instrumentation(memory=args.trace_memory)
+    # cProfile only sees this process, so a profiled run does not fork workers.
+    jobs = 1 if args.profile else args.jobs
+    with profiled(args.profile):
+        report = apply_manifest(manifest, dry_run=args.dry_run, index=index, cache=cache,
+                                engine=args.engine, jobs=jobs,
+                                transaction=Transaction(state_dir) if args.transaction else None,
+                                instrument=instrument, write_mode=args.write_mode)
+    print(report.to_json() if args.json else report.format(quiet=args.quiet))
+    if args.metrics:
+        write_jsonl(report, args.metrics)
+    if instrument is not None and not args.json:
+        print(format_summary(report))
+    if args.profile:
+        print(profile_summary(args.profile))
+    return 0 if report.ok else 1
+
+
+def check(manifest: Manifest, index: MarkerIndex) -> int:
+    index.build(entry_markers(manifest.entries))
+    problems = index.problems(manifest.entries)
+    index.save()
+    for problem in problems:
+        print(problem)
+    errors = [p for p in problems if p.kind != 'duplicate']
+    print(f'{len(manifest.entries)} entries checked, {len(errors)} error(s), '
+          f'{len(problems) - len(errors)} warning(s)')
+    return 1 if errors else 0
+
+
+def show_region(path: str, selector: str) -> int:
+    try:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            text = f.read()
+        start, end = find_region(text, selector)
+    except (OSError, UnicodeDecodeError, PatchError) as e:
+        print(f'patch.py: {e}')
+        return 1
+    print(f'{path}:{text.count(chr(10), 0, start) + 1}-{text.count(chr(10), 0, end) + 1}')
+    return 0
@@ -0,0 +1,248 @@
+"""Apply the entries for one file: read it once, splice all its regions, write once."""
+
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+
+from .cache import ApplyCache, digest, entries_digest
+from .errors import MarkerError
+from .inplace import minimal_edits, same_length, spliced_digest, stage_copied, write_in_place
+from .instrument import NULL_PROBE, Instrumentation
+from .locks import file_lock
+from .manifest import Entry
+from .markers import MarkerIndex, entry_markers, search_markers
+from .report import ALREADY_APPLIED, APPLIED, ERROR, MARKERS_MISSING, FileResult
+from .splice import locate, splice
+from .staging import discard, stage_bytes
+from .store import STATE_DIR
+from .stream import MMAP_THRESHOLD, is_applied, locate_bytes, mapped, stage_spliced
+
+ENGINES = ('auto', 'text', 'mmap')
+WRITE_MODES = ('replace', 'minimal')
+
+
+def apply_file(path: Path, entries: list[Entry], dry_run: bool = False,
+               index: MarkerIndex | None = None, cache: ApplyCache | None = None,
+               engine: str = 'auto', stage_only: bool = False,
+               instrument: Instrumentation | None = None,
+               write_mode: str = 'replace') -> FileResult:
+    """Splice every entry targeting ``path``. The file is left untouched if any
+    entry fails to locate its region.
+
+    All markers of the file are found in one pass, or taken from ``index``
+    when it already holds them for the file's current mtime and size. With a
+    ``cache``, a file already carrying these entries costs one ``stat`` and is
+    never rewritten. ``engine`` picks the text splicer, the mmap-backed byte
+    splicer (see ``stream``), or 'auto' to use the latter for large files;
+    files with structural (``locate``) entries always use the text splicer.
+
+    The new content is written to a temporary file next to ``path`` and
+    renamed over it, so a crash never leaves a half-written target. With
+    ``stage_only`` the fsynced temporary file is left in ``result.staged``
+    for a ``Transaction`` to commit together with the other files.
+
+    The file is held under an advisory lock for the duration, so concurrent
+    runs touching the same file are serialised.
+
+    With ``instrument`` the time and bytes of every stage are recorded in
+    ``result.metrics`` (see ``patchkit.instrument``).
+
+    ``write_mode`` 'minimal' writes only the bytes that change: in place
+    when no edit changes length (and no transaction needs a staged file),
+    otherwise into a temporary file assembled by copying the unchanged
+    spans in the kernel (see ``patchkit.inplace``).
+    """
+    probe = instrument.probe() if instrument is not None else NULL_PROBE
+    probe.start()
+    started = time.perf_counter()
+    with file_lock(path):
+        result = _apply_locked(path, entries, dry_run, index, cache, engine, stage_only,
+                               write_mode, probe)
+    result.elapsed = time.perf_counter() - started
+    result.metrics = probe.finish()
+    return result
+
+
+def _apply_locked(path, entries, dry_run, index, cache, engine, stage_only, write_mode,
+                  probe) -> FileResult:
+    entries_hash = entries_digest(entries)
+    try:
+        with probe.stage('stat'):
+            st = os.stat(path)
+    except OSError as e:
+        return FileResult(path, ERROR, entries, f'stat failed: {e}')
+    if cache is not None and cache.is_applied(path, entries_hash, st):
+        return FileResult(path, ALREADY_APPLIED, entries, 'cached')
+
+    structural = any(entry.locator is not None for entry in entries)
+    if not structural and (engine == 'mmap' or (engine == 'auto' and st.st_size >= MMAP_THRESHOLD)):
+        stage = _stage_mapped
+    else:
+        stage = _stage_text
+    # Staged files are fsynced here, in parallel, so a commit only has to
+    # fsync directories.
+    result = stage(path, entries, st, entries_hash, dry_run, index, cache, stage_only,
+                   write_mode == 'minimal', probe)
+    result.entries_hash = entries_hash
+    result.old_stat = (st.st_mtime_ns, st.st_size)
+    if stage_only or (result.staged is None and result.edits is None):
+        return result
+
+    if result.edits is not None:
+        try:
+            write_in_place(path, result.edits, probe=probe)
+        except OSError as e:
+            if cache is not None:
+                cache.forget(path)
+            return FileResult(path, ERROR, entries, f'in-place write failed: {e}')
+        result.edits = None
+    else:
+        try:
+            with probe.stage('rename'):
+                os.replace(result.staged, path)
+        except OSError as e:
+            discard(result.staged)
+            if cache is not None:
+                cache.forget(path)
+            return FileResult(path, ERROR, entries, f'rename failed: {e}')
+        result.staged = None
+    if index is not None:
+        index.forget(path)
+    if cache is not None:
+        cache.record(path, entries_hash, result.new_hash)
+    return result
+
+
+def _already_applied(path, entries, st, entries_hash, content_hash, cache, message=''):
+    if cache is not None:
+        cache.record(path, entries_hash, content_hash, st)
+    return FileResult(path, ALREADY_APPLIED, entries, message)
+
+
+def _byte_regions(text: str, raw: bytes, regions) -> list[tuple[int, int, bytes]]:
+    """``regions`` (character offsets into ``text``) as byte offsets into ``raw``."""
+    if len(raw) == len(text):  # single-byte characters only
+        return [(r.start, r.end, r.replacement.encode('utf-8')) for r in regions]
+    found = []
+    pos = byte_pos = 0
+    for r in sorted(regions, key=lambda r: r.start):
+        start = byte_pos + len(text[pos:r.start].encode('utf-8'))
+        end = start + len(text[r.start:r.end].encode('utf-8'))
+        found.append((start, end, r.replacement.encode('utf-8')))
+        pos, byte_pos = r.end, end
+    return found
+
+
+def _stage_minimal(path, old, regions, durable, probe, result) -> FileResult:
+    """Reduce ``regions`` to byte edits of ``old``; leave them in ``result.edits``
+    for an in-place write or stage a copy-assembled file."""
+    with probe.stage('diff') as t:
+        edits = minimal_edits(old, regions)
+        t.nbytes = len(old)
+    with probe.stage('hash') as t:
+        result.new_hash = spliced_digest(old, edits)
+        t.nbytes = len(old)
+    if same_length(edits) and not durable:
+        result.edits = edits
+    else:
+        result.staged = stage_copied(path, len(old), edits, durable, probe)
+    return result
+
+
+def _stage_text(path, entries, st, entries_hash, dry_run, index, cache, durable, minimal,
+                probe) -> FileResult:
+    try:
+        with probe.stage('read') as t:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            t.nbytes = len(raw)
+        with probe.stage('decode') as t:
+            text = raw.decode('utf-8')
+            t.nbytes = len(raw)
+    except (OSError, UnicodeDecodeError) as e:
+        return FileResult(path, ERROR, entries, f'read failed: {e}')
+
+    with probe.stage('hash') as t:
+        content_hash = digest(text)
+        t.nbytes = len(raw)
+    if cache is not None and cache.content_matches(path, entries_hash, content_hash):
+        return _already_applied(path, entries, st, entries_hash, content_hash, cache,
+                                'content hash')
+
+    markers = entry_markers(entries)
+    with probe.stage('search') as t:
+        if index is not None:
+            hits = index.hits(path, markers, text=text, st=st)
+        else:
+            hits = search_markers(markers, text)
+        t.nbytes = len(raw)
+    token_dir = cache.root / STATE_DIR / 'tokens' if cache is not None else None
+    try:
+        regions = []
+        for entry in entries:
+            with probe.stage('locate', entry.label):
+                regions.append(locate(text, entry, hits, token_dir))
+        if all(text[r.start:r.end] == r.replacement for r in regions):
+            return _already_applied(path, entries, st, entries_hash, content_hash, cache)
+        if minimal:
+            result = FileResult(path, APPLIED, entries, old_hash=content_hash)
+            if dry_run:
+                return result
+            return _stage_minimal(path, raw, _byte_regions(text, raw, regions), durable, probe,
+                                  result)
+        with probe.stage('splice') as t:
+            new_text = splice(text, regions)
+            t.nbytes = len(raw)
+    except MarkerError as e:
+        return FileResult(path, MARKERS_MISSING, entries, str(e))
+    except OSError as e:
+        return FileResult(path, ERROR, entries, f'write failed: {e}')
+
+    result = FileResult(path, APPLIED, entries, old_hash=content_hash)
+    if dry_run:
+        return result
+    with probe.stage('encode') as t:
+        data = new_text.encode('utf-8')
+        t.nbytes = len(data)
+    with probe.stage('hash') as t:
+        result.new_hash = digest(data)
+        t.nbytes = len(data)
+    try:
+        result.staged = stage_bytes(path, data, durable, probe)
+    except OSError as e:
+        return FileResult(path, ERROR, entries, f'write failed: {e}')
+    return result
+
+
+def _stage_mapped(path, entries, st, entries_hash, dry_run, index, cache, durable, minimal,
+                  probe) -> FileResult:
+    try:
+        with mapped(path) as buf:
+            # The digest is what pages the mapping in, so it counts as the read.
+            with probe.stage('read') as t:
+                content_hash = digest(buf)
+                t.nbytes = len(buf)
+            if cache is not None and cache.content_matches(path, entries_hash, content_hash):
+                return _already_applied(path, entries, st, entries_hash, content_hash, cache,
+                                        'content hash')
+            try:
+                regions = []
+                for entry in entries:
+                    with probe.stage('search', entry.label) as t:
+                        regions.append(locate_bytes(buf, entry))
+                        t.nbytes = len(buf)
+                if is_applied(buf, regions):
+                    return _already_applied(path, entries, st, entries_hash, content_hash, cache)
+                result = FileResult(path, APPLIED, entries, old_hash=content_hash)
+                if minimal and not dry_run:
+                    _stage_minimal(path, buf, regions, durable, probe, result)
+                elif not dry_run:
+                    result.staged, result.new_hash = stage_spliced(path, buf, regions, durable,
+                                                                   probe)
+            except MarkerError as e:
+                return FileResult(path, MARKERS_MISSING, entries, str(e))
+    except OSError as e:
+        return FileResult(path, ERROR, entries, f'mmap splice failed: {e}')
+    return result
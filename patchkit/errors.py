@@ -0,0 +1,13 @@
+"""Exception types raised by the patch engine."""
+
+
+class PatchError(Exception):
+    """Base class for every error raised by patchkit."""
+
+
+class ManifestError(PatchError):
+    """The manifest is malformed or references a missing replacement source."""
+
+
+class MarkerError(PatchError):
+    """A start/end marker could not be located, or two regions overlap."""
@@ -0,0 +1,247 @@
+"""Minimal-diff writes: only the bytes that actually change reach the disk.
+
+The default write path stages the whole new file and renames it over the
+old one. In 'minimal' write mode the engine instead reduces the change to
+byte-level ``edits`` (``[start, end)`` of the old content and the bytes
+replacing it) by trimming whatever each spliced region shares with the old
+bytes at both ends, then:
+
+* when every edit keeps its length, the changed ranges are split further
+  into the blocks that differ and written in place with ``os.pwrite``
+  (``write_in_place``); the file keeps its inode, and watchers see a small
+  modification instead of a new file;
+* otherwise (or inside a transaction, which needs a staged file) a temporary
+  file is assembled from the old file's unchanged spans, copied in the
+  kernel with ``os.copy_file_range`` (reflinks on CoW filesystems) or
+  ``os.sendfile``, and the edit bytes (``stage_copied``), then renamed as
+  usual.
+
+Bytes outside the edits are never decoded or re-encoded, so the file's
+encoding, BOM and line endings are preserved exactly.
+
+In-place writes are not atomic: a crash in the middle can leave some
+changed ranges written and others not. Use the default mode, or a
+transaction, where that matters.
+"""
+
+from __future__ import annotations
+
+import errno
+import mmap
+import os
+from pathlib import Path
+
+from .errors import MarkerError
+from .instrument import NULL_PROBE
+from .staging import copy_mode, discard, temp_for
+from .stream import write_spliced
+
+#: Granularity of the comparison that splits same-length edits.
+BLOCK = 4096
+
+Edit = tuple[int, int, bytes]
+
+# Copy strategies that failed with "not supported here" are not retried.
+_UNSUPPORTED: set[str] = set()
+_FALLBACK_ERRNOS = frozenset({errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP,
+                              errno.ENOTSUP, errno.EBADF, errno.ETXTBSY})
+
+
+def _prefix(a: memoryview, b: memoryview, limit: int) -> int:
+    """Length of the common prefix of ``a`` and ``b``, at most ``limit``."""
+    lo = 0
+    while lo < limit:
+        hi = min(lo + BLOCK, limit)
+        if a[lo:hi] == b[lo:hi]:
+            lo = hi
+            continue
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if a[lo:mid] == b[lo:mid]:
+                lo = mid
+            else:
+                hi = mid
+        return lo
+    return limit
+
+
+def _suffix(a: memoryview, b: memoryview, limit: int) -> int:
+    """Length of the common suffix of ``a`` and ``b``, at most ``limit``."""
+    n, m = len(a), len(b)
+    lo = 0
+    while lo < limit:
+        hi = min(lo + BLOCK, limit)
+        if a[n - hi:n - lo] == b[m - hi:m - lo]:
+            lo = hi
+            continue
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if a[n - mid:n - lo] == b[m - mid:m - lo]:
+                lo = mid
+            else:
+                hi = mid
+        return lo
+    return limit
+
+
+def _differing(old: memoryview, new: memoryview, start: int) -> list[Edit]:
+    """Split a same-length replacement at ``start`` into the runs of blocks
+    that differ, each trimmed to its first and last differing byte."""
+    runs = []
+    run = None
+    for lo in range(0, len(new), BLOCK):
+        hi = min(lo + BLOCK, len(new))
+        if old[lo:hi] == new[lo:hi]:
+            if run is not None:
+                runs.append((run, lo))
+                run = None
+        elif run is None:
+            run = lo
+    if run is not None:
+        runs.append((run, len(new)))
+    edits = []
+    for lo, hi in runs:
+        o, d = old[lo:hi], new[lo:hi]
+        p = _prefix(o, d, hi - lo)
+        s = _suffix(o, d, hi - lo - p)
+        edits.append((start + lo + p, start + hi - s, bytes(d[p:hi - lo - s])))
+    return edits
+
+
+def minimal_edits(old: bytes | mmap.mmap, edits: list[Edit]) -> list[Edit]:
+    """Reduce ``edits`` of ``old`` to the bytes that really change, sorted;
+    edits that change nothing are dropped."""
+    view = memoryview(old)
+    found = []
+    pos = 0
+    try:
+        for start, end, data in sorted(edits, key=lambda edit: edit[:2]):
+            if start < pos:
+                raise MarkerError(f'region at byte {start} overlaps the previous one')
+            pos = end
+            o, d = view[start:end], memoryview(data)
+            p = _prefix(o, d, min(len(o), len(d)))
+            s = _suffix(o[p:], d[p:], min(len(o), len(d)) - p)
+            o, d = o[p:len(o) - s], d[p:len(d) - s]
+            if len(o) == len(d):
+                if len(d):
+                    found.extend(_differing(o, d, start + p))
+            else:
+                found.append((start + p, end - s, bytes(d)))
+            o.release()
+            d.release()
+    finally:
+        view.release()
+    return found
+
+
+class _Discard:
+    def write(self, data) -> None:
+        pass
+
+
+def spliced_digest(old: bytes | mmap.mmap, edits: list[Edit]) -> str:
+    """Content digest of ``old`` with ``edits`` applied, without building it."""
+    return write_spliced(old, edits, _Discard())
+
+
+def same_length(edits: list[Edit]) -> bool:
+    return all(end - start == len(data) for start, end, data in edits)
+
+
+def new_size(size: int, edits: list[Edit]) -> int:
+    return size + sum(len(data) - (end - start) for start, end, data in edits)
+
+
+def write_in_place(path: Path, edits: list[Edit], durable: bool = False,
+                   probe=NULL_PROBE) -> int:
+    """Overwrite the ranges of same-length ``edits`` in ``path``; returns the
+    number of bytes written. ``probe`` times the writes and the fsync."""
+    written = 0
+    fd = os.open(path, os.O_WRONLY)
+    try:
+        with probe.stage('write') as t:
+            for start, _, data in edits:
+                view = memoryview(data)
+                while view:
+                    n = os.pwrite(fd, view, start)
+                    view, start, written = view[n:], start + n, written + n
+            t.nbytes = written
+        if durable:
+            with probe.stage('fsync') as t:
+                os.fsync(fd)
+                t.nbytes = written
+    finally:
+        os.close(fd)
+    return written
+
+
+def _copy_range(src: int, dst: int, offset: int, count: int) -> None:
+    """Append ``count`` bytes of ``src`` from ``offset`` to ``dst``, in the
+    kernel where possible."""
+    for name in ('copy_file_range', 'sendfile'):
+        if name in _UNSUPPORTED or not hasattr(os, name):
+            continue
+        try:
+            while count:
+                if name == 'copy_file_range':
+                    n = os.copy_file_range(src, dst, count, offset)
+                else:
+                    n = os.sendfile(dst, src, offset, count)
+                if n == 0:
+                    raise OSError(errno.EIO, f'unexpected end of file at byte {offset}')
+                offset, count = offset + n, count - n
+            return
+        except OSError as e:
+            if e.errno not in _FALLBACK_ERRNOS:
+                raise
+            _UNSUPPORTED.add(name)  # the next strategy resumes where this one stopped
+    while count:
+        chunk = os.pread(src, min(count, 1024 * 1024), offset)
+        if not chunk:
+            raise OSError(errno.EIO, f'unexpected end of file at byte {offset}')
+        _write_all(dst, chunk)
+        offset, count = offset + len(chunk), count - len(chunk)
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def stage_copied(path: Path, size: int, edits: list[Edit], durable: bool = False,
+                 probe=NULL_PROBE) -> Path:
+    """Assemble the edited file in a temporary file next to ``path``: the
+    unchanged spans are copied from ``path`` (``size`` bytes long), only the
+    edit bytes are written."""
+    fd, tmp = temp_for(path)
+    try:
+        src = os.open(path, os.O_RDONLY)
+        try:
+            pos = 0
+            for start, end, data in [*edits, (size, size, b'')]:
+                if start > pos:
+                    with probe.stage('copy') as t:
+                        _copy_range(src, fd, pos, start - pos)
+                        t.nbytes = start - pos
+                if data:
+                    with probe.stage('write') as t:
+                        _write_all(fd, data)
+                        t.nbytes = len(data)
+                pos = end
+        finally:
+            os.close(src)
+        if durable:
+            with probe.stage('fsync') as t:
+                os.fsync(fd)
+                t.nbytes = new_size(size, edits)
+        os.close(fd)
+        fd = -1
+        copy_mode(path, tmp)
+    except BaseException:
+        if fd != -1:
+            os.close(fd)
+        discard(tmp)
+        raise
+    return tmp
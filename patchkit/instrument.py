@@ -0,0 +1,236 @@
+"""Per-stage timers and byte counters for patch runs, plus opt-in profiling.
+
+With instrumentation on, every file gets a ``Probe`` that records the wall
+time, bytes and call count of each stage the engine goes through (see
+``STAGES``), and the time spent resolving each manifest entry. The probe's
+record travels back with the file's ``FileResult`` (also from worker
+processes) and is written as one JSON line per file by ``write_jsonl``;
+``format_summary`` totals the stages, splits them into I/O and CPU time and
+lists the slowest files. A transaction's commit (its renames and the journal,
+backup and directory fsyncs) gets a probe of its own, reported as
+``Report.commit_metrics`` and counted in the totals.
+
+Off, the engine talks to ``NULL_PROBE``, whose ``stage`` returns one shared
+no-op timer, so an uninstrumented run pays a method call per stage.
+
+``Instrumentation(memory=True)`` additionally records each file's peak
+traced allocation with ``tracemalloc`` (which slows everything down), and
+``profiled`` wraps a run in ``cProfile``.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+#: Stages in the order a file goes through them. ``hash`` is the content
+#: digest for the apply cache, ``search`` the marker scan, ``locate`` the
+#: per-entry region lookup; ``write`` includes the mmap engine's splice,
+#: ``diff`` and ``copy`` are the minimal write mode's (see ``inplace``).
+STAGES = ('stat', 'read', 'decode', 'hash', 'search', 'locate', 'splice', 'encode',
+          'diff', 'copy', 'write', 'fsync', 'rename')
+IO_STAGES = frozenset({'stat', 'read', 'copy', 'write', 'fsync', 'rename'})
+
+
+class _Timer:
+    __slots__ = ('probe', 'name', 'entry', 'nbytes', 'started')
+
+    def __init__(self, probe: Probe, name: str, entry: str | None):
+        self.probe = probe
+        self.name = name
+        self.entry = entry
+        self.nbytes = 0
+
+    def __enter__(self) -> _Timer:
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.probe.add(self.name, time.perf_counter_ns() - self.started, self.nbytes, self.entry)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ('nbytes',)
+
+    def __enter__(self) -> _NullTimer:
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class NullProbe:
+    """The probe used when instrumentation is off: records nothing."""
+
+    def stage(self, name: str, entry: str | None = None) -> _NullTimer:
+        return _NULL_TIMER
+
+    def start(self) -> None:
+        pass
+
+    def finish(self) -> None:
+        return None
+
+
+NULL_PROBE = NullProbe()
+
+
+class Probe:
+    """Stage timings of one file.
+
+    ``with probe.stage('read') as t: ...; t.nbytes = n`` adds the block's
+    duration and ``n`` bytes to the stage; with ``entry`` the duration is
+    also charged to that manifest entry.
+    """
+
+    def __init__(self, memory: bool = False):
+        self.memory = memory
+        self.stages: dict[str, list[int]] = {}   # name -> [ns, bytes, calls]
+        self.entries: dict[str, int] = {}        # entry label -> ns
+        self._baseline = 0
+
+    def stage(self, name: str, entry: str | None = None) -> _Timer:
+        return _Timer(self, name, entry)
+
+    def add(self, name: str, ns: int, nbytes: int = 0, entry: str | None = None) -> None:
+        totals = self.stages.get(name)
+        if totals is None:
+            totals = self.stages[name] = [0, 0, 0]
+        totals[0] += ns
+        totals[1] += nbytes
+        totals[2] += 1
+        if entry is not None:
+            self.entries[entry] = self.entries.get(entry, 0) + ns
+
+    def start(self) -> None:
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self._baseline = tracemalloc.get_traced_memory()[0]
+
+    def finish(self) -> dict:
+        record = {
+            'stages': {name: {'seconds': ns / 1e9, 'bytes': nbytes, 'calls': calls}
+                       for name, (ns, nbytes, calls) in self.stages.items()},
+            'entries': {label: ns / 1e9 for label, ns in self.entries.items()},
+        }
+        if self.memory:
+            record['peak_memory'] = tracemalloc.get_traced_memory()[1] - self._baseline
+        return record
+
+
+@dataclass(frozen=True)
+class Instrumentation:
+    """What to record per file; picklable, so it is handed to worker processes."""
+
+    memory: bool = False
+
+    def probe(self) -> Probe:
+        return Probe(self.memory)
+
+
+# -- output --------------------------------------------------------------------
+
+def records(report) -> Iterator[dict]:
+    """One record per instrumented file of ``report``."""
+    for result in report.results:
+        if result.metrics is not None:
+            yield {'path': str(result.path), 'status': result.status,
+                   'elapsed': result.elapsed, **result.metrics}
+
+
+def totals(report) -> dict[str, dict]:
+    """Stage totals over the whole run, the transaction's commit included."""
+    found: dict[str, dict] = {}
+    recorded = list(records(report))
+    if report.commit_metrics is not None:
+        recorded.append(report.commit_metrics)
+    for record in recorded:
+        for name, stage in record['stages'].items():
+            total = found.setdefault(name, {'seconds': 0.0, 'bytes': 0, 'calls': 0})
+            for key in total:
+                total[key] += stage[key]
+    return {name: found[name] for name in sorted(found, key=_stage_order)}
+
+
+def _stage_order(name: str) -> tuple[int, str]:
+    return (STAGES.index(name) if name in STAGES else len(STAGES), name)
+
+
+def write_jsonl(report, path: Path) -> None:
+    """One JSON line per file, then a ``{"summary": ...}`` line (holding the
+    commit's own stages under ``commit`` after a transaction)."""
+    summary = {'files': len(report.results), 'jobs': report.jobs, 'elapsed': report.elapsed,
+               'stages': totals(report)}
+    if report.commit_metrics is not None:
+        summary['commit'] = report.commit_metrics
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records(report):
+            f.write(json.dumps(record) + '\n')
+        f.write(json.dumps({'summary': summary}) + '\n')
+
+
+def format_summary(report, top: int = 10) -> str:
+    stages = totals(report)
+    measured = sum(s['seconds'] for s in stages.values()) or 1e-12
+    lines = [f'{"stage":<8} {"seconds":>9} {"share":>6} {"MiB":>9} {"calls":>7}']
+    for name, stage in stages.items():
+        lines.append(f'{name:<8} {stage["seconds"]:>9.4f} {stage["seconds"] / measured:>6.1%} '
+                     f'{stage["bytes"] / 2 ** 20:>9.2f} {stage["calls"]:>7}')
+    io_time = sum(s['seconds'] for name, s in stages.items() if name in IO_STAGES)
+    lines.append(f'I/O {io_time:.4f}s ({io_time / measured:.0%}), '
+                 f'CPU {measured - io_time:.4f}s ({1 - io_time / measured:.0%}) '
+                 f'of {measured:.4f}s measured')
+    if report.commit_metrics is not None:
+        spent = report.commit_metrics['stages']
+        detail = ', '.join(f'{name} {s["seconds"]:.4f}s' for name, s in
+                           sorted(spent.items(), key=lambda item: _stage_order(item[0])))
+        lines.append(f'commit: {detail or "nothing to commit"}')
+
+    slowest = sorted(records(report), key=lambda r: -r['elapsed'])[:top]
+    if slowest:
+        lines.append(f'slowest {len(slowest)} file(s):')
+    for record in slowest:
+        spent = sorted(record['stages'].items(), key=lambda item: -item[1]['seconds'])[:2]
+        whole = sum(s['seconds'] for s in record['stages'].values()) or 1e-12
+        detail = ', '.join(f'{name} {s["seconds"] / whole:.0%}' for name, s in spent)
+        memory = record.get('peak_memory')
+        if memory is not None:
+            detail += f', peak {memory / 2 ** 20:.1f} MiB'
+        lines.append(f'  {record["elapsed"] * 1000:>9.2f} ms  {record["path"]}  ({detail})')
+    return '\n'.join(lines)
+
+
+@contextmanager
+def profiled(path: Path | None) -> Iterator[None]:
+    """Run the block under ``cProfile`` and dump the stats to ``path``; a
+    no-op without a path."""
+    if path is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+
+def profile_summary(path: Path, limit: int = 15) -> str:
+    out = io.StringIO()
+    pstats.Stats(str(path), stream=out).sort_stats('cumulative').print_stats(limit)
+    return out.getvalue().rstrip()
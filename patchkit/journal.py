@@ -0,0 +1,277 @@
+"""All-or-nothing multi-file commits with a write-ahead journal.
+
+A ``Transaction`` takes the temporary files staged (and fsynced) by the
+engine and commits them together:
+
+1. every target is locked and checked to still have the mtime/size the
+   engine read, otherwise nothing is committed;
+2. the current content of each target is hard-linked (copied where links are
+   unsupported) into ``<state>/backup/<id>/`` and the journal, holding old and
+   new content hashes, is written and fsynced with state ``prepared``; a
+   target that does not exist yet has no backup and is removed on rollback;
+3. the backup directory and every target directory are fsynced once each;
+4. all temporary files are renamed over their targets, each affected
+   directory is fsynced once more and the journal is marked ``committed``.
+
+Fsyncs are grouped per directory rather than issued per rename, which keeps a
+large manifest cheap while still surviving a crash at any point: a journal
+left ``prepared`` is rolled back by ``recover()`` on the next run, and
+``rollback()`` undoes the last committed transaction on request.
+
+Commits, rollbacks and recovery are serialised by an exclusive lock on the
+state directory (``state_lock``), held from reading the previous journal
+until the new state is recorded. A ``prepared`` journal therefore only counts
+as interrupted when nobody holds that lock: while its owner is still
+renaming files, ``recover()`` leaves it alone.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+
+from .cache import digest
+from .errors import PatchError
+from .instrument import NULL_PROBE
+from .locks import file_lock
+from .report import FileResult
+from .staging import discard, fsync_dir, temp_for
+
+PREPARED = 'prepared'
+COMMITTED = 'committed'
+ROLLED_BACK = 'rolled-back'
+
+
+class TransactionError(PatchError):
+    """A transaction could not be committed or rolled back cleanly."""
+
+
+def state_lock(state_dir: str | Path, wait: bool = True):
+    """The lock serialising transactions on ``state_dir`` (see ``file_lock``)."""
+    return file_lock(Path(state_dir) / 'journal.json', wait)
+
+
+def _write_journal(state_dir: Path, data: dict) -> None:
+    state_dir.mkdir(parents=True, exist_ok=True)
+    path = state_dir / 'journal.json'
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    fsync_dir(state_dir)
+
+
+def _stat_key(path: Path) -> tuple[int, int] | None:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _file_digest(path: Path) -> str | None:
+    try:
+        with open(path, 'rb') as f:
+            return digest(f.read())
+    except FileNotFoundError:
+        return None
+
+
+class Transaction:
+    """Commit staged files atomically, journalled in ``state_dir``."""
+
+    def __init__(self, state_dir: str | Path):
+        self.state_dir = Path(state_dir)
+        self.journal_path = self.state_dir / 'journal.json'
+        self.id = f'{time.strftime("%Y%m%dT%H%M%S")}-{uuid.uuid4().hex[:8]}'
+        self.extra: list[FileResult] = []
+
+    def _write_journal(self, data: dict, probe=NULL_PROBE) -> None:
+        # A few hundred bytes of JSON: the time goes to the file and
+        # directory fsyncs, so the whole write counts as one.
+        with probe.stage('fsync'):
+            _write_journal(self.state_dir, data)
+
+    def add(self, result: FileResult) -> None:
+        """Commit ``result``, staged by the caller rather than the engine, with
+        the next ``commit`` (or discard it with the next ``abort``). Its
+        ``old_stat`` is None when the target does not exist yet."""
+        self.extra.append(result)
+
+    def abort(self, results: list[FileResult]) -> None:
+        for result in [*results, *self.extra]:
+            if result.staged is not None:
+                discard(result.staged)
+                result.staged = None
+
+    def commit(self, results: list[FileResult], probe=NULL_PROBE) -> None:
+        """Rename every staged file over its target, or none of them.
+
+        ``probe`` times the renames and every file and directory fsync.
+        """
+        staged = sorted((r for r in [*results, *self.extra] if r.staged is not None),
+                        key=lambda r: str(r.path))
+        if not staged:
+            return
+        backup_dir = self.state_dir / 'backup' / self.id
+        with state_lock(self.state_dir), ExitStack() as locks:
+            previous = load_journal(self.state_dir)
+            if previous is not None and previous['state'] == PREPARED:
+                # Holding the state lock, so its owner is gone: undo it before
+                # its journal is replaced (the stat check below notices if
+                # that touched one of ours).
+                _rollback_locked(self.state_dir, previous)
+            for result in staged:
+                locks.enter_context(file_lock(result.path))
+            for result in staged:
+                if _stat_key(result.path) != result.old_stat:
+                    self.abort(results)
+                    raise TransactionError(f'{result.path} changed while the transaction was staged')
+
+            backup_dir.mkdir(parents=True, exist_ok=True)
+            records = []
+            for n, result in enumerate(staged):
+                if result.old_stat is None:  # a new file: rolling back removes it
+                    records.append({'path': str(result.path), 'backup': None,
+                                    'old_hash': None, 'new_hash': result.new_hash})
+                    continue
+                backup = backup_dir / f'{n}.bak'
+                try:
+                    os.link(result.path, backup)
+                except OSError:
+                    shutil.copy2(result.path, backup)
+                records.append({
+                    'path': str(result.path),
+                    'backup': str(backup.relative_to(self.state_dir)),
+                    'old_hash': result.old_hash,
+                    'new_hash': result.new_hash,
+                })
+            journal = {'id': self.id, 'state': PREPARED, 'files': records}
+            dirs = {result.path.parent for result in staged}
+            with probe.stage('fsync'):
+                fsync_dir(backup_dir)
+                for d in dirs:
+                    fsync_dir(d)
+            self._write_journal(journal, probe)
+
+            renamed = []
+            try:
+                for result in staged:
+                    with probe.stage('rename'):
+                        os.replace(result.staged, result.path)
+                    result.staged = None
+                    renamed.append(result)
+            except OSError as e:
+                self.abort(results)
+                _restore(self.state_dir, records[:len(renamed)])
+                journal['state'] = ROLLED_BACK
+                self._write_journal(journal)
+                raise TransactionError(f'commit failed, rolled back: {e}') from e
+            with probe.stage('fsync'):
+                for d in dirs:
+                    fsync_dir(d)
+            journal['state'] = COMMITTED
+            self._write_journal(journal, probe)
+
+            if previous and previous.get('id') != self.id:
+                shutil.rmtree(self.state_dir / 'backup' / previous['id'], ignore_errors=True)
+
+
+def load_journal(state_dir: Path) -> dict | None:
+    try:
+        with open(Path(state_dir) / 'journal.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _restore(state_dir: Path, records: list[dict]) -> list[tuple[str, str]]:
+    """Put each record's backup back in place; returns (path, outcome) pairs."""
+    outcomes = []
+    dirs = set()
+    for record in records:
+        path = Path(record['path'])
+        current = _file_digest(path)
+        if current == record['old_hash']:
+            outcomes.append((str(path), 'unchanged'))
+            continue
+        if current != record['new_hash']:
+            outcomes.append((str(path), 'conflict: modified since the transaction'))
+            continue
+        if record['backup'] is None:
+            try:
+                os.unlink(path)
+            except OSError as e:
+                outcomes.append((str(path), f'error: {e}'))
+                continue
+            dirs.add(path.parent)
+            outcomes.append((str(path), 'removed'))
+            continue
+        fd, tmp = temp_for(path)
+        os.close(fd)
+        try:
+            shutil.copy2(state_dir / record['backup'], tmp)
+            os.replace(tmp, path)
+        except OSError as e:
+            discard(tmp)
+            outcomes.append((str(path), f'error: {e}'))
+            continue
+        dirs.add(path.parent)
+        outcomes.append((str(path), 'restored'))
+    for d in dirs:
+        fsync_dir(d)
+    return outcomes
+
+
+def _rollback_locked(state_dir: Path, journal: dict) -> list[tuple[str, str]]:
+    with ExitStack() as locks:
+        for record in journal['files']:
+            locks.enter_context(file_lock(Path(record['path'])))
+        outcomes = _restore(state_dir, journal['files'])
+    journal['state'] = ROLLED_BACK
+    _write_journal(state_dir, journal)
+    return outcomes
+
+
+def rollback(state_dir: str | Path) -> list[tuple[str, str]]:
+    """Undo the last committed (or interrupted) transaction in ``state_dir``.
+
+    Files modified since the transaction are left alone and reported as
+    conflicts. Waits for a commit in progress to finish first.
+    """
+    state_dir = Path(state_dir)
+    with state_lock(state_dir):
+        journal = load_journal(state_dir)
+        if journal is None or journal['state'] == ROLLED_BACK:
+            raise TransactionError('no transaction to roll back')
+        return _rollback_locked(state_dir, journal)
+
+
+def recover(state_dir: str | Path, dry_run: bool = False) -> list[tuple[str, str]]:
+    """Roll back a transaction interrupted between prepare and commit.
+
+    A ``prepared`` journal whose owner still holds the state lock belongs to
+    a commit in progress and is left alone. With ``dry_run`` nothing is
+    written; the files a rollback would restore are reported as 'pending'.
+    """
+    state_dir = Path(state_dir)
+    journal = load_journal(state_dir)
+    if journal is None or journal['state'] != PREPARED:
+        return []
+    try:
+        with state_lock(state_dir, wait=False):
+            journal = load_journal(state_dir)
+            if journal is None or journal['state'] != PREPARED:
+                return []
+            if dry_run:
+                return [(record['path'], 'pending') for record in journal['files']]
+            return _rollback_locked(state_dir, journal)
+    except BlockingIOError:
+        return []
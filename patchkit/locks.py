@@ -0,0 +1,65 @@
+"""Per-file advisory locks so concurrent runs never splice the same file at once.
+
+Lock files live in a shared temporary directory keyed by the target's
+resolved path rather than next to the target, because the mmap engine
+replaces the target's inode and a lock held on the old inode would not
+exclude a process that opens the new one.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOCK_DIR = Path(tempfile.gettempdir()) / 'patchkit-locks'
+
+
+def lock_path(path: Path) -> Path:
+    key = hashlib.blake2b(str(Path(path).resolve()).encode('utf-8'), digest_size=12).hexdigest()
+    return LOCK_DIR / f'{key}.lock'
+
+
+@contextmanager
+def file_lock(path: Path, wait: bool = True) -> Iterator[None]:
+    """Hold an exclusive advisory lock for ``path``.
+
+    Blocks until the lock is free; with ``wait=False`` raises
+    ``BlockingIOError`` instead when another holder has it.
+    """
+    LOCK_DIR.mkdir(parents=True, exist_ok=True)
+    fd = os.open(lock_path(path), os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        elif not wait:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            except OSError as e:
+                raise BlockingIOError(*e.args) from e
+        else:
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10s; keep waiting
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
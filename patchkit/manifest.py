@@ -0,0 +1,127 @@
+"""Manifest loading.
+
+A manifest is a JSON document listing the regions to splice::
+
+    {
+        "root": "..",
+        "entries": [
+            {
+                "file": "components/ProjectCard.tsx",
+                "start": "// Default Layout (Beat Tape / Sound Pack)",
+                "end": "export const ProjectSkeleton",
+                "template": "project_card.tsx",
+                "params": {"empty_slots": 6}
+            }
+        ]
+    }
+
+``root`` and ``source`` are resolved relative to the manifest's directory,
+``template`` relative to its ``templates`` key (``templates/`` by default).
+The start marker is part of the replaced region, the end marker is kept.
+Omitting ``end`` replaces everything up to the end of the file. The
+replacement comes from a ``template`` rendered with ``params`` (see
+``patchkit.templates``), a verbatim ``source`` file or inline ``text``.
+
+Instead of ``start``/``end`` an entry may give a structural ``locate``
+selector such as ``"return:ProjectCard#-1"`` or ``"jsx:div[comment=Footer]"``
+(see ``patchkit.tsx``).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from .errors import ManifestError
+from .templates import render_template
+
+
+@dataclass(frozen=True)
+class Entry:
+    """One region to replace inside one target file."""
+
+    file: Path
+    start: str
+    end: str | None
+    replacement: str
+    name: str = ''
+    locator: str | None = None
+    source: Path | None = None
+
+    @property
+    def label(self) -> str:
+        return self.name or f'{self.file.name}:{(self.locator or self.start)[:40]}'
+
+
+@dataclass
+class Manifest:
+    root: Path
+    entries: list[Entry]
+
+
+def _read_source(path: Path) -> str:
+    try:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            return f.read()
+    except OSError as e:
+        raise ManifestError(f'cannot read replacement source {path}: {e}') from e
+
+
+def load_manifest(path: str | Path, root: str | Path | None = None) -> Manifest:
+    """Parse the manifest at ``path``; ``root`` overrides its ``root`` key."""
+    path = Path(path)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ManifestError(f'cannot load manifest {path}: {e}') from e
+
+    base = path.parent
+    templates = base / data.get('templates', 'templates')
+    if root is None:
+        root = base / data.get('root', '.')
+    root = Path(root).resolve()
+
+    entries = []
+    for i, raw in enumerate(data.get('entries', [])):
+        where = f'{path}: entry {i}'
+        if 'file' not in raw or ('start' in raw) == ('locate' in raw):
+            raise ManifestError(f'{where}: "file" and one of "start" or "locate" are required')
+        source = None
+        if 'template' in raw:
+            source = Path(os.path.normpath(templates / raw['template']))
+            replacement = render_template(source, raw.get('params'))
+        elif 'source' in raw:
+            source = Path(os.path.normpath(base / raw['source']))
+            replacement = _read_source(source)
+        elif 'text' in raw:
+            replacement = raw['text']
+        else:
+            raise ManifestError(f'{where}: one of "template", "source" or "text" is required')
+        entries.append(Entry(
+            file=Path(os.path.normpath(root / raw['file'])),
+            start=raw.get('start', ''),
+            end=raw.get('end'),
+            replacement=replacement,
+            name=raw.get('name', ''),
+            locator=raw.get('locate'),
+            source=source,
+        ))
+    return Manifest(root=root, entries=entries)
+
+
+def load_manifests(paths: list[Path], root: str | Path | None = None) -> Manifest:
+    """Load several manifests as one; the first one's root is reported."""
+    loaded = [load_manifest(path, root) for path in paths]
+    return Manifest(root=loaded[0].root,
+                    entries=[entry for m in loaded for entry in m.entries])
+
+
+def group_by_file(entries: list[Entry]) -> dict[Path, list[Entry]]:
+    """Group entries by target file, keeping manifest order within each file."""
+    groups: dict[Path, list[Entry]] = {}
+    for entry in entries:
+        groups.setdefault(entry.file, []).append(entry)
+    return groups
@@ -0,0 +1,264 @@
+"""Single-pass multi-marker search and a persistent per-file marker index.
+
+``MarkerAutomaton`` is an Aho-Corasick automaton: every occurrence of every
+marker is found in one linear pass over the text, so resolving a manifest
+costs O(bytes) instead of O(bytes x markers). That pass steps through the
+text in Python, though, while ``str.find`` scans in C, so ``search_markers``
+only uses the automaton for sets of ``AUTOMATON_MIN_MARKERS`` or more (a
+manifest's markers for one file are usually two or four).
+
+``MarkerIndex`` caches the hits per file together with the file's mtime and
+size in ``<root>/.patchkit/markers.json``; files whose stat is unchanged are
+not read again.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .errors import MarkerError
+from .manifest import Entry
+from .store import JsonStore
+from .tsx import find_region
+
+#: Directories (relative to the root) the tree-wide index covers, plus the
+#: root-level ``*.tsx`` files.
+SCAN_DIRS = ('components', 'contexts', 'services')
+ROOT_GLOB = '*.tsx'
+
+#: Marker count from which the automaton is used instead of one ``str.find``
+#: scan per marker. Where it starts to win depends on how often the markers'
+#: first characters occur: about 12 comment markers on ``components/``, about
+#: 50 markers starting with letters (see the ``markers`` case of
+#: ``python -m patchkit.bench``).
+AUTOMATON_MIN_MARKERS = 32
+
+
+class MarkerAutomaton:
+    """Aho-Corasick automaton over a fixed set of string markers."""
+
+    def __init__(self, markers: Iterable[str]):
+        self.markers = sorted({m for m in markers if m})
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[tuple[int, ...]] = [()]
+        for i, marker in enumerate(self.markers):
+            state = 0
+            for ch in marker:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                    self._goto[state][ch] = nxt
+                state = nxt
+            self._out[state] += (i,)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+        # While in the root state nothing can match until one of the markers'
+        # first characters shows up, so let the regex engine skip ahead.
+        first = ''.join(sorted(self._goto[0]))
+        self._skip = re.compile('[' + re.escape(first) + ']') if first else None
+
+    def iter_matches(self, text: str) -> Iterator[tuple[int, str]]:
+        """Yield ``(offset, marker)`` for every occurrence, overlaps included,
+        in order of the match's end offset."""
+        if self._skip is None:
+            return
+        goto, fail, out, markers = self._goto, self._fail, self._out, self.markers
+        skip = self._skip.search
+        state = 0
+        i = 0
+        n = len(text)
+        while i < n:
+            if state == 0:
+                m = skip(text, i)
+                if m is None:
+                    return
+                i = m.start()
+            ch = text[i]
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for k in out[state]:
+                    marker = markers[k]
+                    yield i - len(marker) + 1, marker
+            i += 1
+
+    def search(self, text: str) -> dict[str, list[int]]:
+        """Map each marker to the sorted start offsets of its occurrences."""
+        hits: dict[str, list[int]] = {m: [] for m in self.markers}
+        for offset, marker in self.iter_matches(text):
+            hits[marker].append(offset)
+        for positions in hits.values():
+            positions.sort()
+        return hits
+
+
+@lru_cache(maxsize=64)
+def automaton_for(markers: frozenset[str]) -> MarkerAutomaton:
+    return MarkerAutomaton(markers)
+
+
+def find_markers(markers: Iterable[str], text: str) -> dict[str, list[int]]:
+    """``MarkerAutomaton.search`` with one ``str.find`` scan per marker."""
+    hits: dict[str, list[int]] = {}
+    for marker in sorted({m for m in markers if m}):
+        positions = hits[marker] = []
+        i = text.find(marker)
+        while i != -1:
+            positions.append(i)
+            i = text.find(marker, i + 1)
+    return hits
+
+
+def search_markers(markers: frozenset[str], text: str) -> dict[str, list[int]]:
+    """Map each marker to the sorted start offsets of its occurrences in
+    ``text``, with whichever search is faster for that many markers."""
+    if len(markers) >= AUTOMATON_MIN_MARKERS:
+        return automaton_for(markers).search(text)
+    return find_markers(markers, text)
+
+
+def entry_markers(entries: Iterable[Entry]) -> frozenset[str]:
+    markers = set()
+    for entry in entries:
+        if entry.locator is not None:
+            continue
+        markers.add(entry.start)
+        if entry.end is not None:
+            markers.add(entry.end)
+    return frozenset(markers)
+
+
+def iter_tree(root: Path) -> Iterator[Path]:
+    """Files covered by the tree-wide index, in a stable order."""
+    for name in SCAN_DIRS:
+        base = root / name
+        if base.is_dir():
+            for dirpath, dirnames, filenames in os.walk(base):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    yield Path(dirpath) / filename
+    yield from sorted(p for p in root.glob(ROOT_GLOB) if p.is_file())
+
+
+@dataclass(frozen=True)
+class Problem:
+    path: Path
+    kind: str  # 'missing', 'duplicate' or 'out-of-order'
+    marker: str
+    detail: str = ''
+
+    def __str__(self) -> str:
+        text = f'{self.kind}: {self.path}: {self.marker!r}'
+        return f'{text} ({self.detail})' if self.detail else text
+
+
+class MarkerIndex(JsonStore):
+    """Marker hits per file, persisted with the file's mtime and size."""
+
+    def hits(self, path: Path, markers: frozenset[str], text: str | None = None,
+             st: os.stat_result | None = None) -> dict[str, list[int]]:
+        """Occurrences of ``markers`` in ``path``.
+
+        Served from the index when the file's mtime and size are unchanged and
+        every marker was scanned before; otherwise ``text`` (or the file) is
+        scanned once for all markers, including ones already recorded.
+
+        An edit that keeps the size within one mtime tick leaves the stat
+        unchanged, so when ``text`` is given (the engine is about to splice
+        it) every cached offset must still hold its marker and every marker
+        must have been found, or the text is scanned again.
+        """
+        key = self._key(path)
+        st = st or os.stat(path)
+        cached = self._files.get(key)
+        if cached and cached['mtime_ns'] == st.st_mtime_ns and cached['size'] == st.st_size:
+            known = cached['hits']
+            if markers.issubset(known):
+                found = {m: known[m] for m in markers}
+                if text is None or all(
+                        positions and all(text.startswith(m, pos) for pos in positions)
+                        for m, positions in found.items()):
+                    return found
+            markers = markers | frozenset(known)
+        if text is None:
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                text = f.read()
+        found = search_markers(frozenset(markers), text)
+        self._files[key] = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'hits': found}
+        self._dirty = True
+        return found
+
+    def build(self, markers: frozenset[str], paths: Iterable[Path] | None = None) -> None:
+        """Index ``markers`` over ``paths`` (default: the whole scanned tree)."""
+        for path in iter_tree(self.root) if paths is None else paths:
+            try:
+                self.hits(path, markers)
+            except (OSError, UnicodeDecodeError):
+                self.forget(path)
+
+    def files_containing(self, marker: str) -> list[str]:
+        return sorted(k for k, v in self._files.items() if v['hits'].get(marker))
+
+    def problems(self, entries: Iterable[Entry]) -> list[Problem]:
+        """Missing, duplicated and out-of-order markers for ``entries``."""
+        found = []
+        seen_duplicates = set()
+        for entry in entries:
+            if entry.locator is not None:
+                problem = self._check_locator(entry)
+                if problem is not None:
+                    found.append(problem)
+                continue
+            try:
+                hits = self.hits(entry.file, entry_markers([entry]))
+            except (OSError, UnicodeDecodeError) as e:
+                found.append(Problem(entry.file, 'missing', entry.start, f'cannot read file: {e}'))
+                continue
+            starts = hits[entry.start]
+            markers = [entry.start] if entry.end is None else [entry.start, entry.end]
+            for marker in markers:
+                if not hits[marker]:
+                    elsewhere = self.files_containing(marker)
+                    detail = f'found in {", ".join(elsewhere)}' if elsewhere else ''
+                    found.append(Problem(entry.file, 'missing', marker, detail))
+                elif len(hits[marker]) > 1 and (entry.file, marker) not in seen_duplicates:
+                    seen_duplicates.add((entry.file, marker))
+                    found.append(Problem(entry.file, 'duplicate', marker,
+                                         f'{len(hits[marker])} occurrences, the first is used'))
+            if entry.end is not None and starts and hits[entry.end]:
+                if not any(pos >= starts[0] + len(entry.start) for pos in hits[entry.end]):
+                    found.append(Problem(entry.file, 'out-of-order', entry.end,
+                                         f'only occurs before the start marker {entry.start!r}'))
+        return found
+
+    @staticmethod
+    def _check_locator(entry: Entry) -> Problem | None:
+        try:
+            with open(entry.file, 'r', encoding='utf-8', newline='') as f:
+                find_region(f.read(), entry.locator)
+        except (OSError, UnicodeDecodeError) as e:
+            return Problem(entry.file, 'missing', entry.locator, f'cannot read file: {e}')
+        except MarkerError as e:
+            return Problem(entry.file, 'missing', entry.locator, str(e))
+        return None
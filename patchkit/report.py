@@ -0,0 +1,95 @@
+"""Per-file results of a patch run and the report collecting them."""
+
+from __future__ import annotations
+
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .manifest import Entry
+
+APPLIED = 'applied'
+ALREADY_APPLIED = 'already-applied'
+MARKERS_MISSING = 'markers-missing'
+ERROR = 'error'
+ABORTED = 'aborted'
+
+#: Statuses that do not make the run fail.
+OK_STATUSES = (APPLIED, ALREADY_APPLIED)
+
+
+@dataclass
+class FileResult:
+    path: Path
+    status: str
+    entries: list[Entry] = field(default_factory=list)
+    message: str = ''
+    elapsed: float = 0.0
+    # Plumbing between the engine and the runner, not part of the report.
+    entries_hash: str = field(default='', repr=False)
+    old_hash: str = field(default='', repr=False)
+    new_hash: str = field(default='', repr=False)
+    old_stat: tuple[int, int] | None = field(default=None, repr=False)
+    staged: Path | None = field(default=None, repr=False)
+    edits: list[tuple[int, int, bytes]] | None = field(default=None, repr=False)
+    # Stage timings when the run is instrumented (see patchkit.instrument).
+    metrics: dict | None = field(default=None, repr=False)
+
+    @property
+    def ok(self) -> bool:
+        return self.status in OK_STATUSES
+
+    def format(self) -> str:
+        line = f'{self.status:>15}  {self.path} ({len(self.entries)} region(s))'
+        return f'{line}: {self.message}' if self.message else line
+
+    def to_dict(self) -> dict:
+        data = {
+            'path': str(self.path),
+            'status': self.status,
+            'entries': [entry.label for entry in self.entries],
+            'message': self.message,
+            'elapsed': round(self.elapsed, 6),
+        }
+        if self.metrics is not None:
+            data['metrics'] = self.metrics
+        return data
+
+
+@dataclass
+class Report:
+    results: list[FileResult] = field(default_factory=list)
+    jobs: int = 1
+    elapsed: float = 0.0
+    # Stage timings of the transaction's commit when the run is instrumented.
+    commit_metrics: dict | None = None
+
+    @property
+    def ok(self) -> bool:
+        return all(result.ok for result in self.results)
+
+    def counts(self) -> Counter:
+        return Counter(result.status for result in self.results)
+
+    def to_json(self) -> str:
+        data = {
+            'ok': self.ok,
+            'jobs': self.jobs,
+            'elapsed': round(self.elapsed, 6),
+            'counts': dict(self.counts()),
+            'files': [result.to_dict() for result in self.results],
+        }
+        if self.commit_metrics is not None:
+            data['commit_metrics'] = self.commit_metrics
+        return json.dumps(data, indent=2)
+
+    def format(self, quiet: bool = False) -> str:
+        lines = []
+        for result in self.results:
+            if not (quiet and result.ok):
+                lines.append(result.format())
+        summary = ', '.join(f'{n} {status}' for status, n in sorted(self.counts().items()))
+        lines.append(f'{len(self.results)} file(s) in {self.elapsed:.3f}s '
+                     f'with {self.jobs} job(s): {summary or "nothing to do"}')
+        return '\n'.join(lines)
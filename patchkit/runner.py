@@ -0,0 +1,155 @@
+"""Run a whole manifest, spreading independent files over a process pool."""
+
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from .cache import ApplyCache, entries_digest
+from .engine import apply_file
+from .instrument import NULL_PROBE, Instrumentation
+from .journal import Transaction, TransactionError
+from .manifest import Entry, Manifest, group_by_file
+from .markers import MarkerIndex
+from .report import ABORTED, ALREADY_APPLIED, APPLIED, ERROR, FileResult, Report
+
+
+def default_jobs() -> int:
+    return os.cpu_count() or 1
+
+
+def _run_task(path: Path, entries: list[Entry], dry_run: bool,
+              index: MarkerIndex | None, cache: ApplyCache | None, engine: str,
+              stage_only: bool, instrument: Instrumentation | None, write_mode: str):
+    """Worker entry point: apply one file and hand back the updated store views."""
+    try:
+        result = apply_file(path, entries, dry_run, index, cache, engine, stage_only,
+                            instrument, write_mode)
+    except Exception as e:  # never let one file take the pool down
+        result = FileResult(path, ERROR, entries, f'{type(e).__name__}: {e}')
+    return result, index, cache
+
+
+def _cached(path: Path, entries: list[Entry], cache: ApplyCache,
+            instrument: Instrumentation | None) -> FileResult | None:
+    """The result for ``path`` when the apply cache says it is already
+    patched (same check as ``apply_file``, without taking the file lock)."""
+    probe = instrument.probe() if instrument is not None else NULL_PROBE
+    probe.start()
+    started = time.perf_counter()
+    try:
+        with probe.stage('stat'):
+            st = os.stat(path)
+    except OSError:
+        return None  # reported by apply_file
+    if not cache.is_applied(path, entries_digest(entries), st):
+        return None
+    result = FileResult(path, ALREADY_APPLIED, entries, 'cached')
+    result.elapsed = time.perf_counter() - started
+    result.metrics = probe.finish()
+    return result
+
+
+def apply_manifest(manifest: Manifest, dry_run: bool = False,
+                   index: MarkerIndex | None = None,
+                   cache: ApplyCache | None = None,
+                   engine: str = 'auto',
+                   jobs: int | None = None,
+                   transaction: Transaction | None = None,
+                   instrument: Instrumentation | None = None,
+                   write_mode: str = 'replace') -> Report:
+    """Apply every entry of ``manifest`` and collect the results in a Report.
+
+    Entries are grouped per file, so each task owns exactly one file. Files
+    the apply ``cache`` already vouches for are settled here with a ``stat``,
+    so a fully applied manifest never starts a pool. With more than one
+    remaining file and ``jobs`` > 1 the rest run in a process pool; each
+    worker gets the slice of ``index``/``cache`` for its file and the updated
+    slice is merged back here, so the stores are still saved once.
+
+    With a ``transaction`` the workers only stage their output; the files are
+    committed together once every file succeeded, and nothing is written if
+    any of them failed.
+
+    ``instrument`` records per-stage metrics for every file, in the workers
+    too (see ``patchkit.instrument``), and for the transaction's commit.
+    ``write_mode`` is passed on to ``apply_file``.
+    """
+    started = time.perf_counter()
+    if jobs is not None and jobs < 1:
+        raise ValueError(f'jobs must be at least 1, got {jobs}')
+    groups = group_by_file(manifest.entries)
+    # Files the apply cache vouches for cost a stat here; only the rest are
+    # worth shipping to a worker.
+    done = {}
+    if cache is not None:
+        for path, entries in groups.items():
+            result = _cached(path, entries, cache, instrument)
+            if result is not None:
+                done[path] = result
+    pending = {path: entries for path, entries in groups.items() if path not in done}
+    jobs = min(jobs or default_jobs(), len(pending)) or 1
+
+    stage_only = transaction is not None and not dry_run
+    if jobs == 1:
+        for path, entries in pending.items():
+            done[path], _, _ = _run_task(path, entries, dry_run, index, cache, engine,
+                                         stage_only, instrument, write_mode)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [
+                (path, entries, pool.submit(
+                    _run_task, path, entries, dry_run,
+                    index and index.subset([path]), cache and cache.subset([path]), engine,
+                    stage_only, instrument, write_mode))
+                for path, entries in pending.items()
+            ]
+            for path, entries, future in futures:
+                try:
+                    result, sub_index, sub_cache = future.result()
+                except Exception as e:  # worker died or result failed to pickle
+                    done[path] = FileResult(path, ERROR, entries, f'{type(e).__name__}: {e}')
+                    continue
+                for store, sub in ((index, sub_index), (cache, sub_cache)):
+                    if store is not None:
+                        store.merge(sub, [path])
+                done[path] = result
+    results = [done[path] for path in groups]
+
+    commit_metrics = None
+    if stage_only:
+        commit_metrics = _commit(transaction, results, index, cache, instrument)
+    for store in (index, cache):
+        if store is not None:
+            store.save()
+    return Report(results, jobs, time.perf_counter() - started, commit_metrics)
+
+
+def _commit(transaction: Transaction, results: list[FileResult],
+            index: MarkerIndex | None, cache: ApplyCache | None,
+            instrument: Instrumentation | None = None) -> dict | None:
+    """Commit the staged ``results``; returns the commit's stage timings when
+    the run is instrumented."""
+    probe = instrument.probe() if instrument is not None else NULL_PROBE
+    probe.start()
+    staged = [r for r in results if r.staged is not None]
+    failed = [r for r in results if not r.ok]
+    try:
+        if failed:
+            raise TransactionError(f'transaction aborted: {len(failed)} file(s) failed')
+        transaction.commit(staged, probe)
+    except (TransactionError, OSError) as e:
+        transaction.abort(staged)
+        for result in staged:
+            result.status = ABORTED
+            result.message = str(e)
+        return probe.finish()
+    for result in staged:
+        if result.status == APPLIED:
+            if index is not None:
+                index.forget(result.path)
+            if cache is not None:
+                cache.record(result.path, result.entries_hash, result.new_hash)
+    return probe.finish()
@@ -0,0 +1,68 @@
+"""Locating marker regions and splicing several of them in one pass."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+from .errors import MarkerError
+from .manifest import Entry
+from .tsx import find_region
+
+
+@dataclass(frozen=True)
+class Region:
+    """A half-open ``[start, end)`` span of the file and what replaces it."""
+
+    start: int
+    end: int
+    replacement: str
+    entry: Entry | None = None
+
+
+def locate(text: str, entry: Entry, hits: dict[str, list[int]] | None = None,
+           token_dir: Path | None = None) -> Region:
+    """Find the region ``entry`` addresses in ``text``.
+
+    ``hits`` maps markers to their sorted offsets (see ``MarkerIndex.hits``);
+    without it the markers are searched for directly. Entries with a
+    structural locator are resolved on the (cached) token stream instead;
+    ``token_dir`` is where token streams are cached on disk.
+    """
+    if entry.locator is not None:
+        start, end = find_region(text, entry.locator, token_dir)
+        return Region(start, end, entry.replacement, entry)
+    if hits is None:
+        start = text.find(entry.start)
+    else:
+        start = hits[entry.start][0] if hits[entry.start] else -1
+    if start == -1:
+        raise MarkerError(f'start marker not found: {entry.start!r}')
+    if hits is not None and not text.startswith(entry.start, start):
+        raise MarkerError(f'stale offset {start} for start marker {entry.start!r}')
+    if entry.end is None:
+        return Region(start, len(text), entry.replacement, entry)
+    after = start + len(entry.start)
+    if hits is None:
+        end = text.find(entry.end, after)
+    else:
+        end = next((pos for pos in hits[entry.end] if pos >= after), -1)
+    if end == -1:
+        raise MarkerError(f'end marker not found after start: {entry.end!r}')
+    if hits is not None and not text.startswith(entry.end, end):
+        raise MarkerError(f'stale offset {end} for end marker {entry.end!r}')
+    return Region(start, end, entry.replacement, entry)
+
+
+def splice(text: str, regions: list[Region]) -> str:
+    """Replace every region of ``text`` in a single left-to-right pass."""
+    parts = []
+    pos = 0
+    for region in sorted(regions, key=lambda r: r.start):
+        if region.start < pos:
+            raise MarkerError(f'region at offset {region.start} overlaps the previous one')
+        parts.append(text[pos:region.start])
+        parts.append(region.replacement)
+        pos = region.end
+    parts.append(text[pos:])
+    return ''.join(parts)
@@ -0,0 +1,69 @@
+"""Temporary files staged next to their target and renamed into place."""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+
+from .instrument import NULL_PROBE
+
+
+def temp_for(path: Path) -> tuple[int, Path]:
+    """Create a hidden temporary file in ``path``'s directory (same filesystem,
+    so the final rename is atomic)."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    return fd, Path(tmp)
+
+
+def stage_bytes(path: Path, data: bytes, durable: bool = False, probe=NULL_PROBE) -> Path:
+    """Write ``data`` to a temporary file next to ``path`` with ``path``'s mode.
+
+    ``durable`` fsyncs the file before returning. ``probe`` times the write
+    and the fsync.
+    """
+    fd, tmp = temp_for(path)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            with probe.stage('write') as t:
+                out.write(data)
+                out.flush()
+                t.nbytes = len(data)
+            if durable:
+                with probe.stage('fsync') as t:
+                    os.fsync(out.fileno())
+                    t.nbytes = len(data)
+        copy_mode(path, tmp)
+    except BaseException:
+        discard(tmp)
+        raise
+    return tmp
+
+
+def copy_mode(src: Path, dst: Path) -> None:
+    try:
+        os.chmod(dst, os.stat(src).st_mode & 0o7777)
+    except FileNotFoundError:
+        pass
+
+
+def discard(tmp: Path) -> None:
+    try:
+        os.unlink(tmp)
+    except OSError:
+        pass
+
+
+def fsync_dir(path: Path) -> None:
+    """Persist renames/links inside directory ``path`` (no-op where directories
+    cannot be opened, i.e. Windows)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
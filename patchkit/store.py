@@ -0,0 +1,80 @@
+"""Small JSON-backed per-file store shared by the on-disk caches."""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+#: Per-root directory holding the marker index, caches and the journal.
+STATE_DIR = '.patchkit'
+
+
+class JsonStore:
+    """Records keyed by root-relative path, persisted to one JSON file.
+
+    Subclasses bump ``version`` whenever the record layout changes; a file
+    written with another version is ignored and rebuilt.
+    """
+
+    version = 1
+
+    def __init__(self, root: str | Path, cache_path: str | Path | None = None):
+        self.root = Path(root)
+        self.cache_path = Path(cache_path) if cache_path else None
+        self._files: dict[str, dict] = {}
+        self._dirty = False
+        if self.cache_path is not None:
+            self._load()
+
+    def _key(self, path: Path) -> str:
+        try:
+            return Path(path).resolve().relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            return str(Path(path).resolve())
+
+    def _load(self) -> None:
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == self.version:
+            self._files = data.get('files', {})
+
+    def save(self) -> None:
+        if self.cache_path is None or not self._dirty:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.version, 'files': self._files}, f)
+        os.replace(tmp, self.cache_path)
+        self._dirty = False
+
+    def forget(self, path: Path) -> None:
+        if self._files.pop(self._key(path), None) is not None:
+            self._dirty = True
+
+    def subset(self, paths) -> 'JsonStore':
+        """An unpersisted copy holding only the records for ``paths``, for
+        handing to a worker process."""
+        sub = type(self)(self.root)
+        for path in paths:
+            key = self._key(path)
+            if key in self._files:
+                sub._files[key] = self._files[key]
+        return sub
+
+    def merge(self, sub: 'JsonStore', paths) -> None:
+        """Take over the records ``sub`` holds for ``paths`` (including removals)."""
+        for path in paths:
+            key = self._key(path)
+            old = self._files.get(key)
+            new = sub._files.get(key)
+            if new != old:
+                self._dirty = True
+                if new is None:
+                    del self._files[key]
+                else:
+                    self._files[key] = new
@@ -0,0 +1,125 @@
+"""Byte-level splicing over a memory-mapped input.
+
+The text engine decodes the whole file, builds the spliced string and encodes
+it again, holding roughly three copies of the file at once. For large inputs
+(generated bundles, SQL dumps) this module instead maps the file, searches
+for the UTF-8 encoded markers directly on the mapping and streams the
+unchanged spans to a temporary file through zero-copy ``memoryview`` slices.
+Only the replacements are encoded, so peak memory stays close to their size.
+
+UTF-8 is self-synchronising, so a byte-level match of an encoded marker is
+always a match on a character boundary.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from .errors import MarkerError
+from .instrument import NULL_PROBE
+from .manifest import Entry
+from .staging import copy_mode, discard, temp_for
+
+#: Files at least this large are spliced with the mmap engine in 'auto' mode.
+MMAP_THRESHOLD = 8 * 1024 * 1024
+
+#: Upper bound on a single write() of an unchanged span.
+CHUNK_SIZE = 1024 * 1024
+
+
+@contextmanager
+def mapped(path: Path) -> Iterator[mmap.mmap | bytes]:
+    """Map ``path`` read-only; empty files (which cannot be mapped) yield b''."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(mmap, 'MADV_SEQUENTIAL'):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        try:
+            yield mm
+        finally:
+            mm.close()
+
+
+def locate_bytes(buf: mmap.mmap | bytes, entry: Entry) -> tuple[int, int, bytes]:
+    """Byte offsets of the region ``entry`` addresses and its encoded replacement."""
+    start_marker = entry.start.encode('utf-8')
+    start = buf.find(start_marker)
+    if start == -1:
+        raise MarkerError(f'start marker not found: {entry.start!r}')
+    if entry.end is None:
+        end = len(buf)
+    else:
+        end = buf.find(entry.end.encode('utf-8'), start + len(start_marker))
+        if end == -1:
+            raise MarkerError(f'end marker not found after start: {entry.end!r}')
+    return start, end, entry.replacement.encode('utf-8')
+
+
+def is_applied(buf: mmap.mmap | bytes, regions: list[tuple[int, int, bytes]]) -> bool:
+    return all(end - start == len(data) and buf[start:end] == data
+               for start, end, data in regions)
+
+
+def write_spliced(buf: mmap.mmap | bytes, regions: list[tuple[int, int, bytes]], out) -> str:
+    """Stream ``buf`` with ``regions`` replaced to the binary file ``out``.
+
+    Returns the content digest of what was written (same scheme as
+    ``cache.digest``), computed on the fly.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    view = memoryview(buf)
+    try:
+        pos = 0
+        for start, end, data in sorted(regions):
+            if start < pos:
+                raise MarkerError(f'region at byte {start} overlaps the previous one')
+            for i in range(pos, start, CHUNK_SIZE):
+                chunk = view[i:min(i + CHUNK_SIZE, start)]
+                out.write(chunk)
+                h.update(chunk)
+            out.write(data)
+            h.update(data)
+            pos = end
+        for i in range(pos, len(buf), CHUNK_SIZE):
+            chunk = view[i:min(i + CHUNK_SIZE, len(buf))]
+            out.write(chunk)
+            h.update(chunk)
+    finally:
+        view.release()
+    return h.hexdigest()
+
+
+def stage_spliced(path: Path, buf: mmap.mmap | bytes,
+                  regions: list[tuple[int, int, bytes]], durable: bool = False,
+                  probe=NULL_PROBE) -> tuple[Path, str]:
+    """Write the spliced content to a temporary file next to ``path``.
+
+    Returns the temporary path and the new content digest. The caller renames
+    it over ``path`` once the mapping is closed (Windows refuses to replace a
+    mapped file). ``probe`` times the write (which splices and hashes on the
+    fly) and the fsync.
+    """
+    fd, tmp = temp_for(path)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            with probe.stage('write') as t:
+                content_hash = write_spliced(buf, regions, out)
+                out.flush()
+                t.nbytes = out.tell()
+            if durable:
+                with probe.stage('fsync') as t:
+                    os.fsync(out.fileno())
+                    t.nbytes = out.tell()
+        copy_mode(path, tmp)
+    except BaseException:
+        discard(tmp)
+        raise
+    return tmp, content_hash
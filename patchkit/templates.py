@@ -0,0 +1,94 @@
+"""Parameterized replacement templates.
+
+A template is a plain source file in which ``{%name%}`` marks a parameter
+and ``{%name|default%}`` gives it a default; everything else, braces
+included, is copied verbatim, so TSX needs no escaping::
+
+    while (tracksToShow.length < {%empty_slots|6%}) {
+
+Templates are compiled once into a ``str.format_map`` pattern and kept in an
+LRU cache keyed by path, mtime and size, so manifests that render the same
+template with different parameters (or watch mode re-loading a manifest)
+only read and parse a file again after it changed on disk.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from .errors import ManifestError
+
+_PARAM = re.compile(r'\{%\s*([A-Za-z_]\w*)\s*(?:\|(.*?))?%\}', re.S)
+
+
+@dataclass(frozen=True)
+class Template:
+    """A compiled template: its parameters, their defaults and the pattern."""
+
+    path: Path
+    params: tuple[str, ...]
+    defaults: dict[str, str]
+    pattern: str
+
+    def render(self, params: dict | None = None) -> str:
+        params = params or {}
+        unknown = sorted(set(params) - set(self.params))
+        if unknown:
+            raise ManifestError(f'{self.path}: unknown template parameter(s): {", ".join(unknown)}')
+        values = dict(self.defaults)
+        values.update((name, str(value)) for name, value in params.items())
+        missing = [name for name in self.params if name not in values]
+        if missing:
+            raise ManifestError(f'{self.path}: missing template parameter(s): {", ".join(missing)}')
+        return self.pattern.format_map(values)
+
+
+def _escape(text: str) -> str:
+    return text.replace('{', '{{').replace('}', '}}')
+
+
+def compile_template(source: str, path: str | Path = '<string>') -> Template:
+    """Compile template ``source``; conflicting defaults for a name are an error."""
+    parts = []
+    params: list[str] = []
+    defaults: dict[str, str] = {}
+    pos = 0
+    for m in _PARAM.finditer(source):
+        name, default = m.group(1), m.group(2)
+        parts.append(_escape(source[pos:m.start()]))
+        parts.append('{' + name + '}')
+        if name not in params:
+            params.append(name)
+        if default is not None:
+            if defaults.setdefault(name, default) != default:
+                raise ManifestError(f'{path}: conflicting defaults for template parameter {name!r}')
+        pos = m.end()
+    parts.append(_escape(source[pos:]))
+    return Template(Path(path), tuple(params), defaults, ''.join(parts))
+
+
+@lru_cache(maxsize=128)
+def _load(path: str, mtime_ns: int, size: int) -> Template:
+    try:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            source = f.read()
+    except OSError as e:
+        raise ManifestError(f'cannot read template {path}: {e}') from e
+    return compile_template(source, path)
+
+
+def load_template(path: str | Path) -> Template:
+    """The compiled template at ``path``, re-read only when it changed."""
+    try:
+        st = os.stat(path)
+    except OSError as e:
+        raise ManifestError(f'cannot read template {path}: {e}') from e
+    return _load(str(path), st.st_mtime_ns, st.st_size)
+
+
+def render_template(path: str | Path, params: dict | None = None) -> str:
+    return load_template(path).render(params)
@@ -0,0 +1,501 @@
+"""Linear-time TSX tokenizer and structural region locators.
+
+Instead of comment markers, a manifest entry may address its region
+structurally with a ``locate`` selector:
+
+``return:ProjectCard#-1``
+    The last ``return ...;`` statement directly in the body of the
+    ``ProjectCard`` component (returns of nested callbacks are ignored).
+``jsx:div[comment=Footer]``
+    The ``<div>`` element immediately preceded by a comment containing
+    "Footer", from its ``<`` to the end of its closing tag.
+``jsx:button[title=Add to Cart]``
+    A ``<button>`` whose ``title`` attribute contains "Add to Cart".
+
+``#n`` picks the n-th match (negative counts from the end); without it the
+selector must match exactly once.
+
+The tokenizer is a small mode-stack lexer (JS, template literal, JSX tag,
+JSX children) driven by compiled regexes, so it understands strings,
+``${...}`` inside template literals, comments, regex literals, braces and
+JSX tags, and runs in one pass over the text. Token streams are cached by
+content hash in memory and, optionally, on disk.
+"""
+
+from __future__ import annotations
+
+import marshal
+import re
+from collections import OrderedDict
+from pathlib import Path
+
+from .cache import digest
+from .errors import MarkerError
+
+COMMENT = 'comment'
+STRING = 'string'
+TEMPLATE = 'template'
+REGEX = 'regex'
+IDENT = 'ident'
+NUMBER = 'number'
+PUNCT = 'punct'
+OP = 'op'
+JSX_OPEN = 'jsx-open'            # '<Name'
+JSX_OPEN_END = 'jsx-open-end'    # '>' ending an opening tag
+JSX_SELF_CLOSE = 'jsx-self-close'  # '/>'
+JSX_CLOSE = 'jsx-close'          # '</Name>'
+JSX_TEXT = 'jsx-text'
+JSX_ATTR = 'jsx-attr'
+
+_JS = re.compile(r'''
+     (?P<ws>\s+)
+    |(?P<comment>//[^\n]*|/\*[\s\S]*?(?:\*/|\Z))
+    |(?P<string>'(?:[^'\\\n]|\\[\s\S])*'?|"(?:[^"\\\n]|\\[\s\S])*"?)
+    |(?P<ident>[^\W\d][\w$]*|\$[\w$]*)
+    |(?P<number>\.?\d[\w.]*)
+    |(?P<punct>[{}()\[\]])
+    |(?P<tick>`)
+    |(?P<lt><)
+    |(?P<slash>/)
+    |(?P<op>[^\s\w$'"`{}()\[\]</]+)
+    |(?P<other>[\s\S])
+''', re.X)
+
+_TEMPLATE = re.compile(r'(?:[^`\\$]|\\[\s\S]|\$(?!\{))*(?P<end>`|\$\{)?')
+
+_TAG = re.compile(r'''
+     (?P<ws>\s+)
+    |(?P<comment>//[^\n]*|/\*[\s\S]*?(?:\*/|\Z))
+    |(?P<selfclose>/>)
+    |(?P<gt>>)
+    |(?P<string>"[^"]*"?|'[^']*'?)
+    |(?P<lbrace>\{)
+    |(?P<attr>[^\s/>={}"']+)
+    |(?P<other>[\s\S])
+''', re.X)
+
+_CHILDREN = re.compile(r'(?P<text>[^{<]+)|(?P<lbrace>\{)|(?P<close></\s*[^>]*>?)|(?P<lt><)')
+
+_OPEN_TAG = re.compile(r'<\s*[^\s/>{}]*')
+_JSX_START = re.compile(r'<\s*(?:[A-Za-z_$]|>)')
+_REGEX = re.compile(r'/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*')
+
+# Tokens after which '<' starts JSX and '/' starts a regex literal.
+_EXPR_KEYWORDS = frozenset({
+    'return', 'typeof', 'case', 'default', 'else', 'yield', 'await', 'in', 'of',
+    'void', 'delete', 'throw', 'new', 'do',
+})
+_NOT_EXPR_PUNCT = frozenset({')', ']', '}'})
+
+_JS_MODE, _TEMPLATE_MODE, _TAG_MODE, _CHILDREN_MODE = range(4)
+
+_PAIRS = {'(': ')', '[': ']', '{': '}'}
+
+
+def _expr_allowed(kind: str | None, value: str) -> bool:
+    if kind is None:
+        return True
+    if kind == PUNCT:
+        return value not in _NOT_EXPR_PUNCT
+    if kind == OP:
+        return True
+    return kind == IDENT and value in _EXPR_KEYWORDS
+
+
+class TokenStream:
+    """Tokens of one source text as parallel ``kinds``/``starts``/``ends`` lists.
+
+    ``match`` pairs every bracket with its partner and every ``jsx-open``
+    with its ``jsx-close``/``jsx-self-close`` token (in both directions).
+    """
+
+    def __init__(self, text: str, kinds: list[str], starts: list[int], ends: list[int]):
+        self.text = text
+        self.kinds = kinds
+        self.starts = starts
+        self.ends = ends
+        self.match = self._pair()
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def value(self, i: int) -> str:
+        return self.text[self.starts[i]:self.ends[i]]
+
+    def tag(self, i: int) -> str:
+        """Element name of a ``jsx-open`` token ('' for fragments)."""
+        return self.value(i)[1:].strip()
+
+    def _pair(self) -> dict[int, int]:
+        match = {}
+        brackets: list[int] = []
+        elements: list[int] = []
+        kinds, text, starts = self.kinds, self.text, self.starts
+        for i, kind in enumerate(kinds):
+            if kind == PUNCT:
+                ch = text[starts[i]]
+                if ch in _PAIRS:
+                    brackets.append(i)
+                elif brackets and _PAIRS[text[starts[brackets[-1]]]] == ch:
+                    j = brackets.pop()
+                    match[i], match[j] = j, i
+            elif kind == JSX_OPEN:
+                elements.append(i)
+            elif kind in (JSX_CLOSE, JSX_SELF_CLOSE) and elements:
+                j = elements.pop()
+                match[i], match[j] = j, i
+        return match
+
+
+def tokenize(text: str) -> TokenStream:
+    kinds: list[str] = []
+    starts: list[int] = []
+    ends: list[int] = []
+
+    def emit(kind: str, start: int, end: int) -> None:
+        kinds.append(kind)
+        starts.append(start)
+        ends.append(end)
+
+    # Each frame is [mode, open-brace depth (JS) or chunk start (template)].
+    stack = [[_JS_MODE, 0]]
+    prev_kind: str | None = None
+    prev_value = ''
+    pos = 0
+    n = len(text)
+
+    def open_tag(at: int) -> int:
+        end = _OPEN_TAG.match(text, at).end()
+        emit(JSX_OPEN, at, end)
+        stack.append([_TAG_MODE, 0])
+        return end
+
+    while pos < n:
+        frame = stack[-1]
+        mode = frame[0]
+
+        if mode == _JS_MODE:
+            m = _JS.match(text, pos)
+            group = m.lastgroup
+            end = m.end()
+            if group == 'ws':
+                pos = end
+                continue
+            if group == 'comment':
+                emit(COMMENT, pos, end)
+                pos = end
+                continue
+            if group == 'punct':
+                ch = text[pos]
+                if ch == '{':
+                    frame[1] += 1
+                elif ch == '}' and frame[1] == 0 and len(stack) > 1:
+                    stack.pop()
+                    if stack[-1][0] == _TEMPLATE_MODE:
+                        stack[-1][1] = pos  # the '}' starts the next template chunk
+                        pos = end
+                        continue
+                elif ch == '}':
+                    frame[1] -= 1
+                emit(PUNCT, pos, end)
+                prev_kind, prev_value = PUNCT, ch
+                pos = end
+                continue
+            if group == 'tick':
+                stack.append([_TEMPLATE_MODE, pos])
+                pos = end
+                continue
+            if group == 'lt':
+                if _expr_allowed(prev_kind, prev_value) and _JSX_START.match(text, pos):
+                    pos = open_tag(pos)
+                    prev_kind, prev_value = JSX_OPEN, ''
+                    continue
+                group = 'op'
+            elif group == 'slash':
+                r = _REGEX.match(text, pos) if _expr_allowed(prev_kind, prev_value) else None
+                if r is not None:
+                    group, end = 'regex', r.end()
+                else:
+                    group = 'op'
+            kind = {'string': STRING, 'ident': IDENT, 'number': NUMBER, 'regex': REGEX}.get(group, OP)
+            emit(kind, pos, end)
+            value = text[pos:end]
+            if value == '!' and not _expr_allowed(prev_kind, prev_value):
+                # TypeScript non-null assertion (`x! / 2`): still ends an operand.
+                kind, value = PUNCT, ')'
+            prev_kind, prev_value = kind, value
+            pos = end
+
+        elif mode == _TEMPLATE_MODE:
+            m = _TEMPLATE.match(text, pos)
+            end = m.end()
+            emit(TEMPLATE, frame[1], end)
+            if m.group('end') == '${':
+                stack.append([_JS_MODE, 0])
+            else:
+                stack.pop()
+                prev_kind, prev_value = TEMPLATE, ''
+            pos = end
+
+        elif mode == _TAG_MODE:
+            m = _TAG.match(text, pos)
+            group = m.lastgroup
+            end = m.end()
+            if group == 'ws':
+                pass
+            elif group == 'selfclose':
+                emit(JSX_SELF_CLOSE, pos, end)
+                stack.pop()
+                prev_kind, prev_value = JSX_SELF_CLOSE, ''
+            elif group == 'gt':
+                emit(JSX_OPEN_END, pos, end)
+                frame[0] = _CHILDREN_MODE
+            elif group == 'lbrace':
+                emit(PUNCT, pos, end)
+                stack.append([_JS_MODE, 0])
+                prev_kind, prev_value = PUNCT, '{'
+            else:
+                emit({'comment': COMMENT, 'string': STRING, 'attr': JSX_ATTR}.get(group, OP),
+                     pos, end)
+            pos = end
+
+        else:  # _CHILDREN_MODE
+            m = _CHILDREN.match(text, pos)
+            group = m.lastgroup
+            end = m.end()
+            if group == 'text':
+                emit(JSX_TEXT, pos, end)
+            elif group == 'lbrace':
+                emit(PUNCT, pos, end)
+                stack.append([_JS_MODE, 0])
+                prev_kind, prev_value = PUNCT, '{'
+            elif group == 'close':
+                emit(JSX_CLOSE, pos, end)
+                stack.pop()
+                prev_kind, prev_value = JSX_CLOSE, ''
+            else:
+                end = open_tag(pos)
+            pos = end
+
+    return TokenStream(text, kinds, starts, ends)
+
+
+class TokenCache:
+    """Token streams keyed by content hash: a bounded in-memory LRU, backed by
+    ``directory`` (marshalled token lists, oldest pruned) when one is given."""
+
+    def __init__(self, maxsize: int = 32, max_files: int = 256):
+        self.maxsize = maxsize
+        self.max_files = max_files
+        self._streams: OrderedDict[str, TokenStream] = OrderedDict()
+
+    def get(self, text: str, directory: Path | None = None) -> TokenStream:
+        key = digest(text)
+        stream = self._streams.get(key)
+        if stream is not None:
+            self._streams.move_to_end(key)
+            return stream
+        stream = self._load(directory, key, text) if directory is not None else None
+        if stream is None:
+            stream = tokenize(text)
+            if directory is not None:
+                self._store(directory, key, stream)
+        self._streams[key] = stream
+        if len(self._streams) > self.maxsize:
+            self._streams.popitem(last=False)
+        return stream
+
+    @staticmethod
+    def _load(directory: Path, key: str, text: str) -> TokenStream | None:
+        try:
+            with open(directory / f'{key}.tok', 'rb') as f:
+                kinds, starts, ends = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        return TokenStream(text, kinds, starts, ends)
+
+    def _store(self, directory: Path, key: str, stream: TokenStream) -> None:
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            with open(directory / f'{key}.tok', 'wb') as f:
+                marshal.dump((stream.kinds, stream.starts, stream.ends), f)
+            files = list(directory.glob('*.tok'))
+            if len(files) > self.max_files:
+                files.sort(key=lambda p: p.stat().st_mtime_ns)
+                for old in files[:len(files) - self.max_files]:
+                    old.unlink()
+        except OSError:
+            pass
+
+
+token_cache = TokenCache()
+
+
+# -- selectors ---------------------------------------------------------------
+
+_SELECTOR = re.compile(
+    r'^(?P<kind>return|jsx):(?P<name>[^\[#]*)(?P<filters>(?:\[[^\]=]+=[^\]]*\])*)(?:#(?P<index>-?\d+))?$')
+_FILTER = re.compile(r'\[([^\]=]+)=([^\]]*)\]')
+
+
+def _significant_before(ts: TokenStream, i: int) -> int:
+    i -= 1
+    while i >= 0 and ts.kinds[i] == COMMENT:
+        i -= 1
+    return i
+
+
+def _function_body(ts: TokenStream, name: str) -> tuple[int, int]:
+    """Token indices of the delimiters of ``name``'s body: ``{``/``}`` for a
+    block body, ``(``/``)`` for a parenthesised expression body."""
+    for i, kind in enumerate(ts.kinds):
+        if kind != IDENT or ts.value(i) != name:
+            continue
+        before = _significant_before(ts, i)
+        if before < 0 or ts.value(before) not in ('const', 'let', 'var', 'function'):
+            continue
+        j = i + 1
+        if ts.value(before) == 'function':
+            while j < len(ts) and ts.value(j) != '(':
+                j += 1
+            j = ts.match.get(j, len(ts)) + 1
+            while j < len(ts) and not (ts.kinds[j] == PUNCT and ts.value(j) == '{'):
+                j += 1
+            if j < len(ts):
+                return j, ts.match.get(j, len(ts) - 1)
+            continue
+        # Arrow components, possibly wrapped (memo(...), forwardRef(...)):
+        # descend into parentheses but skip object/array groups such as
+        # destructured parameters with default callbacks.
+        while j < len(ts):
+            value = ts.value(j)
+            if ts.kinds[j] == PUNCT and value in '{[':
+                j = ts.match.get(j, len(ts) - 1) + 1
+                continue
+            if ts.kinds[j] == OP and '=>' in value:
+                body = j + 1
+                while body < len(ts) and ts.kinds[body] == COMMENT:
+                    body += 1
+                if body < len(ts) and ts.value(body) in ('{', '('):
+                    return body, ts.match.get(body, len(ts) - 1)
+                break
+            if ts.kinds[j] == PUNCT and value == ';':
+                break
+            j += 1
+    raise MarkerError(f'component or function {name!r} not found')
+
+
+def _returns(ts: TokenStream, name: str) -> list[tuple[int, int]]:
+    open_i, close_i = _function_body(ts, name)
+    if ts.value(open_i) == '(':
+        return [(ts.starts[open_i], ts.ends[close_i])]
+    found = []
+    j = open_i + 1
+    while j < close_i:
+        kind, value = ts.kinds[j], ts.value(j)
+        if kind == OP and '=>' in value and j + 1 < close_i and ts.value(j + 1) == '{':
+            j = ts.match.get(j + 1, close_i) + 1  # nested arrow function body
+            continue
+        if kind == IDENT and value == 'function':
+            k = j + 1
+            while k < close_i and ts.value(k) != '{':
+                if ts.value(k) == '(':
+                    k = ts.match.get(k, close_i)
+                k += 1
+            j = ts.match.get(k, close_i) + 1
+            continue
+        if kind == IDENT and value == 'return':
+            k = j + 1
+            while k < close_i and ts.kinds[k] == COMMENT:
+                k += 1
+            if ts.value(k) == '(':
+                end = ts.match.get(k, close_i)
+            else:
+                end = k
+                while end < close_i and ts.value(end) not in (';', '}'):
+                    if ts.kinds[end] == PUNCT and ts.value(end) in _PAIRS:
+                        end = ts.match.get(end, close_i)
+                    end += 1
+                end -= ts.value(end) == '}'
+            if end + 1 < close_i and ts.value(end + 1) == ';':
+                end += 1
+            found.append((ts.starts[j], ts.ends[end]))
+            j = end + 1
+            continue
+        j += 1
+    return found
+
+
+def _preceding_comments(ts: TokenStream, i: int) -> list[str]:
+    comments = []
+    j = i - 1
+    while j >= 0:
+        kind = ts.kinds[j]
+        if kind == COMMENT:
+            comments.append(ts.value(j))
+        elif not ((kind == JSX_TEXT and not ts.value(j).strip())
+                  or (kind == PUNCT and ts.value(j) in '{}')):
+            break
+        j -= 1
+    return comments
+
+
+def _attribute(ts: TokenStream, i: int, name: str) -> str | None:
+    """Raw value of attribute ``name`` on the element opened at token ``i``."""
+    j = i + 1
+    while j < len(ts) and ts.kinds[j] not in (JSX_OPEN_END, JSX_SELF_CLOSE):
+        if ts.kinds[j] == PUNCT and ts.value(j) == '{':
+            j = ts.match.get(j, j)
+        elif ts.kinds[j] == JSX_ATTR and ts.value(j) == name:
+            if j + 2 < len(ts) and ts.value(j + 1) == '=':
+                v = j + 2
+                if ts.kinds[v] == PUNCT and ts.value(v) == '{':
+                    return ts.text[ts.ends[v]:ts.starts[ts.match.get(v, v)]]
+                return ts.value(v)[1:-1]
+            return ''
+        j += 1
+    return None
+
+
+def _elements(ts: TokenStream, name: str, filters: list[tuple[str, str]]) -> list[tuple[int, int]]:
+    found = []
+    for i, kind in enumerate(ts.kinds):
+        if kind != JSX_OPEN or (name != '*' and ts.tag(i) != name):
+            continue
+        ok = True
+        for key, wanted in filters:
+            if key == 'comment':
+                ok = any(wanted in c for c in _preceding_comments(ts, i))
+            else:
+                value = _attribute(ts, i, key)
+                ok = value is not None and wanted in value
+            if not ok:
+                break
+        if ok and i in ts.match:
+            found.append((ts.starts[i], ts.ends[ts.match[i]]))
+    return found
+
+
+def find_region(text: str, selector: str, cache_dir: Path | None = None) -> tuple[int, int]:
+    """Character offsets ``[start, end)`` of the region ``selector`` addresses."""
+    m = _SELECTOR.match(selector.strip())
+    if m is None:
+        raise MarkerError(f'invalid selector: {selector!r}')
+    ts = token_cache.get(text, cache_dir)
+    name = m.group('name').strip()
+    if m.group('kind') == 'return':
+        matches = _returns(ts, name)
+    else:
+        filters = [(k.strip(), v.strip()) for k, v in _FILTER.findall(m.group('filters'))]
+        matches = _elements(ts, name, filters)
+    if not matches:
+        raise MarkerError(f'selector matched nothing: {selector!r}')
+    index = m.group('index')
+    if index is None:
+        if len(matches) > 1:
+            raise MarkerError(f'selector matched {len(matches)} regions, add #n: {selector!r}')
+        return matches[0]
+    try:
+        return matches[int(index)]
+    except IndexError:
+        raise MarkerError(f'selector has only {len(matches)} match(es): {selector!r}') from None
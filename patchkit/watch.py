@@ -0,0 +1,218 @@
+"""``patch.py --watch``: keep targets in sync as their inputs change.
+
+A resident loop watches the manifests, the replacement sources they
+reference and every target file. Bursts of events (editors often write,
+rename and chmod in quick succession) are debounced into one batch, and
+only the affected files are spliced again, reusing the in-memory marker
+index, apply cache and token cache, so re-application after a save costs
+about as much as splicing that one file.
+
+Events come from inotify on Linux (watching the parent directories, so
+editors that save by renaming a new file into place are seen) and from
+stat polling everywhere else.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+from .cache import ApplyCache
+from .errors import PatchError
+from .manifest import Manifest, load_manifests
+from .markers import MarkerIndex
+from .report import ALREADY_APPLIED
+from .runner import apply_manifest
+
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT = struct.Struct('iIII')
+
+
+class PollingWatcher:
+    """Detects changes by comparing each path's (mtime, size) between polls."""
+
+    def __init__(self, paths: set[Path], interval: float = 0.1):
+        self.interval = interval
+        self._stats: dict[Path, tuple[int, int] | None] = {}
+        self.update(paths)
+
+    @staticmethod
+    def _stat(path: Path) -> tuple[int, int] | None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def update(self, paths: set[Path]) -> None:
+        self._stats = {p: self._stats.get(p, self._stat(p)) for p in paths}
+
+    def wait(self, timeout: float | None) -> set[Path]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = set()
+            for path, old in self._stats.items():
+                new = self._stat(path)
+                if new != old:
+                    self._stats[path] = new
+                    changed.add(path)
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            delay = self.interval
+            if deadline is not None:
+                delay = min(delay, max(0.0, deadline - time.monotonic()))
+            time.sleep(delay)
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify on the directories containing the watched paths."""
+
+    def __init__(self, paths: set[Path]):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._dirs: dict[int, Path] = {}
+        self._paths: set[Path] = set()
+        self.update(paths)
+
+    def update(self, paths: set[Path]) -> None:
+        self._paths = set(paths)
+        wanted = {p.parent for p in paths}
+        for wd, d in list(self._dirs.items()):
+            if d not in wanted:
+                self._rm_watch(self._fd, wd)
+                del self._dirs[wd]
+        for d in wanted - set(self._dirs.values()):
+            wd = self._add_watch(self._fd, os.fsencode(d), _MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {d}')
+            self._dirs[wd] = d
+
+    def wait(self, timeout: float | None) -> set[Path]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        pos = 0
+        while pos < len(data):
+            wd, _mask, _cookie, length = _EVENT.unpack_from(data, pos)
+            pos += _EVENT.size
+            name = data[pos:pos + length].rstrip(b'\0')
+            pos += length
+            d = self._dirs.get(wd)
+            if d is not None and name:
+                path = d / os.fsdecode(name)
+                if path in self._paths:
+                    changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def make_watcher(paths: set[Path], polling: bool = False):
+    if not polling and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(paths)
+
+
+def _inputs(manifest_paths: list[Path], manifest: Manifest) -> tuple[set[Path], set[Path]]:
+    """(manifests + replacement sources, targets) to watch."""
+    inputs = {p.resolve() for p in manifest_paths}
+    inputs |= {e.source for e in manifest.entries if e.source is not None}
+    targets = {e.file for e in manifest.entries}
+    return inputs, targets
+
+
+def watch(manifest_paths: list[Path], root: Path | None, index: MarkerIndex,
+          cache: ApplyCache | None, engine: str = 'auto', debounce: float = 0.05,
+          polling: bool = False, transaction_factory: Callable | None = None,
+          out: Callable[[str], None] = print, write_mode: str = 'replace',
+          dry_run: bool = False) -> int:
+    """Apply the manifests, then re-apply incrementally until interrupted.
+
+    With ``dry_run`` every pass only reports what would change.
+    """
+    manifest = load_manifests(manifest_paths, root)
+    inputs, targets = _inputs(manifest_paths, manifest)
+    watcher = make_watcher(inputs | targets, polling)
+    out(f'watching {len(inputs)} input(s) and {len(targets)} target(s) '
+        f'with {type(watcher).__name__}; Ctrl+C to stop')
+
+    def run(selected: set[Path] | None) -> None:
+        entries = [e for e in manifest.entries if selected is None or e.file in selected]
+        if not entries:
+            return
+        report = apply_manifest(
+            Manifest(manifest.root, entries), dry_run=dry_run, index=index, cache=cache,
+            engine=engine, jobs=1,
+            transaction=transaction_factory() if transaction_factory else None,
+            write_mode=write_mode)
+        changed = [r for r in report.results if r.status != ALREADY_APPLIED]
+        for result in changed:
+            out(result.format())
+        if changed:
+            out(f'{len(report.results)} file(s) checked, {len(changed)} reported '
+                f'in {report.elapsed * 1000:.1f} ms')
+
+    run(None)
+    try:
+        while True:
+            changed = watcher.wait(None)
+            while True:
+                more = watcher.wait(debounce)
+                if not more:
+                    break
+                changed |= more
+            selected: set[Path] | None = changed & targets
+            if changed & inputs:
+                try:
+                    manifest = load_manifests(manifest_paths, root)
+                except PatchError as e:
+                    # Targets saved in the same burst are still re-spliced.
+                    out(f'patch.py: {e} (keeping the previous manifest)')
+                else:
+                    inputs, targets = _inputs(manifest_paths, manifest)
+                    watcher.update(inputs | targets)
+                    selected = None
+            run(selected)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        watcher.close()
+        for store in (index, cache):
+            if store is not None:
+                store.save()
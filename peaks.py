@@ -0,0 +1,337 @@
+"""Generate waveform peak files for uploaded tracks.
+
+    python peaks.py uploads/                  # every track below uploads/
+    python peaks.py a.wav b.mp3 --bits 16     # int16 instead of int8 peaks
+    python peaks.py uploads/ -j 8 --force     # regenerate up-to-date files too
+    python peaks.py uploads/ --sql > peaks.sql
+
+Each track is decoded in chunks (WAV with the standard library, anything
+else through an ``ffmpeg`` pipe), mixed down to mono and reduced block by
+block with NumPy into min/max/RMS triples at several resolutions. The result
+is written next to the audio as ``<track>.peaks``, so the player fetches a
+few KB instead of decoding the whole file to draw a waveform.
+
+File layout (little endian)::
+
+    header  "PEAK", u8 version, u8 bits (8 or 16), u16 levels,
+            u32 sample rate, u64 samples
+    levels  levels x (u32 samples per peak, u32 peaks), finest first
+    data    for each level: peaks x (min, max, rms) as int8 or int16,
+            full scale = 127 or 32767
+
+Tracks are spread over a process pool; files whose ``.peaks`` is newer than
+the audio are skipped unless ``--force`` is given.
+
+The player never guesses a peak file's URL: upload each ``.peaks`` to the
+``assets`` bucket under its track's storage path plus ``.peaks``, then record
+it with the ``assets.peaks_path`` updates printed by ``--sql`` (keyed, like
+``audiometa.py --sql``, by the path relative to the scanned directory).
+Tracks without ``peaks_path`` keep the placeholder bars.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import numpy as np
+except ImportError:  # reported by main(); audiometa imports the file helpers
+    np = None
+
+from patchkit.staging import copy_mode, discard, stage_bytes
+from patchkit.store import STATE_DIR
+
+#: Upload suffixes scanned in directories, here and by ``audiometa.py``.
+AUDIO_SUFFIXES = ('.wav', '.mp3', '.flac', '.ogg', '.oga', '.opus', '.m4a', '.aac', '.mp4',
+                  '.aif', '.aiff')
+PEAKS_SUFFIX = '.peaks'
+
+MAGIC = b'PEAK'
+VERSION = 1
+_HEADER = struct.Struct('<4sBBHIQ')
+_LEVEL = struct.Struct('<II')
+
+#: Samples decoded per chunk; bounds memory regardless of track length.
+CHUNK_SAMPLES = 1 << 18
+
+
+def _wav_chunks(path: Path) -> tuple[int, Iterator[np.ndarray]]:
+    """Sample rate and mono float32 chunks of a PCM WAV file."""
+    w = wave.open(str(path), 'rb')
+    rate, channels, width = w.getframerate(), w.getnchannels(), w.getsampwidth()
+    if width not in (1, 2, 3, 4):
+        w.close()
+        raise wave.Error(f'unsupported sample width: {width} bytes')
+
+    def chunks():
+        with w:
+            while True:
+                raw = w.readframes(CHUNK_SAMPLES)
+                if not raw:
+                    return
+                if width == 1:
+                    x = (np.frombuffer(raw, np.uint8).astype(np.float32) - 128) / 128
+                elif width == 3:
+                    b = np.frombuffer(raw, np.uint8).reshape(-1, 3).astype(np.int32)
+                    x = ((b[:, 0] | b[:, 1] << 8 | b[:, 2] << 16) << 8 >> 8).astype(np.float32)
+                    x /= 1 << 23
+                else:
+                    dtype = '<i2' if width == 2 else '<i4'
+                    x = np.frombuffer(raw, dtype).astype(np.float32) / (1 << (8 * width - 1))
+                if channels > 1:
+                    x = x.reshape(-1, channels).mean(axis=1)
+                yield x
+
+    return rate, chunks()
+
+
+def _ffmpeg_chunks(path: Path, rate: int | None = None) -> tuple[int, Iterator[np.ndarray]]:
+    """Sample rate and mono float32 chunks decoded (and resampled to ``rate``) by ffmpeg."""
+    if shutil.which('ffmpeg') is None or shutil.which('ffprobe') is None:
+        raise RuntimeError('ffmpeg/ffprobe are required for non-WAV audio')
+    probe = subprocess.run(
+        ['ffprobe', '-v', 'error', '-select_streams', 'a:0',
+         '-show_entries', 'stream=sample_rate', '-of', 'csv=p=0', str(path)],
+        capture_output=True, text=True)
+    if probe.returncode != 0 or not probe.stdout.strip():
+        raise RuntimeError(f'ffprobe failed: {probe.stderr.strip() or "no audio stream"}')
+    resample = ['-ar', str(rate)] if rate else []
+    rate = rate or int(probe.stdout.split()[0])
+
+    def chunks():
+        proc = subprocess.Popen(
+            ['ffmpeg', '-v', 'error', '-i', str(path), '-vn', '-ac', '1', *resample,
+             '-f', 'f32le', '-acodec', 'pcm_f32le', '-'],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            while True:
+                raw = proc.stdout.read(CHUNK_SAMPLES * 4)
+                if not raw:
+                    break
+                yield np.frombuffer(raw[:len(raw) // 4 * 4], '<f4')
+        finally:
+            proc.stdout.close()
+            err = proc.stderr.read().decode(errors='replace').strip()
+            if proc.wait() != 0:
+                raise RuntimeError(f'ffmpeg failed: {err}')
+
+    return rate, chunks()
+
+
+def decode(path: Path, rate: int | None = None) -> tuple[int, Iterator[np.ndarray]]:
+    """Sample rate and mono float32 chunks of ``path``. ``rate`` asks ffmpeg to
+    resample; WAV files are always read at their own rate."""
+    if path.suffix.lower() == '.wav':
+        try:
+            return _wav_chunks(path)
+        except wave.Error:
+            pass  # float, WAVE_FORMAT_EXTENSIBLE or >32-bit data: let ffmpeg handle it
+    return _ffmpeg_chunks(path, rate)
+
+
+class PeakAccumulator:
+    """Streaming min/max/sum-of-squares per block of ``block`` samples."""
+
+    def __init__(self, block: int):
+        self.block = block
+        self.samples = 0
+        self._tail = np.empty(0, np.float32)
+        self._mins: list[np.ndarray] = []
+        self._maxs: list[np.ndarray] = []
+        self._sumsq: list[np.ndarray] = []
+
+    def feed(self, x: np.ndarray) -> None:
+        self.samples += len(x)
+        if len(self._tail):
+            x = np.concatenate((self._tail, x))
+        n = len(x) // self.block * self.block
+        blocks = x[:n].reshape(-1, self.block)
+        self._mins.append(blocks.min(axis=1))
+        self._maxs.append(blocks.max(axis=1))
+        self._sumsq.append(np.einsum('ij,ij->i', blocks, blocks, dtype=np.float64))
+        self._tail = x[n:].copy()
+
+    def finish(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(mins, maxs, sums of squares, sample counts) per block."""
+        mins, maxs, sumsq = self._mins, self._maxs, self._sumsq
+        full = sum(len(m) for m in mins)
+        if len(self._tail):
+            t = self._tail.astype(np.float64)
+            mins = mins + [np.array([t.min()], np.float32)]
+            maxs = maxs + [np.array([t.max()], np.float32)]
+            sumsq = sumsq + [np.array([t @ t])]
+        counts = np.full(full + (1 if len(self._tail) else 0), self.block, np.int64)
+        if len(self._tail):
+            counts[-1] = len(self._tail)
+        cat = lambda parts, dtype: np.concatenate(parts) if parts else np.empty(0, dtype)  # noqa: E731
+        return cat(mins, np.float32), cat(maxs, np.float32), cat(sumsq, np.float64), counts
+
+
+def levels(mins, maxs, sumsq, counts, factor: int, count: int):
+    """Yield (level index, min, max, rms) from the finest blocks up, each level
+    ``factor`` times coarser than the previous one."""
+    for level in range(count):
+        if level:
+            if len(mins) <= 1:
+                break
+            groups = np.arange(0, len(mins), factor)
+            mins = np.minimum.reduceat(mins, groups)
+            maxs = np.maximum.reduceat(maxs, groups)
+            sumsq = np.add.reduceat(sumsq, groups)
+            counts = np.add.reduceat(counts, groups)
+        yield level, mins, maxs, np.sqrt(sumsq / np.maximum(counts, 1))
+
+
+def quantize(values: np.ndarray, bits: int) -> np.ndarray:
+    scale = 127 if bits == 8 else 32767
+    return np.clip(np.rint(values * scale), -scale, scale).astype('<i1' if bits == 8 else '<i2')
+
+
+def compute(path: Path, bits: int = 8, block: int = 2048, factor: int = 4,
+            count: int = 4) -> bytes:
+    """The encoded ``.peaks`` content for the audio file at ``path``."""
+    rate, chunks = decode(path)
+    acc = PeakAccumulator(block)
+    for chunk in chunks:
+        acc.feed(chunk)
+    table = []
+    data = []
+    for level, mins, maxs, rms in levels(*acc.finish(), factor, count):
+        table.append(_LEVEL.pack(block * factor ** level, len(mins)))
+        data.append(quantize(np.stack((mins, maxs, rms), axis=1), bits).tobytes())
+    header = _HEADER.pack(MAGIC, VERSION, bits, len(table), rate, acc.samples)
+    return b''.join([header, *table, *data])
+
+
+def peaks_path(path: Path) -> Path:
+    return path.with_name(path.name + PEAKS_SUFFIX)
+
+
+def is_current(path: Path) -> bool:
+    try:
+        return peaks_path(path).stat().st_mtime_ns >= path.stat().st_mtime_ns
+    except OSError:
+        return False
+
+
+def process(path: Path, bits: int, block: int, factor: int, count: int,
+            force: bool) -> dict:
+    """Worker entry point: write ``path``'s peak file unless it is up to date."""
+    started = time.perf_counter()
+    result = {'path': str(path), 'status': 'skipped', 'bytes': 0}
+    try:
+        if force or not is_current(path):
+            data = compute(path, bits, block, factor, count)
+            target = peaks_path(path)
+            tmp = stage_bytes(target, data)
+            try:
+                copy_mode(path, tmp)
+                os.replace(tmp, target)
+            except OSError:
+                discard(tmp)
+                raise
+            result.update(status='written', bytes=len(data))
+    except Exception as e:  # one unreadable upload must not stop the batch
+        result.update(status='error', message=f'{type(e).__name__}: {e}')
+    result['elapsed'] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def find_audio(paths: list[Path]) -> list[Path]:
+    """``paths``, with directories expanded to the audio files below them
+    (outside ``.patchkit/`` state directories)."""
+    found = []
+    for path in paths:
+        if path.is_dir():
+            found.extend(sorted(p for p in path.rglob('*')
+                                if p.suffix.lower() in AUDIO_SUFFIXES and p.is_file()
+                                and STATE_DIR not in p.parts))
+        else:
+            found.append(path)
+    return found
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='peaks.py', description='Write multi-resolution waveform peaks next to audio files.')
+    parser.add_argument('paths', nargs='+', type=Path, help='audio files or directories to scan')
+    parser.add_argument('--bits', type=int, choices=(8, 16), default=8,
+                        help='peak sample width (default: 8)')
+    parser.add_argument('--block', type=int, default=2048,
+                        help='samples per peak at the finest level (default: 2048)')
+    parser.add_argument('--factor', type=int, default=4,
+                        help='each level is this many times coarser (default: 4)')
+    parser.add_argument('--levels', type=int, default=4, help='number of levels (default: 4)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='regenerate up-to-date peak files')
+    parser.add_argument('--json', action='store_true', help='print one JSON object per track')
+    parser.add_argument('--sql', action='store_true',
+                        help='print assets.peaks_path updates for tracks with a peak file')
+    return parser
+
+
+def sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if np is None:
+        print('peaks.py needs NumPy: pip install -r requirements.txt')
+        return 2
+    if args.block < 1 or args.factor < 2 or args.levels < 1:
+        print('peaks.py: --block must be >= 1, --factor >= 2 and --levels >= 1')
+        return 2
+    tracks = find_audio(args.paths)
+    started = time.perf_counter()
+    options = (args.bits, args.block, args.factor, args.levels, args.force)
+    jobs = max(1, min(args.jobs, len(tracks)))
+    if jobs == 1:
+        results = [process(path, *options) for path in tracks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(process, path, *options) for path in tracks]
+            results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+
+    root = next((p for p in args.paths if p.is_dir()), Path('.')).resolve()
+    failed = 0
+    for path, result in zip(tracks, results):
+        failed += result['status'] == 'error'
+        if args.sql:
+            if result['status'] == 'error':
+                continue
+            try:
+                key = path.resolve().relative_to(root).as_posix()
+            except ValueError:
+                key = path.name
+            print(f'update public.assets set peaks_path = {sql_string(key + PEAKS_SUFFIX)} '
+                  f'where storage_path = {sql_string(key)};')
+        elif args.json:
+            print(json.dumps(result))
+        elif result['status'] != 'skipped':
+            line = f'{result["status"]:>8}  {result["path"]} ({result["bytes"]} bytes)'
+            print(f'{line}: {result["message"]}' if 'message' in result else line)
+    written = sum(r['status'] == 'written' for r in results)
+    if not args.json:
+        rate = f', {written / elapsed:.1f} tracks/s' if written and elapsed else ''
+        print(f'{len(results)} track(s) in {elapsed:.2f}s with {jobs} job(s): '
+              f'{written} written, {failed} failed{rate}',
+              file=sys.stderr if args.sql else sys.stdout)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
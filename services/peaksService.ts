@@ -0,0 +1,61 @@
+// Reads the waveform peak files written by peaks.py. Tracks only carry a peaks
+// URL (`files.peaks`) once the file has been uploaded and `assets.peaks_path` set.
+//
+// Layout (little endian): "PEAK", u8 version, u8 bits (8 | 16), u16 levels,
+// u32 sample rate, u64 samples; then levels x (u32 samples per peak, u32 peaks),
+// finest first; then per level peaks x (min, max, rms) as int8 / int16.
+
+const HEADER_SIZE = 20;
+const LEVEL_SIZE = 8;
+
+const cache = new Map<string, Promise<number[] | null>>();
+
+// Reduce a peak file to `bars` heights in 0..1, from the coarsest level that
+// still has at least that many peaks.
+export const parsePeaks = (buffer: ArrayBuffer, bars: number): number[] | null => {
+    const view = new DataView(buffer);
+    if (buffer.byteLength < HEADER_SIZE) return null;
+    const magic = String.fromCharCode(view.getUint8(0), view.getUint8(1), view.getUint8(2), view.getUint8(3));
+    if (magic !== 'PEAK' || view.getUint8(4) !== 1) return null;
+    const bits = view.getUint8(5);
+    const levels = view.getUint16(6, true);
+    const width = bits / 8;
+    const scale = bits === 8 ? 127 : 32767;
+
+    let offset = HEADER_SIZE + levels * LEVEL_SIZE;
+    let chosen = { offset, count: 0 };
+    for (let level = 0; level < levels; level++) {
+        const count = view.getUint32(HEADER_SIZE + level * LEVEL_SIZE + 4, true);
+        if (level === 0 || count >= bars) chosen = { offset, count };
+        offset += count * 3 * width;
+    }
+    if (chosen.count === 0 || offset > buffer.byteLength) return null;
+
+    const read = (i: number) => bits === 8
+        ? view.getInt8(chosen.offset + i)
+        : view.getInt16(chosen.offset + i * 2, true);
+    const heights = Array.from({ length: bars }, (_, bar) => {
+        const from = Math.floor(bar * chosen.count / bars);
+        const to = Math.max(from + 1, Math.floor((bar + 1) * chosen.count / bars));
+        let peak = 0;
+        for (let p = from; p < to && p < chosen.count; p++) {
+            peak = Math.max(peak, -read(p * 3), read(p * 3 + 1));
+        }
+        return peak / scale;
+    });
+    const loudest = Math.max(...heights);
+    return loudest > 0 ? heights.map(h => h / loudest) : heights;
+};
+
+export const fetchPeaks = (url: string, bars: number): Promise<number[] | null> => {
+    const key = `${bars}:${url}`;
+    let pending = cache.get(key);
+    if (!pending) {
+        pending = fetch(url)
+            .then(res => (res.ok ? res.arrayBuffer() : null))
+            .then(buffer => (buffer ? parsePeaks(buffer, bars) : null))
+            .catch(() => null);
+        cache.set(key, pending);
+    }
+    return pending;
+};
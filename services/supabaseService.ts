@@ -226,18 +226,22 @@ export const getProjectById = async (id: string): Promise<Project> => {
     if (t.assigned_file_id) assetIds.add(t.assigned_file_id);
   });
 
-  const assetMap = new Map<string, { url: string, duration: number | null }>();
+  const assetMap = new Map<string, { url: string, duration: number | null, peaksUrl?: string }>();
   if (assetIds.size > 0) {
     const { data: assets, error: assetsError } = await supabase
       .from('assets')
-      .select('id, storage_path, duration_seconds')
+      .select('id, storage_path, duration_seconds, peaks_path')
       .in('id', Array.from(assetIds));
 
     if (!assetsError && assets) {
       assets.forEach((a: any) => {
         if (a.storage_path) {
           const { data: { publicUrl } } = supabase.storage.from('assets').getPublicUrl(a.storage_path);
-          assetMap.set(a.id, { url: publicUrl, duration: a.duration_seconds });
+          // peaks_path is set once peaks.py's output has been uploaded
+          const peaksUrl = a.peaks_path
+            ? supabase.storage.from('assets').getPublicUrl(a.peaks_path).data.publicUrl
+            : undefined;
+          assetMap.set(a.id, { url: publicUrl, duration: a.duration_seconds, peaksUrl });
         }
       });
     }
@@ -274,7 +278,8 @@ export const getProjectById = async (id: string): Promise<Project> => {
         statusTags: track.status_tags,
         assignedFileId: track.assigned_file_id,
         files: {
-          mp3: mp3Url
+          mp3: mp3Url,
+          peaks: assetInfo?.peaksUrl
         }
       };
     }) || [],
@@ -361,18 +366,22 @@ export const getProjects = async (): Promise<Project[]> => {
     });
   });
 
-  const assetMap = new Map<string, { url: string, duration: number | null }>();
+  const assetMap = new Map<string, { url: string, duration: number | null, peaksUrl?: string }>();
   if (assetIds.size > 0) {
     const { data: assets, error: assetsError } = await supabase
       .from('assets')
-      .select('id, storage_path, duration_seconds')
+      .select('id, storage_path, duration_seconds, peaks_path')
       .in('id', Array.from(assetIds));
 
     if (!assetsError && assets) {
       assets.forEach((a: any) => {
         if (a.storage_path) {
           const { data: { publicUrl } } = supabase.storage.from('assets').getPublicUrl(a.storage_path);
-          assetMap.set(a.id, { url: publicUrl, duration: a.duration_seconds });
+          // peaks_path is set once peaks.py's output has been uploaded
+          const peaksUrl = a.peaks_path
+            ? supabase.storage.from('assets').getPublicUrl(a.peaks_path).data.publicUrl
+            : undefined;
+          assetMap.set(a.id, { url: publicUrl, duration: a.duration_seconds, peaksUrl });
         }
       });
     }
@@ -415,7 +424,8 @@ export const getProjects = async (): Promise<Project[]> => {
           statusTags: track.status_tags,
           assignedFileId: track.assigned_file_id,
           files: {
-            mp3: mp3Url
+            mp3: mp3Url,
+            peaks: assetInfo?.peaksUrl
           }
         };
       }) || [],
@@ -1067,7 +1077,8 @@ export const getProjectsByUserId = async (userId: string): Promise<Project[]> =>
         status_tags,
         assigned_file_id,
         files:assigned_file_id (
-            storage_path
+            storage_path,
+            peaks_path
         )
       ),
       project_licenses (
@@ -1126,6 +1137,10 @@ export const getProjectsByUserId = async (userId: string): Promise<Project[]> =>
         const { data: { publicUrl } } = supabase.storage.from('assets').getPublicUrl(track.files.storage_path);
         mp3Url = publicUrl;
       }
+      let peaksUrl: string | undefined;
+      if (track.files?.peaks_path) {
+        peaksUrl = supabase.storage.from('assets').getPublicUrl(track.files.peaks_path).data.publicUrl;
+      }
 
       return {
         id: track.id,
@@ -1136,7 +1151,8 @@ export const getProjectsByUserId = async (userId: string): Promise<Project[]> =>
         statusTags: track.status_tags,
         assignedFileId: track.assigned_file_id,
         files: {
-          mp3: mp3Url
+          mp3: mp3Url,
+          peaks: peaksUrl
         }
       };
     }) || [],
@@ -0,0 +1,722 @@
+"""Squash supabase/migrations into one baseline script.
+
+    python squash_migrations.py                          # baseline to stdout
+    python squash_migrations.py -o supabase/baseline.sql
+    python squash_migrations.py --plan                   # what collapses, and why
+    python squash_migrations.py -o base.sql --verify --base schema.sql
+
+The migration files are split into statements (quotes, dollar quoting and
+comments are respected) and every statement is classified by the object it
+defines, drops or touches: tables, functions, policies, triggers,
+constraints, indexes, types and row level security switches.
+
+Policies, functions, triggers and constraints are *replaceable*: only their
+last definition survives, preceded by a single ``DROP ... IF EXISTS`` when
+the object may predate the migrations (its history starts with a drop), and
+nothing at all when it is created and later dropped again. Repeated ``ENABLE
+ROW LEVEL SECURITY`` collapses to the first one. Everything else is kept
+verbatim.
+
+Statements are then ordered along a dependency graph: an object's surviving
+definition is placed as early as its first appearance allows, but after every
+object it references (functions named in a policy, tables named in a
+function body) and after every statement that touched the same table before
+it originally ran. A function's final body also follows the earlier ``ALTER
+TABLE`` statements that added or changed the columns it names on the tables
+it names, since ``LANGUAGE sql`` bodies are validated when they are created.
+Statements that are not collapsed keep their relative order.
+
+An argless ``DROP FUNCTION name`` is resolved against the single overload of
+``name`` created before it; with none or several it is kept as written.
+
+``--verify`` applies the migrations and the baseline to two fresh databases
+(on a throwaway cluster started with ``initdb``/``pg_ctl``, or on ``--dsn``)
+and compares their catalogs: columns, constraints, indexes, policies,
+function definitions, triggers, enums and RLS flags. The migrations alter
+tables they never create, so ``--base`` must give the schema they start from
+(e.g. ``supabase db dump`` of a database from before them); a stub ``auth``
+schema and the Supabase roles are created first.
+"""
+
+from __future__ import annotations
+
+import argparse
+import difflib
+import heapq
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from patchkit.staging import discard, stage_bytes
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / 'supabase' / 'migrations'
+
+#: Kinds whose last definition replaces the earlier ones.
+REPLACEABLE = ('function', 'policy', 'trigger', 'constraint')
+
+_IDENT = r'(?:"(?:[^"]|"")+"|[A-Za-z_][\w$]*)'
+_QNAME = rf'{_IDENT}(?:\s*\.\s*{_IDENT})?'
+_FLAGS = re.I | re.S
+
+_CREATE_FUNCTION = re.compile(rf'CREATE\s+(OR\s+REPLACE\s+)?FUNCTION\s+({_QNAME})\s*\(', _FLAGS)
+_DROP_FUNCTION = re.compile(rf'DROP\s+FUNCTION\s+(?:IF\s+EXISTS\s+)?({_QNAME})\s*(\()?', _FLAGS)
+_CREATE_POLICY = re.compile(rf'CREATE\s+POLICY\s+({_IDENT})\s+ON\s+({_QNAME})', _FLAGS)
+_DROP_POLICY = re.compile(rf'DROP\s+POLICY\s+(?:IF\s+EXISTS\s+)?({_IDENT})\s+ON\s+({_QNAME})', _FLAGS)
+_CREATE_TRIGGER = re.compile(
+    rf'CREATE\s+(?:OR\s+REPLACE\s+)?(?:CONSTRAINT\s+)?TRIGGER\s+({_IDENT})\s.*?\bON\s+({_QNAME})',
+    _FLAGS)
+_DROP_TRIGGER = re.compile(rf'DROP\s+TRIGGER\s+(?:IF\s+EXISTS\s+)?({_IDENT})\s+ON\s+({_QNAME})', _FLAGS)
+_CREATE_TABLE = re.compile(
+    rf'CREATE\s+(?:UNLOGGED\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?({_QNAME})', _FLAGS)
+_CREATE_INDEX = re.compile(
+    rf'CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?'
+    rf'(?:{_IDENT}\s+)?ON\s+(?:ONLY\s+)?({_QNAME})', _FLAGS)
+_CREATE_TYPE = re.compile(rf'CREATE\s+TYPE\s+({_QNAME})', _FLAGS)
+_ALTER_TYPE = re.compile(rf'ALTER\s+TYPE\s+({_QNAME})', _FLAGS)
+_ALTER_TABLE = re.compile(
+    rf'ALTER\s+TABLE\s+(?:IF\s+EXISTS\s+)?(?:ONLY\s+)?({_QNAME})\s+(.*)', _FLAGS)
+_DROP_CONSTRAINT = re.compile(rf'DROP\s+CONSTRAINT\s+(?:IF\s+EXISTS\s+)?({_IDENT})\s*;?\s*$', _FLAGS)
+_ADD_CONSTRAINT = re.compile(rf'ADD\s+CONSTRAINT\s+({_IDENT})\s', _FLAGS)
+_ENABLE_RLS = re.compile(r'ENABLE\s+ROW\s+LEVEL\s+SECURITY\s*;?\s*$', _FLAGS)
+_COLUMN_CHANGE = re.compile(
+    rf'(?:\bADD\s+(?:COLUMN\s+)?(?:IF\s+NOT\s+EXISTS\s+)?'
+    rf'(?!(?:CONSTRAINT|PRIMARY|UNIQUE|FOREIGN|CHECK|EXCLUDE)\b)({_IDENT})'
+    rf'|\bALTER\s+(?:COLUMN\s+)?(?!CONSTRAINT\b)({_IDENT})\s+(?:SET|DROP|TYPE|ADD)\b'
+    rf'|\bRENAME\s+(?:COLUMN\s+)?{_IDENT}\s+TO\s+({_IDENT}))', _FLAGS)
+_WORD = re.compile(r'[A-Za-z_][\w$]*')
+_DOLLAR = re.compile(r'\$([A-Za-z_]\w*)?\$')
+
+
+class SquashError(Exception):
+    """The migrations could not be squashed or verified."""
+
+
+@dataclass
+class Statement:
+    """One SQL statement and what it does to which object."""
+
+    source: str
+    index: int
+    text: str
+    #: 'create', 'drop', 'ensure' (idempotent switch) or 'touch'.
+    op: str = 'touch'
+    #: (kind, name) of the object created/dropped/ensured, if any.
+    obj: tuple[str, str] | None = None
+    #: Tables/types this statement modifies or hangs an object on.
+    touches: set[str] = field(default_factory=set)
+    #: Columns an ``ALTER TABLE`` adds, changes or renames to.
+    columns: set[str] = field(default_factory=set)
+    #: Lower-cased words of a function body: the tables and columns it may use.
+    reads: set[str] = field(default_factory=set)
+
+    @property
+    def where(self) -> str:
+        return f'{self.source}:{self.index + 1}'
+
+
+def _name(ident: str) -> str:
+    """Normalise one identifier: quoted ones keep their case."""
+    ident = ident.strip()
+    if ident.startswith('"'):
+        return ident[1:-1].replace('""', '"')
+    return ident.lower()
+
+
+def _qname(qname: str) -> str:
+    """``schema.name`` with unqualified names placed in ``public``."""
+    parts = [_name(p) for p in re.findall(_IDENT, qname)]
+    return '.'.join(parts) if len(parts) == 2 else f'public.{parts[0]}'
+
+
+def _strip_comments(sql: str) -> str:
+    """``sql`` with comments blanked out and strings/dollar bodies kept intact."""
+    out = []
+    for kind, chunk in _lex(sql):
+        out.append(' ' if kind == 'comment' else chunk)
+    return ''.join(out)
+
+
+def _lex(sql: str):
+    """Yield (kind, text) chunks: 'comment', 'string', 'dollar', 'semicolon', 'code'."""
+    i = start = 0
+    n = len(sql)
+
+    def flush(end):
+        if end > start:
+            yield 'code', sql[start:end]
+
+    while i < n:
+        c = sql[i]
+        end = None
+        kind = None
+        if sql.startswith('--', i):
+            j = sql.find('\n', i)
+            end, kind = (n if j == -1 else j + 1), 'comment'
+        elif sql.startswith('/*', i):
+            depth, j = 1, i + 2
+            while j < n and depth:
+                if sql.startswith('/*', j):
+                    depth, j = depth + 1, j + 2
+                elif sql.startswith('*/', j):
+                    depth, j = depth - 1, j + 2
+                else:
+                    j += 1
+            end, kind = j, 'comment'
+        elif c == "'":
+            escapes = i > 0 and sql[i - 1] in 'eE' and (i < 2 or not (sql[i - 2].isalnum() or sql[i - 2] == '_'))
+            j = i + 1
+            while j < n:
+                if escapes and sql[j] == '\\':
+                    j += 2
+                    continue
+                if sql[j] == "'":
+                    if sql.startswith("''", j):
+                        j += 2
+                        continue
+                    break
+                j += 1
+            end, kind = j + 1, 'string'
+        elif c == '"':
+            j = i + 1
+            while j < n:
+                if sql[j] == '"':
+                    if sql.startswith('""', j):
+                        j += 2
+                        continue
+                    break
+                j += 1
+            end, kind = j + 1, 'string'
+        elif c == '$' and not (i and (sql[i - 1].isalnum() or sql[i - 1] == '_')):
+            m = _DOLLAR.match(sql, i)
+            if m:
+                j = sql.find(m.group(0), m.end())
+                end, kind = (n if j == -1 else j + len(m.group(0))), 'dollar'
+        elif c == ';':
+            end, kind = i + 1, 'semicolon'
+        if kind is None:
+            i += 1
+            continue
+        yield from flush(i)
+        yield kind, sql[i:end]
+        i = start = end
+    yield from flush(n)
+
+
+def split_statements(sql: str) -> list[str]:
+    """Split a script into statements, each without its leading comments."""
+    statements = []
+    current: list[tuple[str, str]] = []
+    for kind, chunk in _lex(sql):
+        if not current and (kind == 'comment' or not chunk.strip()):
+            continue
+        current.append((kind, chunk))
+        if kind == 'semicolon':
+            statements.append(''.join(c for _, c in current).strip())
+            current = []
+    if any(kind != 'comment' and chunk.strip() for kind, chunk in current):
+        statements.append(''.join(c for _, c in current).strip())
+    return statements
+
+
+def _function_args(text: str, open_paren: int) -> str:
+    """Argument types of a function signature, names and defaults removed."""
+    depth = 0
+    for j in range(open_paren, len(text)):
+        if text[j] == '(':
+            depth += 1
+        elif text[j] == ')':
+            depth -= 1
+            if depth == 0:
+                break
+    args = []
+    for arg in re.split(r',(?![^()]*\))', text[open_paren + 1:j]):
+        arg = re.split(r'\s+(?:DEFAULT\b|=)', arg.strip(), maxsplit=1, flags=re.I)[0]
+        words = arg.split()
+        if words and words[0].upper() in ('IN', 'OUT', 'INOUT', 'VARIADIC'):
+            words = words[1:]
+        if len(words) > 1 and not re.match(r'(?i)(double|character|bit|time|timestamp)$', words[0]):
+            words = words[1:]
+        if words:
+            args.append(' '.join(words).lower())
+    return ','.join(args)
+
+
+def _body_words(text: str) -> set[str]:
+    """Lower-cased words inside the quoted or dollar-quoted bodies of ``text``."""
+    words = set()
+    for kind, chunk in _lex(text):
+        if kind in ('dollar', 'string') and not chunk.startswith('"'):
+            words.update(w.lower() for w in _WORD.findall(chunk))
+    return words
+
+
+def classify(source: str, index: int, text: str) -> Statement:
+    stmt = Statement(source, index, text)
+    code = _strip_comments(text).strip()
+
+    m = _CREATE_FUNCTION.match(code)
+    if m:
+        stmt.op = 'create'
+        stmt.obj = ('function', f'{_qname(m.group(2))}({_function_args(code, m.end() - 1)})')
+        stmt.reads = _body_words(code)
+        return stmt
+    m = _DROP_FUNCTION.match(code)
+    if m and ',' not in code[m.end():].split(')', 1)[-1]:
+        stmt.op = 'drop'
+        # Argless drops name no signature; load() resolves them.
+        args = f'({_function_args(code, m.end() - 1)})' if m.group(2) else ''
+        stmt.obj = ('function', f'{_qname(m.group(1))}{args}')
+        return stmt
+    for pattern, kind, op in ((_CREATE_POLICY, 'policy', 'create'), (_DROP_POLICY, 'policy', 'drop'),
+                              (_CREATE_TRIGGER, 'trigger', 'create'),
+                              (_DROP_TRIGGER, 'trigger', 'drop')):
+        m = pattern.match(code)
+        if m:
+            table = _qname(m.group(2))
+            stmt.op, stmt.obj = op, (kind, f'{table} {_name(m.group(1))}')
+            stmt.touches.add(table)
+            return stmt
+    m = _CREATE_TABLE.match(code)
+    if m:
+        stmt.op, stmt.obj = 'create', ('table', _qname(m.group(1)))
+        stmt.touches.add(_qname(m.group(1)))
+        return stmt
+    m = _CREATE_TYPE.match(code)
+    if m:
+        stmt.op, stmt.obj = 'create', ('type', _qname(m.group(1)))
+        stmt.touches.add(_qname(m.group(1)))
+        return stmt
+    m = _CREATE_INDEX.match(code) or _ALTER_TYPE.match(code)
+    if m:
+        stmt.touches.add(_qname(m.group(1)))
+        return stmt
+    m = _ALTER_TABLE.match(code)
+    if m:
+        table, action = _qname(m.group(1)), m.group(2)
+        stmt.touches.add(table)
+        sub = _DROP_CONSTRAINT.match(action)
+        if sub:
+            stmt.op, stmt.obj = 'drop', ('constraint', f'{table} {_name(sub.group(1))}')
+        elif (sub := _ADD_CONSTRAINT.match(action)) and ',' not in _strip_comments(action).split(')')[-1]:
+            stmt.op, stmt.obj = 'create', ('constraint', f'{table} {_name(sub.group(1))}')
+        elif _ENABLE_RLS.match(action):
+            stmt.op, stmt.obj = 'ensure', ('rls', table)
+        for change in _COLUMN_CHANGE.finditer(_strip_comments(action)):
+            stmt.columns.add(_name(next(g for g in change.groups() if g)))
+    return stmt
+
+
+def _resolve_argless_drops(statements: list[Statement]) -> None:
+    """Give each argless ``DROP FUNCTION name`` the signature of the single
+    overload of ``name`` existing at that point."""
+    live: dict[str, list[str]] = {}
+    for stmt in statements:
+        if stmt.obj is None or stmt.obj[0] != 'function':
+            continue
+        name = stmt.obj[1]
+        base = name.split('(')[0]
+        overloads = live.setdefault(base, [])
+        if stmt.op == 'create':
+            if name not in overloads:
+                overloads.append(name)
+            continue
+        if '(' not in name:
+            if len(overloads) != 1:
+                continue
+            name = overloads[0]
+            stmt.obj = ('function', name)
+        if name in overloads:
+            overloads.remove(name)
+
+
+def load(directory: Path) -> list[Statement]:
+    """Every statement of the ``*.sql`` files in ``directory``, in file name order."""
+    statements = []
+    files = sorted(directory.glob('*.sql'))
+    if not files:
+        raise SquashError(f'no .sql files in {directory}')
+    for path in files:
+        with open(path, 'r', encoding='utf-8') as f:
+            sql = f.read()
+        for index, text in enumerate(split_statements(sql)):
+            statements.append(classify(path.name, index, text))
+    _resolve_argless_drops(statements)
+    return statements
+
+
+@dataclass
+class Node:
+    """A statement (or DROP + final CREATE pair) of the squashed output."""
+
+    statements: list[Statement]
+    #: Position of the object's first appearance; ties keep this order.
+    priority: int
+    #: Position of the statement whose behaviour this node reproduces.
+    anchor: int
+    defines: tuple[str, str] | None = None
+    collapsed: int = 0
+
+    @property
+    def text(self) -> str:
+        return '\n\n'.join(s.text for s in self.statements)
+
+
+def collapse(statements: list[Statement]) -> tuple[list[Node], list[tuple]]:
+    """Reduce each replaceable object to its final form.
+
+    Returns the nodes to emit and, for ``--plan``, one record per object with
+    a history longer than one statement.
+    """
+    histories: dict[tuple[str, str], list[int]] = {}
+    for i, stmt in enumerate(statements):
+        if stmt.obj is not None and (stmt.obj[0] in REPLACEABLE or stmt.op == 'ensure'):
+            histories.setdefault(stmt.obj, []).append(i)
+
+    nodes = []
+    plan = []
+    handled: set[int] = set()
+    for obj, positions in histories.items():
+        handled.update(positions)
+        history = [statements[i] for i in positions]
+        first, last = history[0], history[-1]
+        if last.op == 'ensure':
+            kept = [first]
+        elif last.op == 'create':
+            kept = [last]
+            if first.op == 'drop':
+                kept.insert(0, first)
+        elif first.op == 'create' and not re.match(r'(?i)CREATE\s+OR\s+REPLACE', first.text):
+            kept = []  # created and dropped again within the migrations
+        else:
+            kept = [last]
+        if kept:
+            nodes.append(Node(kept, positions[0], positions[-1] if last.op != 'ensure'
+                              else positions[0], defines=obj if last.op == 'create' else None,
+                              collapsed=len(history) - len(kept)))
+        if len(history) > 1:
+            plan.append((obj, history, kept))
+
+    for i, stmt in enumerate(statements):
+        if i not in handled:
+            nodes.append(Node([stmt], i, i, defines=stmt.obj if stmt.op == 'create' else None))
+    nodes.sort(key=lambda node: node.priority)
+    return nodes, plan
+
+
+def _references(text: str, objects: dict[str, list[int]], functions: dict[str, list[int]]) -> set[int]:
+    code = _strip_comments(text)
+    refs = set()
+    for m in _WORD.finditer(code):
+        word = m.group(0).lower()
+        if word in objects:
+            refs.update(objects[word])
+        if word in functions and re.match(r'\s*\(', code[m.end():]):
+            refs.update(functions[word])
+    return refs
+
+
+def order(nodes: list[Node]) -> tuple[list[Node], bool]:
+    """Topologically order ``nodes``; returns (nodes, acyclic)."""
+    objects: dict[str, list[int]] = {}
+    functions: dict[str, list[int]] = {}
+    for n, node in enumerate(nodes):
+        if node.defines is None:
+            continue
+        kind, name = node.defines
+        short = name.split('(')[0].split('.')[-1].lower()
+        if kind == 'function':
+            functions.setdefault(short, []).append(n)
+        elif kind in ('table', 'type'):
+            objects.setdefault(short, []).append(n)
+
+    edges: dict[int, set[int]] = {n: set() for n in range(len(nodes))}
+    for n, node in enumerate(nodes):
+        for m in _references(node.statements[-1].text, objects, functions):
+            if m != n:
+                edges[m].add(n)
+    # Statements touching the same table keep the order they originally ran
+    # in; a collapsed node counts as running where its final form did.
+    touching: dict[str, list[int]] = {}
+    for n, node in enumerate(nodes):
+        for table in set().union(*(s.touches for s in node.statements)):
+            touching.setdefault(table, []).append(n)
+    for members in touching.values():
+        for a in members:
+            for b in members:
+                if nodes[a].anchor < nodes[b].anchor:
+                    edges[a].add(b)
+    # A function body only needs the shape of the tables it names as of its
+    # final definition: their creation and the earlier column changes it uses.
+    for n, node in enumerate(nodes):
+        reads = node.statements[-1].reads
+        if not reads:
+            continue
+        for m, other in enumerate(nodes):
+            if m == n or other.anchor >= node.anchor:
+                continue
+            for stmt in other.statements:
+                tables = {t.split('.')[-1].lower() for t in stmt.touches}
+                creates = stmt.obj is not None and stmt.obj[0] == 'table'
+                if tables & reads and (creates or stmt.columns & reads):
+                    edges[m].add(n)
+
+    indegree = {n: 0 for n in edges}
+    for targets in edges.values():
+        for m in targets:
+            indegree[m] += 1
+    ready = [(nodes[n].priority, n) for n, d in indegree.items() if d == 0]
+    heapq.heapify(ready)
+    result = []
+    while ready:
+        _, n = heapq.heappop(ready)
+        result.append(n)
+        for m in edges[n]:
+            indegree[m] -= 1
+            if indegree[m] == 0:
+                heapq.heappush(ready, (nodes[m].priority, m))
+    if len(result) < len(nodes):
+        # A cycle: fall back to the order the statements originally ran in.
+        return sorted(nodes, key=lambda node: node.anchor), False
+    return [nodes[n] for n in result], True
+
+
+def squash(statements: list[Statement]) -> tuple[str, list[tuple], bool]:
+    nodes, plan = collapse(statements)
+    ordered, acyclic = order(nodes)
+    sources = sorted({s.source for s in statements})
+    out = sum(len(node.statements) for node in ordered)
+    parts = [
+        f'-- Squashed baseline of {len(sources)} migration(s), {sources[0]} .. {sources[-1]}\n'
+        f'-- generated by squash_migrations.py: {len(statements)} statement(s) in, {out} out.'
+    ]
+    current = None
+    for node in ordered:
+        source = node.statements[-1].source
+        text = node.text
+        if source != current:
+            text = f'-- {source}\n{text}'
+            current = source
+        parts.append(text)
+    return '\n\n'.join(parts) + '\n', plan, acyclic
+
+
+def format_plan(plan: list[tuple]) -> list[str]:
+    lines = []
+    for (kind, name), history, kept in plan:
+        steps = ', '.join(f'{s.where} {s.op}' for s in history)
+        result = ' + '.join(f'{s.op} from {s.where}' for s in kept) or 'nothing (created, then dropped)'
+        lines.append(f'{kind} {name}\n    {steps}\n    -> {result}')
+    return lines
+
+
+# --- verification -------------------------------------------------------------
+
+SUPABASE_STUBS = """
+DO $$ BEGIN CREATE ROLE anon NOLOGIN; EXCEPTION WHEN duplicate_object THEN NULL; END $$;
+DO $$ BEGIN CREATE ROLE authenticated NOLOGIN; EXCEPTION WHEN duplicate_object THEN NULL; END $$;
+DO $$ BEGIN CREATE ROLE service_role NOLOGIN; EXCEPTION WHEN duplicate_object THEN NULL; END $$;
+CREATE SCHEMA IF NOT EXISTS auth;
+CREATE TABLE IF NOT EXISTS auth.users (id uuid PRIMARY KEY);
+CREATE OR REPLACE FUNCTION auth.uid() RETURNS uuid LANGUAGE sql STABLE AS $$ SELECT NULL::uuid $$;
+"""
+
+CATALOG_QUERY = """
+SELECT line FROM (
+  SELECT 'column ' || table_schema || '.' || table_name || '.' || column_name || ' ' || data_type
+         || ' nullable=' || is_nullable || ' default=' || coalesce(column_default, '') AS line
+    FROM information_schema.columns WHERE table_schema NOT IN ('pg_catalog', 'information_schema')
+  UNION ALL
+  SELECT 'constraint ' || conrelid::regclass || ' ' || conname || ' ' || pg_get_constraintdef(oid)
+    FROM pg_constraint WHERE connamespace::regnamespace::text NOT IN ('pg_catalog', 'information_schema')
+  UNION ALL
+  SELECT 'index ' || indexdef FROM pg_indexes WHERE schemaname NOT IN ('pg_catalog', 'information_schema')
+  UNION ALL
+  SELECT 'policy ' || schemaname || '.' || tablename || ' ' || policyname || ' ' || permissive || ' '
+         || cmd || ' ' || array_to_string(roles, ',') || ' using=' || coalesce(qual, '')
+         || ' check=' || coalesce(with_check, '')
+    FROM pg_policies
+  UNION ALL
+  SELECT 'function ' || p.oid::regprocedure || ' ' || md5(pg_get_functiondef(p.oid))
+    FROM pg_proc p JOIN pg_namespace n ON n.oid = p.pronamespace
+   WHERE n.nspname NOT IN ('pg_catalog', 'information_schema') AND p.prokind IN ('f', 'p')
+  UNION ALL
+  SELECT 'trigger ' || pg_get_triggerdef(oid) FROM pg_trigger WHERE NOT tgisinternal
+  UNION ALL
+  SELECT 'enum ' || t.typnamespace::regnamespace || '.' || t.typname || ' '
+         || string_agg(e.enumlabel, ',' ORDER BY e.enumsortorder)
+    FROM pg_enum e JOIN pg_type t ON t.oid = e.enumtypid GROUP BY t.typnamespace, t.typname
+  UNION ALL
+  SELECT 'rls ' || oid::regclass || ' ' || relrowsecurity FROM pg_class
+   WHERE relkind = 'r' AND relnamespace::regnamespace::text NOT IN ('pg_catalog', 'information_schema', 'pg_toast')
+) catalog ORDER BY line;
+"""
+
+
+def _psql(dsn: str, *args: str, sql: str | None = None) -> str:
+    cmd = ['psql', '-X', '-q', '-v', 'ON_ERROR_STOP=1', '-d', dsn, *args]
+    proc = subprocess.run(cmd, input=sql, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise SquashError(f'psql {" ".join(args)} failed:\n{proc.stderr.strip()}')
+    return proc.stdout
+
+
+def _with_db(dsn: str, dbname: str) -> str:
+    if '://' in dsn:
+        head, _, query = dsn.partition('?')
+        base = head.rsplit('/', 1)[0] if head.count('/') > 2 else head
+        return f'{base}/{dbname}' + (f'?{query}' if query else '')
+    return re.sub(r'\bdbname=\S+', '', dsn).strip() + f' dbname={dbname}'
+
+
+def _pg_bin(name: str) -> str:
+    found = shutil.which(name)
+    if found:
+        return found
+    try:
+        bindir = subprocess.run(['pg_config', '--bindir'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        bindir = ''
+    candidates = [Path(bindir) / name] if bindir else []
+    candidates += sorted(Path('/usr/lib/postgresql').glob(f'*/bin/{name}'), reverse=True)
+    for path in candidates:
+        if path.exists():
+            return str(path)
+    raise SquashError(f'{name} not found; install PostgreSQL or pass --dsn')
+
+
+class ThrowawayCluster:
+    """A private PostgreSQL cluster in a temporary directory, Unix socket only."""
+
+    def __enter__(self) -> str:
+        if hasattr(os, 'geteuid') and os.geteuid() == 0:
+            raise SquashError('PostgreSQL refuses to run as root; pass --dsn to use a server')
+        self.dir = Path(tempfile.mkdtemp(prefix='squash-pg-'))
+        data = self.dir / 'data'
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+        self.pg_ctl = _pg_bin('pg_ctl')
+        self.data = data
+        for cmd in ([_pg_bin('initdb'), '-D', str(data), '-U', 'postgres', '--auth=trust', '-E', 'UTF8'],
+                    [self.pg_ctl, '-D', str(data), '-w', '-l', str(self.dir / 'log'), '-o',
+                     f"-k {self.dir} -p {port} -c listen_addresses='' -c fsync=off", 'start']):
+            proc = subprocess.run(cmd, capture_output=True, text=True)
+            if proc.returncode != 0:
+                shutil.rmtree(self.dir, ignore_errors=True)
+                raise SquashError(f'{Path(cmd[0]).name} failed:\n{proc.stderr.strip()}')
+        return f'host={self.dir} port={port} user=postgres dbname=postgres'
+
+    def __exit__(self, *exc):
+        subprocess.run([self.pg_ctl, '-D', str(self.data), '-m', 'immediate', 'stop'],
+                       capture_output=True)
+        shutil.rmtree(self.dir, ignore_errors=True)
+        return False
+
+
+def verify(dsn: str, base: Path | None, migrations: list[Path], baseline: str) -> list[str]:
+    """Catalog differences between replaying ``migrations`` and applying
+    ``baseline``; empty when they produce the same schema."""
+    suffix = f'{os.getpid()}'
+    snapshots = []
+    with tempfile.NamedTemporaryFile('w', suffix='.sql', delete=False, encoding='utf-8') as f:
+        f.write(baseline)
+        baseline_path = f.name
+    try:
+        for label, scripts in (('migrations', migrations), ('baseline', [Path(baseline_path)])):
+            db = f'squash_verify_{label}_{suffix}'
+            _psql(dsn, '-c', f'DROP DATABASE IF EXISTS {db}')
+            _psql(dsn, '-c', f'CREATE DATABASE {db}')
+            try:
+                target = _with_db(dsn, db)
+                _psql(target, sql=SUPABASE_STUBS)
+                if base is not None:
+                    _psql(target, '-f', str(base))
+                for script in scripts:
+                    try:
+                        _psql(target, '-f', str(script))
+                    except SquashError as e:
+                        raise SquashError(f'{label}: {script.name}: {e}') from e
+                snapshots.append(_psql(target, '-A', '-t', sql=CATALOG_QUERY).splitlines())
+            finally:
+                _psql(dsn, '-c', f'DROP DATABASE IF EXISTS {db}')
+    finally:
+        os.unlink(baseline_path)
+    return list(difflib.unified_diff(snapshots[0], snapshots[1], 'migrations', 'baseline',
+                                     lineterm=''))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='squash_migrations.py',
+        description='Squash supabase/migrations into one baseline script.')
+    parser.add_argument('--migrations', type=Path, default=MIGRATIONS_DIR,
+                        help='directory of migration files (default: supabase/migrations)')
+    parser.add_argument('-o', '--output', type=Path, help='write the baseline here instead of stdout')
+    parser.add_argument('--plan', action='store_true',
+                        help='list every object with more than one statement and what survives')
+    parser.add_argument('--verify', action='store_true',
+                        help='compare replaying the migrations with applying the baseline')
+    parser.add_argument('--base', type=Path,
+                        help='with --verify, schema the migrations start from')
+    parser.add_argument('--dsn',
+                        help='with --verify, server to create the scratch databases on '
+                             '(default: a throwaway cluster)')
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        statements = load(args.migrations)
+        baseline, plan, acyclic = squash(statements)
+    except (OSError, SquashError) as e:
+        print(f'squash_migrations.py: {e}', file=sys.stderr)
+        return 2
+    if not acyclic:
+        print('squash_migrations.py: dependency cycle, kept the original statement order',
+              file=sys.stderr)
+
+    if args.plan:
+        print('\n'.join(format_plan(plan)))
+    elif args.output:
+        try:
+            tmp = stage_bytes(args.output, baseline.encode('utf-8'))
+            try:
+                os.replace(tmp, args.output)
+            except OSError:
+                discard(tmp)
+                raise
+        except OSError as e:
+            print(f'squash_migrations.py: cannot write {args.output}: {e}', file=sys.stderr)
+            return 2
+    elif not args.verify:
+        sys.stdout.write(baseline)
+
+    if args.verify:
+        migrations = sorted(args.migrations.glob('*.sql'))
+        try:
+            if args.dsn:
+                diff = verify(args.dsn, args.base, migrations, baseline)
+            else:
+                with ThrowawayCluster() as dsn:
+                    diff = verify(dsn, args.base, migrations, baseline)
+        except SquashError as e:
+            print(f'squash_migrations.py: verify: {e}', file=sys.stderr)
+            return 2
+        if diff:
+            print('\n'.join(diff), file=sys.stderr)
+            print('squash_migrations.py: the baseline differs from the migrations', file=sys.stderr)
+            return 1
+        print('squash_migrations.py: baseline verified, catalogs match', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,4 @@
+-- Storage path of the waveform peak file written by peaks.py for this asset.
+-- Filled by `python peaks.py <dir> --sql` once the .peaks files are uploaded;
+-- the player only fetches peaks for assets where this is set.
+ALTER TABLE public.assets ADD COLUMN IF NOT EXISTS peaks_path TEXT;
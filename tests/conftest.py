@@ -0,0 +1,47 @@
+"""Shared fixtures for the patchkit and tooling tests."""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from patchkit.manifest import load_manifest  # noqa: E402
+
+
+class Tree:
+    """A scratch source tree with a manifest under ``patches/``."""
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def write(self, name: str, data: str | bytes) -> Path:
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        path.write_bytes(data)
+        return path
+
+    def read(self, name: str) -> bytes:
+        return (self.root / name).read_bytes()
+
+    def manifest(self, entries: list[dict], name: str = 'manifest.json') -> Path:
+        path = self.root / 'patches' / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({'root': '..', 'entries': entries}), encoding='utf-8')
+        return path
+
+    def load(self, entries: list[dict]):
+        return load_manifest(self.manifest(entries))
+
+
+@pytest.fixture
+def tree(tmp_path: Path) -> Tree:
+    return Tree(tmp_path)
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import io
+import json
+import math
+import os
+import struct
+import wave
+
+import pytest
+
+import audiometa as am
+
+MP3_HEADER = b'\xff\xfb\x90\x00'  # MPEG-1 layer III, 128 kbit/s, 44.1 kHz, stereo
+
+
+def _parse(parser, data: bytes) -> dict:
+    return parser(io.BytesIO(data), len(data))
+
+
+def _chunk(cid: bytes, body: bytes, fmt: str = '<') -> bytes:
+    return cid + struct.pack(f'{fmt}I', len(body)) + body + b'\0' * (len(body) & 1)
+
+
+def _wav_bytes(frames: int, rate: int = 8000, channels: int = 2, width: int = 2) -> bytes:
+    out = io.BytesIO()
+    with wave.open(out, 'wb') as w:
+        w.setnchannels(channels)
+        w.setsampwidth(width)
+        w.setframerate(rate)
+        w.writeframes(b'\0' * frames * channels * width)
+    return out.getvalue()
+
+
+def _extended(value: int) -> bytes:
+    exponent = int(math.log2(value))
+    return struct.pack('>HQ', 16383 + exponent, value << (63 - exponent))
+
+
+def _ogg_page(granule: int, body: bytes = b'') -> bytes:
+    return (b'OggS' + struct.pack('<BBqIIIB', 0, 0, granule, 1, 0, 0, 1)
+            + bytes([len(body)]) + body)
+
+
+def _box(kind: bytes, body: bytes) -> bytes:
+    return struct.pack('>I', 8 + len(body)) + kind + body
+
+
+def _id3(size: int) -> bytes:
+    syncsafe = bytes((size >> shift) & 0x7F for shift in (21, 14, 7, 0))
+    return b'ID3\x04\x00\x00' + syncsafe + b'\0' * size
+
+
+def test_wav_duration_from_the_data_chunk():
+    info = _parse(am._wav, _wav_bytes(12_000))
+    assert info == {'codec': 'wav', 'duration': 1.5, 'sample_rate': 8000, 'channels': 2,
+                    'exact': True}
+
+
+def test_rf64_takes_the_data_size_from_ds64():
+    fmt = struct.pack('<HHIIHH', 1, 1, 8000, 16000, 2, 16)
+    ds64 = struct.pack('<QQQI', 0, 4000, 2000, 0)
+    data = (b'RF64' + struct.pack('<I', 0xFFFFFFFF) + b'WAVE' + _chunk(b'ds64', ds64)
+            + _chunk(b'fmt ', fmt) + b'data' + struct.pack('<I', 0xFFFFFFFF) + b'\0' * 4000)
+    assert _parse(am._wav, data)['duration'] == 0.25
+
+
+def test_aiff_reads_the_extended_sample_rate():
+    comm = struct.pack('>HIH', 2, 88_200, 16) + _extended(44100)
+    data = b'FORM\0\0\0\0AIFF' + _chunk(b'COMM', comm, '>')
+    assert am.sniff(data[:12], '.aif') is am._aiff
+    info = _parse(am._aiff, data)
+    assert (info['duration'], info['sample_rate'], info['channels']) == (2.0, 44100, 2)
+
+
+def test_flac_streaminfo_behind_an_id3_tag():
+    packed = 48000 << 44 | (2 - 1) << 41 | (24 - 1) << 36 | 144_000
+    streaminfo = b'\0' * 10 + packed.to_bytes(8, 'big') + b'\0' * 16
+    data = _id3(20) + b'fLaC' + b'\x80\x00\x00\x22' + streaminfo
+    assert am.sniff(data[:12], '.flac') is am._flac
+    assert _parse(am._flac, data) == {'codec': 'flac', 'duration': 3.0, 'sample_rate': 48000,
+                                      'channels': 2, 'exact': True}
+
+
+def test_mp3_xing_frames_minus_lame_delay_and_padding():
+    xing = b'Xing' + struct.pack('>III', 1 | 2, 1000, 123_456)
+    lame = b'LAME3.100' + b'\0' * 12 + ((576 << 12) | 1000).to_bytes(3, 'big')
+    data = _id3(30) + MP3_HEADER + b'\0' * 32 + xing + lame + b'\0' * 400
+    info = _parse(am._mp3, data)
+    assert info['duration'] == round((1000 * 1152 - 576 - 1000) / 44100, 3)
+    assert info['exact'] and info['channels'] == 2
+
+
+def test_mp3_vbri_frame_count():
+    vbri = b'VBRI' + struct.pack('>HHHII', 1, 0, 75, 99_999, 441)
+    data = MP3_HEADER + b'\0' * 32 + vbri + b'\0' * 400
+    assert _parse(am._mp3, data)['duration'] == round(441 * 1152 / 44100, 3)
+
+
+def test_cbr_mp3_falls_back_to_size_over_bitrate_without_the_id3v1_tag():
+    data = b'junk' + MP3_HEADER + b'\0' * (160_000 - 4) + b'TAG' + b'\0' * 125
+    info = _parse(am._mp3, data)
+    assert info['duration'] == 10.0 and not info['exact']
+
+
+def test_ogg_vorbis_and_opus_pre_skip():
+    vorbis = b'\x01vorbis' + struct.pack('<IBI', 0, 2, 44100)
+    data = _ogg_page(0, vorbis) + b'\0' * 100 + _ogg_page(88_200) + _ogg_page(-1)
+    assert _parse(am._ogg, data)['duration'] == 2.0
+    opus = b'OpusHead' + struct.pack('<BBHI', 1, 2, 312, 48000)
+    info = _parse(am._ogg, _ogg_page(0, opus) + _ogg_page(48_000 + 312))
+    assert (info['codec'], info['duration'], info['sample_rate']) == ('opus', 1.0, 48000)
+
+
+@pytest.mark.parametrize('version', [0, 1])
+def test_mp4_mvhd_versions(version):
+    if version:
+        mvhd = struct.pack('>I16xIQ', 1 << 24, 1000, 4500)
+    else:
+        mvhd = struct.pack('>I8xII', 0, 600, 2700)
+    data = _box(b'ftyp', b'M4A \0\0\0\0') + _box(b'free', b'') + _box(
+        b'moov', _box(b'trak', b'') + _box(b'mvhd', mvhd + b'\0' * 80))
+    assert am.sniff(data[:12], '.m4a') is am._mp4
+    assert _parse(am._mp4, data)['duration'] == 4.5
+
+
+def test_broken_headers_raise_header_error():
+    with pytest.raises(am.HeaderError):
+        _parse(am._mp4, _box(b'ftyp', b'M4A '))
+    with pytest.raises(am.HeaderError):
+        _parse(am._flac, b'fLaC\x01\x00\x00\x00')
+    assert am.sniff(b'not audio at', '.mp3') is None
+
+
+def _run(capsys, *args) -> tuple[int, dict[str, dict]]:
+    code = am.main([*map(str, args), '--duration-only', '-j', '1'])
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    return code, {os.path.basename(r['path']): r for r in lines}
+
+
+def test_results_are_cached_by_content_hash(tmp_path, capsys):
+    (tmp_path / 'a.wav').write_bytes(_wav_bytes(8000))
+    code, first = _run(capsys, tmp_path)
+    assert code == 0 and first['a.wav']['meta']['duration'] == 1.0
+    assert 'cached' not in first['a.wav']
+    assert (tmp_path / '.patchkit' / 'audiometa.json').exists()
+
+    (tmp_path / 'a.wav').rename(tmp_path / 'b.wav')
+    _, second = _run(capsys, tmp_path)
+    assert second['b.wav']['cached'] and second['b.wav']['hash'] == first['a.wav']['hash']
+
+    (tmp_path / 'b.wav').write_bytes(_wav_bytes(16_000))
+    _, third = _run(capsys, tmp_path)
+    assert 'cached' not in third['b.wav'] and third['b.wav']['meta']['duration'] == 2.0
+
+
+def test_header_only_results_do_not_satisfy_an_analysis(tmp_path):
+    cache = am.MetaCache(tmp_path)
+    path = tmp_path / 'a.wav'
+    path.write_bytes(_wav_bytes(8000))
+    cache.record(path, os.stat(path), 'h1', {'duration': 0.5})
+    assert cache.lookup(path, os.stat(path), analysed=False) == ('h1', {'duration': 0.5})
+    assert cache.lookup(path, os.stat(path), analysed=True) == ('h1', None)
+    cache.record(path, os.stat(path), 'h2', {'duration': 0.5, 'bpm': None, 'analysis_error': 'x'})
+    assert cache.by_hash('h2', analysed=True) is None
+
+
+def test_sql_updates_are_keyed_by_storage_path(tmp_path, capsys):
+    (tmp_path / 'u').mkdir()
+    (tmp_path / 'u' / 'a.wav').write_bytes(_wav_bytes(8000 * 61))
+    assert am.main([str(tmp_path), '--duration-only', '--sql', '--no-cache', '-j', '1']) == 0
+    assert capsys.readouterr().out == (
+        "update public.assets set duration_seconds = 61 where storage_path = 'u/a.wav';\n")
+    assert not (tmp_path / '.patchkit').exists()
+
+
+def test_both_tools_scan_the_same_uploads(tmp_path):
+    import peaks
+
+    for name in ('a.wav', 'b.MP4', 'c.aiff', 'notes.txt', '.patchkit/cached.wav'):
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_bytes(b'')
+    assert am.find_audio is peaks.find_audio
+    assert [p.name for p in am.find_audio([tmp_path])] == ['a.wav', 'b.MP4', 'c.aiff']
+
+
+def test_tempo_of_a_click_track(tmp_path):
+    np = pytest.importorskip('numpy')
+    rate = 22050
+    signal = np.zeros(rate * 20, np.float32)
+    click = np.sin(2 * np.pi * 440 * np.arange(400) / rate) * np.hanning(400)
+    for start in range(0, len(signal) - 400, rate // 2):  # 120 BPM
+        signal[start:start + 400] += click
+    path = tmp_path / 'click.wav'
+    with wave.open(str(path), 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes((signal * 20000).astype('<i2').tobytes())
+    result = am.analyse(path)
+    assert abs(result['bpm'] - 120) < 2
+    assert result['key'] in ('A', 'Am')
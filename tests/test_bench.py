@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+
+from patchkit import bench
+from patchkit.manifest import load_manifest
+from patchkit.markers import AUTOMATON_MIN_MARKERS
+from patchkit.report import APPLIED
+from patchkit.runner import apply_manifest
+
+
+def _snapshot(root):
+    return {p.name: p.read_bytes() for p in (root / 'components').iterdir()}
+
+
+def test_corpus_is_reproducible_and_scannable(tmp_path):
+    layout = bench.generate(tmp_path / 'a', files=12, min_size=2048, max_size=16384,
+                            regions=3, seed=5)
+    bench.generate(tmp_path / 'b', files=12, min_size=2048, max_size=16384, regions=3, seed=5)
+    assert _snapshot(tmp_path / 'a') == _snapshot(tmp_path / 'b')
+    assert bench.scan(tmp_path / 'a') == layout
+    assert all(1 <= count <= 3 for count in layout)
+    sizes = [len(data) for data in _snapshot(tmp_path / 'a').values()]
+    assert min(sizes) >= 1024 and max(sizes) <= 16384 + 1024
+
+
+def test_variants_rewrite_every_region_in_turn(tmp_path):
+    layout = bench.generate(tmp_path, files=5, min_size=1024, max_size=4096, regions=4)
+    manifests = [bench.write_manifest(tmp_path, layout, v) for v in (0, 1)]
+    sizes = []
+    for path in manifests + manifests:
+        report = apply_manifest(load_manifest(path))
+        assert report.counts() == {APPLIED: 5}
+        sizes.append(sorted(len(data) for data in _snapshot(tmp_path).values()))
+    assert sizes[1] == sizes[2] == sizes[3]
+
+
+def test_stage_pass_leaves_the_corpus_alone(tmp_path):
+    layout = bench.generate(tmp_path, files=4, min_size=1024, max_size=8192, regions=2)
+    manifest = load_manifest(bench.write_manifest(tmp_path, layout, 0))
+    before = _snapshot(tmp_path)
+    stages = bench.bench_stages(manifest, bench.STAGE_ENGINES, repeat=1)
+    assert _snapshot(tmp_path) == before
+    assert set(stages) == set(bench.STAGE_ENGINES)
+    assert {'read', 'search', 'splice'} <= set(stages['text']['stages'])
+    assert not list(tmp_path.rglob('.*.tmp'))
+
+
+def test_marker_search_is_timed_both_ways_around_the_switch(tmp_path):
+    bench.generate(tmp_path, files=6, min_size=2048, max_size=8192, regions=4)
+    cases = bench.bench_markers(tmp_path, [3, AUTOMATON_MIN_MARKERS], repeat=1)
+    assert [case['markers'] for case in cases] == [3, AUTOMATON_MIN_MARKERS]
+    assert [case['searched_with'] for case in cases] == ['find', 'automaton']
+    assert all(case['find_seconds'] > 0 and case['automaton_seconds'] > 0 for case in cases)
+    flat = bench._metrics({'markers': cases})
+    assert set(flat) == {'markers 3 find', 'markers 3 automaton',
+                         f'markers {AUTOMATON_MIN_MARKERS} find',
+                         f'markers {AUTOMATON_MIN_MARKERS} automaton'}
+
+
+def test_compare_reports_the_change_per_metric(tmp_path, capsys):
+    corpus = tmp_path / 'corpus'
+    base = tmp_path / 'base.json'
+    args = ['--files', '3', '--max-size', '4096', '--repeat', '1', '-j', '1',
+            '--engines', 'text', '--corpus', str(corpus)]
+    assert bench.main(args + ['-o', str(base)]) == 0
+    assert bench.main(args + ['--compare', str(base)]) == 0
+    out = capsys.readouterr()
+    head = json.loads(out.out)
+    assert head['corpus']['reused'] and not json.loads(base.read_text())['corpus']['reused']
+    assert 'stage text/total' in out.err
+    assert 'run text -j1 cold' in out.err
+    assert 'markers 2 automaton' in out.err and 'markers: automaton faster from' in out.err
+    assert bench.compare({'runs': [{'engine': 'text', 'jobs': 1, 'phase': 'cold',
+                                    'seconds': 2.0}]},
+                         {'runs': [{'engine': 'text', 'jobs': 1, 'phase': 'cold',
+                                    'seconds': 1.0}]})[1].endswith('-50.0%')
+
+
+def test_bad_arguments_are_rejected(capsys):
+    assert bench.main(['--engines', 'text,warp']) == 2
+    assert bench.main(['-j', '0']) == 2
+    assert bench.main(['--marker-counts', '0,2']) == 2
+    err = capsys.readouterr().err
+    assert 'unknown engine(s): warp' in err and 'job counts must be at least 1' in err
+    assert 'marker counts must be at least 1' in err
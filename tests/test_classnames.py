@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import pytest
+
+from patchkit import runner
+from patchkit.classnames import ATTR, CHUNK, LITERAL, extract, main, read_module
+from patchkit.journal import rollback
+from patchkit.report import ERROR, FileResult
+
+BUNDLE = 'flex items-center gap-2 px-4'
+NAME = 'TW_FLEX_ITEMS_CENTER_GAP_2'
+
+
+def _component(name: str, newline: str = '\n') -> str:
+    lines = [
+        "import React from 'react';",
+        '',
+        f'export const {name} = () => (',
+        f'    <div className="{BUNDLE}">',
+        f"        <span className={{active ? '{BUNDLE}' : 'hidden'}}>{name}</span>",
+        '    </div>',
+        ');',
+        '',
+    ]
+    return newline.join(lines)
+
+
+@pytest.fixture
+def components(tree):
+    tree.write('components/A.tsx', _component('A', '\r\n'))
+    tree.write('components/B.tsx', _component('B'))
+    tree.write('components/C.tsx', _component('C'))
+    return tree
+
+
+def _rewrite(tree, *args: str) -> int:
+    return main(['--root', str(tree.root), '--rewrite', '--no-cache', '-j', '1', *args])
+
+
+def test_extract_contexts():
+    text = ('const X = () => (\n  <>\n'
+            '    <a className="p-2 m-1" b={x} />\n'
+            "    <b className={on ? 'a b' : `c ${d} e`} />\n"
+            "    <c className={x === 'skip' ? cn('skip') : 'keep'} />\n"
+            '  </>\n);\n')
+    found = [(c.context, c.text, c.line) for c in extract(text)]
+    assert found == [(ATTR, 'p-2 m-1', 3), (LITERAL, 'a b', 4), (CHUNK, 'c', 4),
+                     (CHUNK, 'e', 4), (LITERAL, 'keep', 5)]
+
+
+def test_rewrite_keeps_each_files_line_endings(components):
+    assert _rewrite(components) == 0
+    crlf = components.read('components/A.tsx')
+    assert b'\r\n' in crlf and b'\n' not in crlf.replace(b'\r\n', b'')
+    assert f"import {{ {NAME} }} from './classNames';\r\n".encode() in crlf
+    lf = components.read('components/B.tsx')
+    assert b'\r' not in lf
+    assert f'className={{{NAME}}}'.encode() in lf
+    assert read_module(components.root / 'components' / 'classNames.ts') == {BUNDLE: NAME}
+    assert _rewrite(components) == 0  # nothing left to do
+    assert components.read('components/A.tsx') == crlf
+
+
+def test_module_keeps_its_line_endings(components):
+    module = components.write('components/classNames.ts',
+                              "// shared\r\nexport const TW_OLD = 'a b c';\r\n")
+    assert _rewrite(components) == 0
+    data = module.read_bytes()
+    assert b'\n' not in data.replace(b'\r\n', b'')
+    assert read_module(module) == {'a b c': 'TW_OLD', BUNDLE: NAME}
+
+
+def _failing(name: str, monkeypatch) -> None:
+    apply_file = runner.apply_file
+
+    def failing(path, entries, *args, **kwargs):
+        if path.name == name:
+            return FileResult(path, ERROR, entries, 'injected failure')
+        return apply_file(path, entries, *args, **kwargs)
+
+    monkeypatch.setattr(runner, 'apply_file', failing)
+
+
+def test_aborted_transaction_writes_no_module(components, monkeypatch, capsys):
+    before = {n: components.read(f'components/{n}.tsx') for n in 'ABC'}
+    _failing('B.tsx', monkeypatch)
+    assert _rewrite(components, '-t') == 1
+    assert 'classNames.ts not written' in capsys.readouterr().out
+    assert not (components.root / 'components' / 'classNames.ts').exists()
+    assert {n: components.read(f'components/{n}.tsx') for n in 'ABC'} == before
+    assert not list((components.root / 'components').glob('.*.tmp'))
+
+
+def test_transaction_commits_and_rolls_back_the_module(components):
+    before = components.read('components/A.tsx')
+    assert _rewrite(components, '-t') == 0
+    module = components.root / 'components' / 'classNames.ts'
+    assert module.exists()
+    outcomes = dict(rollback(components.root / '.patchkit'))
+    assert outcomes[str(module)] == 'removed'
+    assert not module.exists()
+    assert components.read('components/A.tsx') == before
+
+
+def test_partial_failure_without_transaction_keeps_only_used_constants(components,
+                                                                         monkeypatch):
+    components.write('components/D.tsx', _component('D').replace(BUNDLE, 'grid grid-cols-2 gap-4'))
+    components.write('components/E.tsx', _component('E').replace(BUNDLE, 'grid grid-cols-2 gap-4'))
+    _failing('D.tsx', monkeypatch)
+    _failing('E.tsx', monkeypatch)
+    assert _rewrite(components, '--min-count', '2') == 1
+    module = read_module(components.root / 'components' / 'classNames.ts')
+    assert module == {BUNDLE: NAME}
+
+
+@pytest.mark.parametrize('extra', [(), ('-t',)], ids=['plain', 'transaction'])
+def test_dry_run_only_says_what_it_would_write(components, capsys, extra):
+    before = {n: components.read(f'components/{n}.tsx') for n in 'ABC'}
+    assert _rewrite(components, '-n', *extra) == 0
+    out = capsys.readouterr().out
+    assert 'would write 1 bundle(s) -> components/classNames.ts' in out
+    assert not (components.root / 'components' / 'classNames.ts').exists()
+    assert {n: components.read(f'components/{n}.tsx') for n in 'ABC'} == before
+
+
+def test_module_line_names_what_was_written(components, capsys):
+    assert _rewrite(components) == 0
+    out = capsys.readouterr().out
+    assert '1 bundle(s) -> components/classNames.ts' in out and 'would write' not in out
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+
+import pytest
+
+from patchkit import bench
+from patchkit.engine import apply_file
+from patchkit.errors import MarkerError
+from patchkit.inplace import minimal_edits
+from patchkit.instrument import Instrumentation
+from patchkit.manifest import Entry
+from patchkit.report import ALREADY_APPLIED, APPLIED
+from patchkit.stream import write_spliced
+
+# CRLF, a BOM and multi-byte characters around and inside the regions.
+ORIGINAL = ('﻿const título = "ñ";\r\n'
+            '// @a start\r\n    return <p>café</p>;\r\n// @a end\r\n'
+            + 'filler line ✓\r\n' * 2000
+            + '// @b start\r\n    return null;\r\n// @b end\r\n'
+            'export default título;\r\n').encode('utf-8')
+
+SAME_LENGTH = {'a': '// @a start\r\n    return <p>cafÉ</p>;\r\n',
+               'b': '// @b start\r\n    return NULL;\r\n'}
+OTHER_LENGTH = {'a': '// @a start\r\n    return <section>crème brûlée</section>;\r\n',
+                'b': '// @b start\r\n'}
+
+
+def _entries(path, replacements: dict[str, str]) -> list[Entry]:
+    return [Entry(path, f'// @{k} start', f'// @{k} end', text)
+            for k, text in replacements.items()]
+
+
+def _apply(tmp_path, name: str, engine: str, write_mode: str, replacements, **kwargs):
+    path = tmp_path / name
+    path.write_bytes(ORIGINAL)
+    result = apply_file(path, _entries(path, replacements), engine=engine,
+                        write_mode=write_mode, **kwargs)
+    return path, result
+
+
+@pytest.mark.parametrize('engine', ['text', 'mmap'])
+@pytest.mark.parametrize('replacements', [SAME_LENGTH, OTHER_LENGTH], ids=['same', 'other'])
+def test_minimal_output_is_byte_identical_to_replace(tmp_path, engine, replacements):
+    replaced, expected = _apply(tmp_path, 'replace.tsx', engine, 'replace', replacements)
+    minimal, result = _apply(tmp_path, 'minimal.tsx', engine, 'minimal', replacements)
+    assert expected.status == result.status == APPLIED
+    assert minimal.read_bytes() == replaced.read_bytes()
+    assert result.new_hash == expected.new_hash
+
+
+def test_same_length_edits_are_written_in_place(tmp_path):
+    path = tmp_path / 'f.tsx'
+    path.write_bytes(ORIGINAL)
+    inode = os.stat(path).st_ino
+    result = apply_file(path, _entries(path, SAME_LENGTH), write_mode='minimal',
+                        instrument=Instrumentation())
+    assert os.stat(path).st_ino == inode
+    assert result.metrics['stages']['write']['bytes'] <= 8
+    assert 'rename' not in result.metrics['stages']
+
+
+def test_other_length_edits_are_staged_and_renamed(tmp_path):
+    path, _ = _apply(tmp_path, 'f.tsx', 'auto', 'minimal', OTHER_LENGTH)
+    again = apply_file(path, _entries(path, OTHER_LENGTH), write_mode='minimal')
+    assert again.status == ALREADY_APPLIED
+    assert not list(tmp_path.glob('.*.tmp'))
+
+
+def test_minimal_stage_only_leaves_a_staged_copy(tmp_path):
+    path, result = _apply(tmp_path, 'f.tsx', 'text', 'minimal', SAME_LENGTH, stage_only=True)
+    assert result.edits is None and result.staged is not None
+    assert path.read_bytes() == ORIGINAL
+    os.replace(result.staged, path)
+    reference, _ = _apply(tmp_path, 'ref.tsx', 'text', 'replace', SAME_LENGTH)
+    assert path.read_bytes() == reference.read_bytes()
+
+
+class _Sink:
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+
+
+def test_minimal_edits_splice_to_the_same_bytes():
+    rng = random.Random(7)
+    for _ in range(300):
+        old = bytes(rng.choice(b'ab\n') for _ in range(rng.randint(0, 9000)))
+        cuts = sorted(rng.randint(0, len(old)) for _ in range(2 * rng.randint(0, 4)))
+        regions = []
+        for start, end in zip(cuts[::2], cuts[1::2]):
+            data = old[start:end] if rng.random() < 0.5 else bytes(
+                rng.choice(b'ab\n') for _ in range(rng.randint(0, end - start + 3)))
+            if rng.random() < 0.5 and data:
+                data = data[:-1] + b'z'
+            regions.append((start, end, data))
+        expected, got = _Sink(), _Sink()
+        write_spliced(old, regions, expected)
+        edits = minimal_edits(old, regions)
+        write_spliced(old, edits, got)
+        assert b''.join(got.parts) == b''.join(expected.parts)
+        assert sum(len(d) for _, _, d in edits) <= sum(len(d) for _, _, d in regions)
+
+
+def test_minimal_edits_reject_overlaps():
+    with pytest.raises(MarkerError):
+        minimal_edits(b'abcdef', [(0, 4, b'x'), (2, 5, b'y')])
+
+
+def test_bench_measures_the_minimal_write_mode(tmp_path, capsys):
+    out = tmp_path / 'report.json'
+    assert bench.main(['--files', '4', '--max-size', '4096', '--repeat', '1', '-j', '1',
+                       '--corpus', str(tmp_path / 'corpus'), '-o', str(out)]) == 0
+    report = json.loads(out.read_text())
+    assert set(report['stages']) == {'text', 'mmap', 'minimal'}
+    minimal = report['stages']['minimal']
+    assert 'diff' in minimal['stages']
+    assert minimal['written_bytes'] < report['stages']['text']['written_bytes']
+    runs = {(r['engine'], r['phase']): r for r in report['runs']}
+    assert runs['minimal', 'cold']['counts'] == {'applied': 4}
+    assert runs['minimal', 'cold']['written_bytes'] < runs['text', 'cold']['written_bytes']
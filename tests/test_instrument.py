@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import json
+
+from patchkit.cli import main
+from patchkit.inplace import write_in_place
+from patchkit.instrument import Instrumentation, Probe, format_summary, totals, write_jsonl
+from patchkit.journal import Transaction
+from patchkit.report import APPLIED, FileResult, Report
+from patchkit.runner import apply_manifest
+
+
+def _metrics(**stages) -> dict:
+    return {'stages': {name: {'seconds': seconds, 'bytes': 10, 'calls': 1}
+                       for name, seconds in stages.items()},
+            'entries': {}}
+
+
+def _report() -> Report:
+    results = []
+    for n, elapsed in enumerate([0.002, 0.009, 0.005]):
+        result = FileResult(f'f{n}.tsx', APPLIED, elapsed=elapsed)
+        result.metrics = _metrics(read=0.001, splice=0.003, write=elapsed)
+        results.append(result)
+    results.append(FileResult('cached.tsx', APPLIED))  # settled without a probe
+    return Report(results, jobs=2, elapsed=0.02)
+
+
+def test_jsonl_has_a_line_per_instrumented_file_and_a_summary(tmp_path):
+    path = tmp_path / 'metrics.jsonl'
+    write_jsonl(_report(), path)
+    *files, summary = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [record['path'] for record in files] == ['f0.tsx', 'f1.tsx', 'f2.tsx']
+    assert files[1]['elapsed'] == 0.009 and files[1]['stages']['read']['bytes'] == 10
+    summary = summary['summary']
+    assert (summary['files'], summary['jobs'], summary['elapsed']) == (4, 2, 0.02)
+    assert list(summary['stages']) == ['read', 'splice', 'write']
+    assert summary['stages']['splice']['calls'] == 3
+    assert 'commit' not in summary
+
+
+def test_summary_splits_io_and_cpu_and_lists_the_slowest_files():
+    text = format_summary(_report(), top=2)
+    assert 'I/O 0.0190s (68%), CPU 0.0090s (32%) of 0.0280s measured' in text
+    slowest = text.split('slowest 2 file(s):\n')[1].splitlines()
+    assert [line.split()[2] for line in slowest] == ['f1.tsx', 'f2.tsx']
+    assert 'write 69%, splice 23%' in slowest[0]
+
+
+def test_commit_fsyncs_are_counted(tmp_path):
+    report = _report()
+    report.commit_metrics = _metrics(fsync=0.01, rename=0.001)
+    assert totals(report)['fsync']['seconds'] == 0.01
+    assert 'commit: fsync 0.0100s, rename 0.0010s' in format_summary(report)
+    path = tmp_path / 'metrics.jsonl'
+    write_jsonl(report, path)
+    summary = json.loads(path.read_text().splitlines()[-1])['summary']
+    assert summary['commit']['stages']['fsync']['calls'] == 1
+
+
+def test_a_transaction_probes_its_renames_and_fsyncs(tree):
+    tree.write('a.tsx', '// s\nold\n// e\n')
+    tree.write('b.tsx', '// s\nold\n// e\n')
+    manifest = tree.load([{'file': name, 'start': '// s', 'end': '// e', 'text': '// s\nnew\n'}
+                          for name in ('a.tsx', 'b.tsx')])
+    report = apply_manifest(manifest, jobs=1, transaction=Transaction(tree.root / '.patchkit'),
+                            instrument=Instrumentation())
+    stages = report.commit_metrics['stages']
+    assert stages['rename']['calls'] == 2
+    # The backup and target directories, the journal (prepared), the target
+    # directory again and the journal (committed).
+    assert stages['fsync']['calls'] == 4
+    assert json.loads(report.to_json())['commit_metrics'] == report.commit_metrics
+    assert apply_manifest(manifest, jobs=1).commit_metrics is None
+
+
+def test_in_place_writes_time_the_fsync(tmp_path):
+    path = tmp_path / 'f.txt'
+    path.write_bytes(b'abcdef')
+    probe = Probe()
+    assert write_in_place(path, [(1, 3, b'XY')], durable=True, probe=probe) == 2
+    assert path.read_bytes() == b'aXYdef'
+    assert probe.stages['write'][1:] == [2, 1] and probe.stages['fsync'][2] == 1
+
+
+def test_trace_memory_needs_stats_or_metrics(tree, capsys):
+    tree.write('a.tsx', '// s\nold\n// e\n')
+    manifest = tree.manifest([{'file': 'a.tsx', 'start': '// s', 'text': '// s\n'}])
+    assert main([str(manifest), '--trace-memory']) == 2
+    assert '--trace-memory needs --stats or --metrics' in capsys.readouterr().out
+    assert tree.read('a.tsx') == b'// s\nold\n// e\n'
+    metrics = tree.root / 'metrics.jsonl'
+    assert main([str(manifest), '--trace-memory', '--metrics', str(metrics), '-j', '1']) == 0
+    assert 'peak_memory' in json.loads(metrics.read_text().splitlines()[0])
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from patchkit import journal
+from patchkit.cli import main
+from patchkit.engine import apply_file
+from patchkit.journal import (COMMITTED, PREPARED, ROLLED_BACK, Transaction, TransactionError,
+                              load_journal, recover, rollback, state_lock)
+from patchkit.report import ABORTED, APPLIED
+from patchkit.runner import apply_manifest
+
+OLD_A = '// a start\nold a\n// a end\n'
+OLD_B = '// b start\nold b\n// b end\n'
+NEW_A = '// a start\nnew a\n// a end\n'
+NEW_B = '// b start\nnew b\n// b end\n'
+
+
+def _entries(variant: str = 'new') -> list[dict]:
+    return [
+        {'file': 'a.tsx', 'start': '// a start', 'end': '// a end',
+         'text': f'// a start\n{variant} a\n'},
+        {'file': 'b.tsx', 'start': '// b start', 'end': '// b end',
+         'text': f'// b start\n{variant} b\n'},
+    ]
+
+
+@pytest.fixture
+def files(tree):
+    tree.write('a.tsx', OLD_A)
+    tree.write('b.tsx', OLD_B)
+    return tree
+
+
+def _run(tree, entries=None, **kwargs):
+    state = tree.root / '.patchkit'
+    return apply_manifest(tree.load(entries or _entries()), jobs=1,
+                          transaction=Transaction(state), **kwargs)
+
+
+def test_commit_writes_every_file_and_journals_it(files):
+    report = _run(files)
+    assert report.counts() == {APPLIED: 2}
+    assert files.read('a.tsx').decode() == NEW_A
+    assert files.read('b.tsx').decode() == NEW_B
+    data = load_journal(files.root / '.patchkit')
+    assert data['state'] == COMMITTED
+    assert len(data['files']) == 2
+    assert not list(files.root.glob('.*.tmp'))
+
+
+def test_failed_file_aborts_the_whole_transaction(files):
+    entries = _entries() + [{'file': 'a.tsx', 'start': '// missing', 'text': 'x'}]
+    report = _run(files, entries)
+    assert not report.ok
+    assert ABORTED in report.counts()
+    assert files.read('a.tsx').decode() == OLD_A
+    assert files.read('b.tsx').decode() == OLD_B
+    assert not list(files.root.glob('.*.tmp'))
+
+
+def test_target_changed_after_staging_aborts(files):
+    manifest = files.load(_entries())
+    state = files.root / '.patchkit'
+    staged = [apply_file(entry.file, [entry], stage_only=True) for entry in manifest.entries]
+    assert all(result.staged is not None for result in staged)
+    files.write('b.tsx', OLD_B.replace('old', 'OLD'))
+    with pytest.raises(TransactionError):
+        Transaction(state).commit(staged)
+    assert files.read('a.tsx').decode() == OLD_A
+    assert all(result.staged is None for result in staged)
+    assert not list(files.root.glob('.*.tmp'))
+
+
+def test_rollback_restores_and_reports_conflicts(files):
+    _run(files)
+    files.write('b.tsx', 'edited by hand\n')
+    outcomes = dict(rollback(files.root / '.patchkit'))
+    assert files.read('a.tsx').decode() == OLD_A
+    assert files.read('b.tsx').decode() == 'edited by hand\n'
+    assert outcomes[str(files.root / 'a.tsx')] == 'restored'
+    assert outcomes[str(files.root / 'b.tsx')].startswith('conflict')
+    assert load_journal(files.root / '.patchkit')['state'] == ROLLED_BACK
+    with pytest.raises(TransactionError):
+        rollback(files.root / '.patchkit')
+
+
+def test_next_transaction_replaces_journal_and_backups(files):
+    state = files.root / '.patchkit'
+    _run(files)
+    first = load_journal(state)['id']
+    _run(files, _entries('newer'))
+    second = load_journal(state)['id']
+    assert first != second
+    assert [p.name for p in (state / 'backup').iterdir()] == [second]
+    rollback(state)
+    assert files.read('a.tsx').decode() == NEW_A
+
+
+def _interrupted(tree) -> None:
+    """Leave the tree as a commit killed between its renames and COMMITTED."""
+    _run(tree)
+    state = tree.root / '.patchkit'
+    data = load_journal(state)
+    data['state'] = PREPARED
+    journal._write_journal(state, data)
+
+
+def test_recover_rolls_back_an_orphaned_journal(files):
+    _interrupted(files)
+    outcomes = recover(files.root / '.patchkit')
+    assert [outcome for _, outcome in outcomes] == ['restored', 'restored']
+    assert files.read('a.tsx').decode() == OLD_A
+    assert recover(files.root / '.patchkit') == []
+
+
+def test_recover_leaves_a_journal_whose_owner_holds_the_lock(files):
+    _interrupted(files)
+    state = files.root / '.patchkit'
+    with state_lock(state):
+        assert recover(state) == []
+    assert files.read('a.tsx').decode() == NEW_A
+    assert load_journal(state)['state'] == PREPARED
+
+
+def test_dry_run_reports_but_never_recovers(files, capsys):
+    _interrupted(files)
+    manifest = files.manifest(_entries())
+    assert main([str(manifest), '-n']) == 0
+    assert 'rolled back on the next run: pending' in capsys.readouterr().out
+    assert files.read('a.tsx').decode() == NEW_A
+    assert load_journal(files.root / '.patchkit')['state'] == PREPARED
+
+
+def test_concurrent_dry_run_does_not_revert_a_commit_in_progress(files, monkeypatch):
+    prepared, proceed = threading.Event(), threading.Event()
+    write = journal._write_journal
+
+    def pausing(state_dir, data):
+        write(state_dir, data)
+        if data['state'] == PREPARED:
+            prepared.set()
+            proceed.wait(10)
+
+    monkeypatch.setattr(journal, '_write_journal', pausing)
+    committing = threading.Thread(target=_run, args=(files,))
+    committing.start()
+    codes = []
+    dry_run = threading.Thread(
+        target=lambda: codes.append(main([str(files.manifest(_entries())), '-n', '-q'])))
+    try:
+        assert prepared.wait(10)
+        dry_run.start()
+        # The dry run waits for the file locks; it must not roll the commit
+        # back once they are released.
+        dry_run.join(0.3)
+    finally:
+        proceed.set()
+        committing.join(10)
+        dry_run.join(10)
+    assert codes == [0]
+    assert files.read('a.tsx').decode() == NEW_A
+    assert files.read('b.tsx').decode() == NEW_B
+    assert load_journal(files.root / '.patchkit')['state'] == COMMITTED
+
+
+def test_concurrent_transactions_are_serialised(files, monkeypatch):
+    b_only = [e for e in _entries('newer') if e['file'] == 'b.tsx']
+    prepared, proceed = threading.Event(), threading.Event()
+    write = journal._write_journal
+
+    def pausing(state_dir, data):
+        write(state_dir, data)
+        if data['state'] == PREPARED and not prepared.is_set():
+            prepared.set()
+            proceed.wait(10)
+
+    monkeypatch.setattr(journal, '_write_journal', pausing)
+    a_only = [e for e in _entries() if e['file'] == 'a.tsx']
+    first = threading.Thread(target=_run, args=(files, a_only))
+    first.start()
+    assert prepared.wait(10)
+    second = threading.Thread(target=_run, args=(files, b_only))
+    second.start()
+    second.join(0.5)
+    assert second.is_alive(), 'second transaction did not wait for the first'
+    proceed.set()
+    first.join(10)
+    second.join(10)
+    state = files.root / '.patchkit'
+    assert files.read('a.tsx').decode() == NEW_A
+    assert files.read('b.tsx').decode() == NEW_B.replace('new', 'newer')
+    assert load_journal(state)['state'] == COMMITTED
+    assert len(list((state / 'backup').iterdir())) == 1
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import re
+import shutil
+from pathlib import Path
+
+import pytest
+
+from patchkit.engine import apply_file
+from patchkit.errors import ManifestError, MarkerError
+from patchkit.manifest import Entry, group_by_file, load_manifest
+from patchkit.report import ALREADY_APPLIED, APPLIED, MARKERS_MISSING
+from patchkit.runner import apply_manifest
+from patchkit.splice import locate, splice
+
+from conftest import ROOT
+
+CARD = 'components/ProjectCard.tsx'
+EXPORT = re.compile(r'^export (?:default (\w+)|const (\w+))', re.M)
+
+
+def _exports(text: str) -> set[str]:
+    return {default or name for default, name in EXPORT.findall(text)}
+
+
+def _imported_from_card() -> set[str]:
+    names = set()
+    for path in (ROOT / 'components').glob('*.tsx'):
+        for match in re.finditer(r"import (\w+)?,?\s*(?:\{([^}]*)\})? from '\./ProjectCard'",
+                                 path.read_text(encoding='utf-8')):
+            default, named = match.groups()
+            names.update([default] if default else [])
+            names.update(n.strip() for n in (named or '').split(',') if n.strip())
+    return names
+
+
+def test_start_marker_is_replaced_and_end_marker_kept(tree):
+    tree.write('a.tsx', 'head\r\n// s\r\nold\r\n// e\r\ntail\r\n')
+    manifest = tree.load([{'file': 'a.tsx', 'start': '// s', 'end': '// e',
+                           'text': '// s\r\nnew\r\n'}])
+    report = apply_manifest(manifest)
+    assert report.counts() == {APPLIED: 1}
+    assert tree.read('a.tsx') == b'head\r\n// s\r\nnew\r\n// e\r\ntail\r\n'
+    assert apply_manifest(manifest).counts() == {ALREADY_APPLIED: 1}
+
+
+def test_a_missing_marker_leaves_the_file_untouched(tree):
+    original = 'head\n// s\nold\n// e\n// t\ntail\n'
+    tree.write('a.tsx', original)
+    manifest = tree.load([
+        {'file': 'a.tsx', 'start': '// s', 'end': '// e', 'text': '// s\nnew\n'},
+        {'file': 'a.tsx', 'start': '// t', 'end': '// nope', 'text': ''},
+    ])
+    [entries] = group_by_file(manifest.entries).values()
+    result = apply_file(manifest.entries[0].file, entries)
+    assert result.status == MARKERS_MISSING
+    assert tree.read('a.tsx') == original.encode()
+
+
+def test_regions_of_one_file_are_spliced_in_one_pass():
+    text = 'a [1] b [2] c'
+    entries = [Entry(Path('x'), '[2]', ' c', 'TWO'), Entry(Path('x'), '[1]', ' b', 'ONE')]
+    regions = [locate(text, entry) for entry in entries]
+    assert splice(text, regions) == 'a ONE b TWO c'
+    with pytest.raises(MarkerError):
+        splice(text, regions + [regions[0]])
+
+
+def test_an_entry_needs_markers_and_a_replacement(tree):
+    with pytest.raises(ManifestError):
+        tree.load([{'file': 'a.tsx', 'text': ''}])
+    with pytest.raises(ManifestError):
+        tree.load([{'file': 'a.tsx', 'start': '// s'}])
+
+
+@pytest.mark.parametrize('manifest', ['manifest.json', 'functional.json'])
+def test_project_card_keeps_its_exports(tmp_path, manifest):
+    shutil.copytree(ROOT / 'components', tmp_path / 'components')
+    before = (tmp_path / CARD).read_text(encoding='utf-8')
+    report = apply_manifest(load_manifest(ROOT / 'patches' / manifest, root=tmp_path))
+    assert report.counts() in ({APPLIED: 1}, {ALREADY_APPLIED: 1})
+    after = (tmp_path / CARD).read_text(encoding='utf-8')
+    assert _exports(after) == _exports(before)
+    assert _imported_from_card() <= _exports(after)
+    assert 'ProjectSkeleton' in _exports(after)
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from patchkit.engine import apply_file
+from patchkit.errors import MarkerError
+from patchkit import markers
+from patchkit.manifest import Entry
+from patchkit.markers import MarkerAutomaton, MarkerIndex, find_markers, search_markers
+from patchkit.report import APPLIED, MARKERS_MISSING
+from patchkit.splice import Region, locate, splice
+
+
+def test_automaton_finds_every_occurrence_including_overlaps():
+    automaton = MarkerAutomaton(['he', 'she', 'hers', 'x'])
+    assert automaton.search('ushers she') == {'he': [2, 8], 'she': [1, 7], 'hers': [2], 'x': []}
+
+
+def test_small_marker_sets_skip_the_automaton(monkeypatch):
+    found = {'aa': [0, 1, 4], 'aab': [1], 'b': [3]}
+    assert find_markers(['aa', 'aab', 'b', ''], 'aaabaa') == found
+    built = []
+    monkeypatch.setattr(markers, 'automaton_for',
+                        lambda m: built.append(m) or MarkerAutomaton(m))
+    assert search_markers(frozenset(found), 'aaabaa') == found and not built
+    monkeypatch.setattr(markers, 'AUTOMATON_MIN_MARKERS', 3)
+    assert search_markers(frozenset(found), 'aaabaa') == found and built
+
+
+def test_locate_and_splice_several_regions(tree):
+    text = 'A\n// s1\nold1\n// e1\nB\n// s2\nold2\n'
+    entries = [Entry(tree.root / 'f', '// s1', '// e1', '// s1\nnew1\n'),
+               Entry(tree.root / 'f', '// s2', None, '// s2\nnew2\n')]
+    regions = [locate(text, entry) for entry in entries]
+    assert splice(text, regions) == 'A\n// s1\nnew1\n// e1\nB\n// s2\nnew2\n'
+    with pytest.raises(MarkerError):
+        splice(text, [Region(0, 5, ''), Region(3, 6, '')])
+
+
+def test_locate_rejects_a_stale_offset():
+    entry = Entry(None, '// S', None, 'x')
+    with pytest.raises(MarkerError, match='stale offset'):
+        locate('ab// S\n', entry, {'// S': [0]})
+
+
+def _same_stat_edit(path, data: bytes) -> None:
+    """Rewrite ``path`` keeping its size and mtime, as within one mtime tick."""
+    st = os.stat(path)
+    assert len(data) == st.st_size
+    path.write_bytes(data)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def test_stale_index_offsets_are_rescanned(tree):
+    path = tree.write('A.tsx', 'A// S\nold\n')
+    index = MarkerIndex(tree.root, tree.root / '.patchkit' / 'markers.json')
+    entry = Entry(path, '// S', None, '// S\nnew\n')
+    assert index.hits(path, frozenset({'// S'})) == {'// S': [1]}
+
+    _same_stat_edit(path, b'Azzz// S\n\n')
+    result = apply_file(path, [entry], index=index)
+    assert result.status == APPLIED
+    assert tree.read('A.tsx') == b'Azzz// S\nnew\n'
+
+
+def test_cached_miss_is_rescanned(tree):
+    path = tree.write('A.tsx', 'A// T\nold\n')
+    index = MarkerIndex(tree.root)
+    assert index.hits(path, frozenset({'// S'})) == {'// S': []}
+
+    _same_stat_edit(path, b'A// S\nold\n')
+    assert apply_file(path, [Entry(path, '// S', None, '// S\n')], index=index).status == APPLIED
+    assert tree.read('A.tsx') == b'A// S\n'
+
+
+def test_index_is_trusted_without_text_when_stat_matches(tree):
+    path = tree.write('A.tsx', 'A// S\n')
+    index = MarkerIndex(tree.root)
+    index.hits(path, frozenset({'// S'}))
+    _same_stat_edit(path, b'B// S\n')
+    assert index.hits(path, frozenset({'// S'})) == {'// S': [1]}
+    missing = apply_file(path, [Entry(path, '// X', None, '')], index=index)
+    assert missing.status == MARKERS_MISSING
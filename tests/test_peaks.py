@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import struct
+import subprocess
+import sys
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import peaks  # noqa: E402
+from conftest import ROOT  # noqa: E402
+
+RATE = 8000
+
+
+def _pcm(signal: np.ndarray, width: int) -> bytes:
+    """Interleaved ``signal`` (frames x channels, floats in [-1, 1]) as PCM."""
+    full = (1 << (8 * width - 1)) - 1
+    ints = np.rint(signal * full).astype(np.int64).reshape(-1)
+    if width == 1:
+        return (ints + 128).astype(np.uint8).tobytes()
+    if width == 3:
+        b = ints.astype('<i4').view(np.uint8).reshape(-1, 4)[:, :3]
+        return b.tobytes()
+    return ints.astype({2: '<i2', 4: '<i4', 8: '<i8'}[width]).tobytes()
+
+
+def _write_wav(path, signal: np.ndarray, width: int) -> None:
+    channels = signal.shape[1]
+    data = _pcm(signal, width)
+    fmt = struct.pack('<HHIIHH', 1, channels, RATE, RATE * channels * width,
+                      channels * width, 8 * width)
+    path.write_bytes(b'RIFF' + struct.pack('<I', 4 + 8 + len(fmt) + 8 + len(data)) + b'WAVE'
+                     + b'fmt ' + struct.pack('<I', len(fmt)) + fmt
+                     + b'data' + struct.pack('<I', len(data)) + data)
+
+
+def _read_peaks(data: bytes):
+    magic, version, bits, count, rate, samples = peaks._HEADER.unpack_from(data)
+    table = [peaks._LEVEL.unpack_from(data, peaks._HEADER.size + i * peaks._LEVEL.size)
+             for i in range(count)]
+    offset = peaks._HEADER.size + count * peaks._LEVEL.size
+    dtype = '<i1' if bits == 8 else '<i2'
+    values = []
+    for _per_peak, n in table:
+        values.append(np.frombuffer(data, dtype, n * 3, offset).reshape(n, 3))
+        offset += n * 3 * (bits // 8)
+    assert offset == len(data)
+    return (magic, version, bits, rate, samples), table, values
+
+
+def _signal(frames: int) -> np.ndarray:
+    t = np.arange(frames)
+    left = 0.8 * np.sin(2 * np.pi * 50 * t / RATE) * np.linspace(0.1, 1, frames)
+    return np.stack((left, left * 0.5), axis=1)
+
+
+@pytest.mark.parametrize('width', [1, 2, 3, 4])
+@pytest.mark.parametrize('bits', [8, 16])
+def test_wav_round_trips_through_a_peak_file(tmp_path, width, bits):
+    frames = 10_000
+    signal = _signal(frames)
+    path = tmp_path / 'track.wav'
+    _write_wav(path, signal, width)
+
+    data = peaks.compute(path, bits=bits, block=256, factor=4, count=4)
+    header, table, values = _read_peaks(data)
+    assert header == (b'PEAK', 1, bits, RATE, frames)
+    assert table == [(256, 40), (1024, 10), (4096, 3), (16384, 1)]
+
+    mono = signal.mean(axis=1)
+    scale = 127 if bits == 8 else 32767
+    # Rounding to the peak scale, plus the 8-bit PCM step for width 1.
+    atol = 1 / scale + (1 / 64 if width == 1 else 1e-4)
+    for (per_peak, n), got in zip(table, values):
+        blocks = [mono[i:i + per_peak] for i in range(0, frames, per_peak)]
+        expected = np.array([(b.min(), b.max(), np.sqrt(np.mean(b * b))) for b in blocks])
+        assert len(blocks) == n
+        np.testing.assert_allclose(got / scale, expected, atol=atol)
+
+
+def test_chunk_boundaries_do_not_change_the_peaks(tmp_path, monkeypatch):
+    path = tmp_path / 'track.wav'
+    _write_wav(path, _signal(9_999), 2)
+    whole = peaks.compute(path, block=100)
+    monkeypatch.setattr(peaks, 'CHUNK_SAMPLES', 37)
+    assert peaks.compute(path, block=100) == whole
+
+
+def test_unsupported_wav_widths_fall_back_to_ffmpeg(tmp_path, monkeypatch):
+    path = tmp_path / 'wide.wav'
+    _write_wav(path, _signal(100), 8)
+    fallback = []
+    monkeypatch.setattr(peaks, '_ffmpeg_chunks',
+                        lambda path, rate=None: fallback.append(path) or (RATE, iter(())))
+    rate, chunks = peaks.decode(path)
+    assert fallback == [path] and list(chunks) == []
+
+
+def test_process_writes_next_to_the_track_and_skips_current_files(tmp_path):
+    path = tmp_path / 'a b.wav'
+    _write_wav(path, _signal(3000), 2)
+    first = peaks.process(path, 8, 512, 4, 2, force=False)
+    assert first['status'] == 'written'
+    target = tmp_path / 'a b.wav.peaks'
+    assert target.stat().st_size == first['bytes']
+    assert peaks.process(path, 8, 512, 4, 2, force=False)['status'] == 'skipped'
+    assert peaks.process(path, 8, 512, 4, 2, force=True)['status'] == 'written'
+    (tmp_path / 'broken.wav').write_bytes(b'RIFF')
+    assert peaks.process(tmp_path / 'broken.wav', 8, 512, 4, 2, False)['status'] == 'error'
+
+
+def test_sql_keys_match_the_storage_path(tmp_path, capsys):
+    (tmp_path / 'user').mkdir()
+    _write_wav(tmp_path / 'user' / "it's.wav", _signal(1000), 2)
+    assert peaks.main([str(tmp_path), '--sql', '-j', '1']) == 0
+    out = capsys.readouterr().out
+    assert out == ("update public.assets set peaks_path = 'user/it''s.wav.peaks' "
+                   "where storage_path = 'user/it''s.wav';\n")
+
+
+def test_a_missing_numpy_is_reported_by_main_not_on_import():
+    code = ("import sys; sys.modules['numpy'] = None; import peaks, audiometa; "
+            "sys.exit(peaks.main(['.']))")
+    done = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+    assert done.returncode == 2, done.stderr
+    assert 'peaks.py needs NumPy' in done.stdout
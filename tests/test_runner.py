@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import concurrent.futures
+import os
+import time
+
+import pytest
+
+from patchkit import runner
+from patchkit.cache import ApplyCache
+from patchkit.cli import main
+from patchkit.instrument import Instrumentation
+from patchkit.markers import MarkerIndex
+from patchkit.report import ALREADY_APPLIED, APPLIED, MARKERS_MISSING
+from patchkit.runner import apply_manifest
+
+
+def _corpus(tree, files: int = 6) -> list[dict]:
+    entries = []
+    for n in range(files):
+        tree.write(f'components/C{n}.tsx', f'head {n}\n// s\nold\n// e\ntail\n')
+        entries.append({'file': f'components/C{n}.tsx', 'start': '// s', 'end': '// e',
+                         'text': f'// s\nnew {n}\n'})
+    return entries
+
+
+def _stores(tree):
+    state = tree.root / '.patchkit'
+    return (MarkerIndex(tree.root, state / 'markers.json'),
+            ApplyCache(tree.root, state / 'applied.json'))
+
+
+def _settle(tree, manifest) -> None:
+    """Move the mtimes of the patched files well before now and refresh the
+    cache, so its records are trusted on the stat alone."""
+    past = time.time_ns() - 60_000_000_123
+    for entry in manifest.entries:
+        os.utime(entry.file, ns=(past, past))
+    index, cache = _stores(tree)
+    apply_manifest(manifest, index=index, cache=cache, jobs=1)
+
+
+def test_pool_and_serial_runs_agree(tree):
+    entries = _corpus(tree)
+    entries.append({'file': 'components/C0.tsx', 'start': '// nope', 'text': ''})
+    report = apply_manifest(tree.load(entries), jobs=3)
+    assert report.jobs == 3
+    assert report.counts() == {APPLIED: 5, MARKERS_MISSING: 1}
+    assert tree.read('components/C1.tsx') == b'head 1\n// s\nnew 1\n// e\ntail\n'
+    assert tree.read('components/C0.tsx') == b'head 0\n// s\nold\n// e\ntail\n'
+    assert [r.path.name for r in report.results] == [f'C{n}.tsx' for n in range(6)]
+
+
+def test_cached_files_never_reach_the_pool(tree, monkeypatch):
+    manifest = tree.load(_corpus(tree))
+    index, cache = _stores(tree)
+    apply_manifest(manifest, index=index, cache=cache, jobs=1)
+    _settle(tree, manifest)
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError('pool started for an already applied manifest')
+
+    monkeypatch.setattr(runner, 'ProcessPoolExecutor', no_pool)
+    index, cache = _stores(tree)
+    report = apply_manifest(manifest, index=index, cache=cache, jobs=4,
+                            instrument=Instrumentation())
+    assert report.counts() == {ALREADY_APPLIED: 6}
+    assert report.jobs == 1
+    assert all(r.message == 'cached' and 'stat' in r.metrics['stages'] for r in report.results)
+
+
+def test_only_uncached_files_are_sent_to_workers(tree, monkeypatch):
+    manifest = tree.load(_corpus(tree))
+    index, cache = _stores(tree)
+    apply_manifest(manifest, index=index, cache=cache, jobs=1)
+    _settle(tree, manifest)
+    tree.write('components/C2.tsx', 'head 2\n// s\nold\n// e\ntail\n')
+    tree.write('components/C4.tsx', 'head 4\n// s\nold\n// e\ntail\n')
+
+    submitted = []
+    executor = concurrent.futures.ProcessPoolExecutor
+
+    class Recording(executor):
+        def submit(self, fn, path, *args, **kwargs):
+            submitted.append(path.name)
+            return super().submit(fn, path, *args, **kwargs)
+
+    monkeypatch.setattr(runner, 'ProcessPoolExecutor', Recording)
+    index, cache = _stores(tree)
+    report = apply_manifest(manifest, index=index, cache=cache, jobs=4)
+    assert sorted(submitted) == ['C2.tsx', 'C4.tsx']
+    assert report.jobs == 2
+    assert report.counts() == {ALREADY_APPLIED: 4, APPLIED: 2}
+
+
+def test_a_same_stat_rewrite_right_after_patching_is_not_skipped(tree):
+    manifest = tree.load(_corpus(tree, 1))
+    index, cache = _stores(tree)
+    apply_manifest(manifest, index=index, cache=cache, jobs=1)
+    # A whole-second mtime (as on a filesystem storing seconds) just before
+    # the cache refreshes its record: the record falls in the same tick.
+    path = manifest.entries[0].file
+    second = time.time_ns() // 1_000_000_000 * 1_000_000_000
+    os.utime(path, ns=(second, second))
+    index, cache = _stores(tree)
+    assert apply_manifest(manifest, index=index, cache=cache, jobs=1).counts() == {
+        ALREADY_APPLIED: 1}
+
+    tree.write('components/C0.tsx', 'HEAD 0\n// s\nold 0\n// e\ntail\n')
+    os.utime(path, ns=(second, second))
+    index, cache = _stores(tree)
+    report = apply_manifest(manifest, index=index, cache=cache, jobs=1)
+    assert report.counts() == {APPLIED: 1}
+    assert tree.read('components/C0.tsx') == b'HEAD 0\n// s\nnew 0\n// e\ntail\n'
+
+
+@pytest.mark.parametrize('jobs', ['0', '-1'])
+def test_jobs_below_one_are_rejected(tree, jobs, capsys):
+    manifest = tree.manifest(_corpus(tree, 1))
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(manifest), '-j', jobs])
+    assert exit_info.value.code == 2
+    assert 'must be at least 1' in capsys.readouterr().err
+    with pytest.raises(ValueError):
+        apply_manifest(tree.load(_corpus(tree, 1)), jobs=int(jobs))
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import squash_migrations as sm
+
+FIRST = '''-- tables
+CREATE TABLE t (id int, s text DEFAULT 'a;b');
+CREATE OR REPLACE FUNCTION f() RETURNS int LANGUAGE sql AS $$ SELECT 1; $$;
+CREATE POLICY "p" ON t FOR SELECT USING (f() = 1);
+ALTER TABLE t ENABLE ROW LEVEL SECURITY;
+CREATE FUNCTION g() RETURNS int LANGUAGE sql AS $$ SELECT 2 $$;
+'''
+SECOND = '''DROP POLICY IF EXISTS "p" ON t;
+CREATE POLICY "p" ON t FOR SELECT USING (true);
+ALTER TABLE t ENABLE ROW LEVEL SECURITY;
+CREATE OR REPLACE FUNCTION f() RETURNS int LANGUAGE sql AS $$ SELECT 2; $$;
+DROP FUNCTION g();
+ALTER TABLE t ADD COLUMN n int;
+'''
+
+
+def _migrations(tree):
+    tree.write('migrations/001_a.sql', FIRST)
+    tree.write('migrations/002_b.sql', SECOND)
+    return tree.root / 'migrations'
+
+
+def test_split_respects_quotes_dollar_quoting_and_comments():
+    sql = "-- a; comment\nSELECT 'x;y';\nDO $$ BEGIN PERFORM 1; END $$;\n/* ; */ SELECT 2"
+    assert sm.split_statements(sql) == [
+        "SELECT 'x;y';", 'DO $$ BEGIN PERFORM 1; END $$;', 'SELECT 2']
+
+
+def test_classify_names_the_object_and_its_table(tree):
+    statements = sm.load(_migrations(tree))
+    assert [(s.where, s.op, s.obj) for s in statements[:4]] == [
+        ('001_a.sql:1', 'create', ('table', 'public.t')),
+        ('001_a.sql:2', 'create', ('function', 'public.f()')),
+        ('001_a.sql:3', 'create', ('policy', 'public.t p')),
+        ('001_a.sql:4', 'ensure', ('rls', 'public.t')),
+    ]
+    assert statements[-1].op == 'touch' and statements[-1].touches == {'public.t'}
+
+
+def test_plan_keeps_only_the_final_form_of_each_object(tree):
+    plan = sm.squash(sm.load(_migrations(tree)))[1]
+    kept = {name: [s.where for s in survivors] for (_, name), _, survivors in plan}
+    assert kept == {'public.f()': ['002_b.sql:4'], 'public.t p': ['002_b.sql:2'],
+                    'public.t': ['001_a.sql:4'], 'public.g()': []}
+    assert 'nothing (created, then dropped)' in '\n'.join(sm.format_plan(plan))
+
+
+def test_baseline_orders_definitions_after_their_dependencies(tree):
+    baseline, _, acyclic = sm.squash(sm.load(_migrations(tree)))
+    assert acyclic
+    assert '11 statement(s) in, 5 out' in baseline
+    order = [baseline.index(text) for text in (
+        'CREATE TABLE t', 'SELECT 2; $$', 'ENABLE ROW LEVEL SECURITY',
+        'USING (true)', 'ADD COLUMN n')]
+    assert order == sorted(order)
+    assert 'SELECT 1; $$' not in baseline and 'g()' not in baseline
+
+
+def test_main_writes_the_baseline_and_prints_the_plan(tree, capsys):
+    migrations = _migrations(tree)
+    out = tree.root / 'baseline.sql'
+    assert sm.main(['--migrations', str(migrations), '-o', str(out)]) == 0
+    assert out.read_text(encoding='utf-8') == sm.squash(sm.load(migrations))[0]
+    assert sm.main(['--migrations', str(migrations), '--plan']) == 0
+    assert 'policy public.t p' in capsys.readouterr().out
+    assert sm.main(['--migrations', str(tree.root / 'missing')]) == 2
+
+
+def test_repository_migrations_squash_without_a_cycle():
+    statements = sm.load(sm.MIGRATIONS_DIR)
+    baseline, _, acyclic = sm.squash(statements)
+    assert acyclic
+    assert baseline.startswith('-- Squashed baseline')
+
+
+def test_function_bodies_follow_the_columns_they_use(tree):
+    tree.write('migrations/001_a.sql', '''CREATE TABLE t (id int);
+CREATE FUNCTION h() RETURNS int LANGUAGE sql AS $$ SELECT id FROM t $$;
+''')
+    tree.write('migrations/002_b.sql', '''ALTER TABLE t ADD COLUMN IF NOT EXISTS n int, ADD CONSTRAINT c CHECK (id > 0);
+CREATE OR REPLACE FUNCTION h() RETURNS int LANGUAGE sql AS $$ SELECT n FROM t $$;
+''')
+    statements = sm.load(tree.root / 'migrations')
+    assert statements[2].columns == {'n'}
+    assert {'n', 't', 'select'} <= statements[3].reads
+    baseline, _, acyclic = sm.squash(statements)
+    assert acyclic
+    assert baseline.index('ADD COLUMN IF NOT EXISTS n') < baseline.index('SELECT n FROM t')
+
+
+def test_an_argless_drop_resolves_to_the_single_overload(tree):
+    tree.write('migrations/001_a.sql', '''CREATE FUNCTION k(p_id uuid) RETURNS int LANGUAGE sql AS $$ SELECT 1 $$;
+DROP FUNCTION IF EXISTS k;
+CREATE FUNCTION m(a int) RETURNS int LANGUAGE sql AS $$ SELECT a $$;
+CREATE FUNCTION m(a text) RETURNS int LANGUAGE sql AS $$ SELECT 1 $$;
+DROP FUNCTION m;
+''')
+    statements = sm.load(tree.root / 'migrations')
+    assert statements[1].obj == ('function', 'public.k(uuid)')
+    assert statements[4].obj == ('function', 'public.m')
+    baseline = sm.squash(statements)[0]
+    assert 'k(' not in baseline and 'DROP FUNCTION IF EXISTS k' not in baseline
+    assert 'DROP FUNCTION m;' in baseline
+
+
+def test_output_into_a_missing_directory_is_reported(tree, capsys):
+    migrations = _migrations(tree)
+    out = tree.root / 'missing' / 'baseline.sql'
+    assert sm.main(['--migrations', str(migrations), '-o', str(out)]) == 2
+    assert 'cannot write' in capsys.readouterr().err
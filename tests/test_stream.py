@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import io
+import os
+import stat
+
+import pytest
+
+from patchkit import engine, stream
+from patchkit.cache import digest
+from patchkit.engine import apply_file
+from patchkit.errors import MarkerError
+from patchkit.instrument import Instrumentation
+from patchkit.manifest import Entry
+from patchkit.report import ALREADY_APPLIED, APPLIED, MARKERS_MISSING
+from patchkit.stream import is_applied, locate_bytes, mapped, write_spliced
+
+BODY = ('﻿// généré\r\n/* start */\r\nold ✓\r\n/* end */\r\n'
+        + 'x = "ü";\r\n' * 5000 + '/* tail */\r\nold tail\r\n').encode('utf-8')
+
+
+def _entries(path) -> list[Entry]:
+    return [Entry(path, '/* start */', '/* end */', '/* start */\r\nnew — ✓✓\r\n'),
+            Entry(path, '/* tail */', None, '/* tail */\r\n')]
+
+
+@pytest.mark.parametrize('chunk', [7, 4096, stream.CHUNK_SIZE])
+def test_mmap_and_text_engines_write_the_same_bytes(tmp_path, monkeypatch, chunk):
+    monkeypatch.setattr(stream, 'CHUNK_SIZE', chunk)
+    outputs = {}
+    for name in ('text', 'mmap'):
+        path = tmp_path / f'{name}.tsx'
+        path.write_bytes(BODY)
+        result = apply_file(path, _entries(path), engine=name)
+        assert result.status == APPLIED
+        assert result.new_hash == digest(path.read_bytes())
+        outputs[name] = path.read_bytes()
+        assert apply_file(path, _entries(path), engine=name).status == ALREADY_APPLIED
+    assert outputs['mmap'] == outputs['text']
+    assert outputs['mmap'].endswith('/* tail */\r\n'.encode())
+
+
+def test_auto_maps_files_above_the_threshold(tmp_path, monkeypatch):
+    path = tmp_path / 'big.tsx'
+    path.write_bytes(BODY)
+    monkeypatch.setattr(engine, 'MMAP_THRESHOLD', len(BODY))
+    result = apply_file(path, _entries(path), instrument=Instrumentation())
+    assert result.status == APPLIED
+    assert 'decode' not in result.metrics['stages']
+
+    path.write_bytes(BODY)
+    monkeypatch.setattr(engine, 'MMAP_THRESHOLD', len(BODY) + 1)
+    result = apply_file(path, _entries(path), instrument=Instrumentation())
+    assert 'decode' in result.metrics['stages']
+
+
+def test_missing_markers_leave_the_mapped_file_alone(tmp_path):
+    path = tmp_path / 'f.tsx'
+    path.write_bytes(BODY)
+    entries = _entries(path) + [Entry(path, '/* tail */', '/* nope */', '')]
+    result = apply_file(path, entries, engine='mmap')
+    assert result.status == MARKERS_MISSING
+    assert path.read_bytes() == BODY
+    assert not list(tmp_path.glob('.*.tmp'))
+
+
+def test_mode_bits_survive_the_rename(tmp_path):
+    path = tmp_path / 'f.sh'
+    path.write_bytes(BODY)
+    os.chmod(path, 0o755)
+    apply_file(path, _entries(path), engine='mmap')
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o755
+
+
+def test_empty_files_are_not_mapped(tmp_path):
+    path = tmp_path / 'empty.tsx'
+    path.write_bytes(b'')
+    with mapped(path) as buf:
+        assert buf == b''
+        with pytest.raises(MarkerError):
+            locate_bytes(buf, Entry(path, 'a', None, ''))
+
+
+def test_locate_bytes_finds_the_end_after_the_start():
+    buf = 'é END é START ü END'.encode('utf-8')
+    start, end, data = locate_bytes(buf, Entry(None, 'START', 'END', 'ß'))
+    assert buf[start:end] == 'START ü '.encode('utf-8')
+    assert data == 'ß'.encode('utf-8')
+    assert is_applied(buf, [(start, start + 5, b'START')])
+    assert not is_applied(buf, [(start, end, data)])
+
+
+def test_write_spliced_rejects_overlaps():
+    with pytest.raises(MarkerError):
+        write_spliced(b'abcdef', [(0, 4, b''), (2, 5, b'')], io.BytesIO())
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from patchkit.errors import ManifestError
+from patchkit.templates import compile_template, load_template
+
+SOURCE = 'while (tracks.length < {%slots|6%}) {\n  tracks.push({ id: `{%prefix%}-${n}` });\n}\n'
+
+
+def test_render_keeps_braces_and_applies_defaults():
+    template = compile_template(SOURCE)
+    assert template.params == ('slots', 'prefix')
+    assert template.render({'prefix': 'empty'}) == (
+        'while (tracks.length < 6) {\n  tracks.push({ id: `empty-${n}` });\n}\n')
+    assert template.render({'prefix': 'x', 'slots': 3}).startswith('while (tracks.length < 3) {')
+
+
+@pytest.mark.parametrize('params, message', [
+    ({}, 'missing template parameter'),
+    ({'prefix': 'x', 'slot': 1}, 'unknown template parameter'),
+])
+def test_render_rejects_bad_parameters(params, message):
+    with pytest.raises(ManifestError, match=message):
+        compile_template(SOURCE).render(params)
+
+
+def test_conflicting_defaults_are_rejected():
+    with pytest.raises(ManifestError, match='conflicting defaults'):
+        compile_template('{%a|1%} {%a|2%}')
+
+
+def test_templates_are_reloaded_only_after_a_change(tmp_path):
+    path = tmp_path / 'slots.tsx'
+    path.write_text(SOURCE, encoding='utf-8')
+    first = load_template(path)
+    assert load_template(path) is first
+    path.write_text(SOURCE.replace('{%slots|6%}', '{%slots|8%}'), encoding='utf-8')
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+    assert load_template(path).defaults == {'slots': '8'}
+
+
+def test_manifest_renders_templates_with_params(tree):
+    tree.write('patches/templates/slots.tsx', SOURCE)
+    tree.write('components/Grid.tsx', '// slots\nold\n')
+    manifest = tree.load([{'file': 'components/Grid.tsx', 'start': '// slots',
+                           'template': 'slots.tsx', 'params': {'prefix': 'p', 'slots': 4}}])
+    [entry] = manifest.entries
+    assert entry.replacement.startswith('while (tracks.length < 4) {')
+    assert entry.source == tree.root / 'patches' / 'templates' / 'slots.tsx'
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import pytest
+
+from patchkit.errors import MarkerError
+from patchkit.report import APPLIED
+from patchkit.runner import apply_manifest
+from patchkit.tsx import TokenCache, find_region, tokenize
+
+# Braces and tags inside strings, template literals, comments and a regex
+# literal must not confuse the locators.
+CARD = '''const tag = /<div>/g;
+export const Card = ({ items }) => {
+  const rows = items.map(i => { return <li key={i}>{`${i}}`}</li>; });
+  if (!items.length) return null;
+  return (
+    <section>
+      {/* Footer */}
+      <div className="f">{'}'}</div>
+      <button title="Add to Cart now">+</button>
+    </section>
+  );
+};
+'''
+
+
+def _region(selector: str, text: str = CARD) -> str:
+    start, end = find_region(text, selector)
+    return text[start:end]
+
+
+def test_return_selector_skips_nested_callbacks():
+    assert _region('return:Card#0') == 'return null;'
+    last = _region('return:Card#-1')
+    assert last.startswith('return (\n    <section>') and last.endswith('</section>\n  );')
+
+
+def test_jsx_selectors_match_comment_and_attribute_filters():
+    assert _region('jsx:div[comment=Footer]') == '<div className="f">{\'}\'}</div>'
+    assert _region('jsx:button[title=Add to Cart]') == '<button title="Add to Cart now">+</button>'
+
+
+@pytest.mark.parametrize('selector, message', [
+    ('return:Card', 'matched 2 regions'),
+    ('jsx:span', 'matched nothing'),
+    ('return:Card#5', 'only 2 match'),
+    ('Card', 'invalid selector'),
+])
+def test_ambiguous_or_missing_selectors_are_errors(selector, message):
+    with pytest.raises(MarkerError, match=message):
+        find_region(CARD, selector)
+
+
+def test_token_streams_round_trip_through_the_disk_cache(tmp_path):
+    expected = tokenize(CARD)
+    TokenCache().get(CARD, tmp_path)
+    assert len(list(tmp_path.glob('*.tok'))) == 1
+    loaded = TokenCache().get(CARD, tmp_path)
+    assert (loaded.kinds, loaded.starts, loaded.ends) == (
+        expected.kinds, expected.starts, expected.ends)
+
+
+def test_manifest_entries_can_locate_structurally(tree):
+    tree.write('components/Card.tsx', CARD)
+    report = apply_manifest(tree.load([
+        {'file': 'components/Card.tsx', 'locate': 'jsx:button[title=Add to Cart]',
+         'text': '<button title="Add to Cart">Add</button>'},
+    ]), jobs=1)
+    assert report.counts() == {APPLIED: 1}
+    assert tree.read('components/Card.tsx').decode() == CARD.replace(
+        '<button title="Add to Cart now">+</button>', '<button title="Add to Cart">Add</button>')
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import importlib
+import threading
+import time
+
+import pytest
+
+from patchkit.cli import main
+from patchkit.markers import MarkerIndex
+from patchkit.watch import PollingWatcher, watch
+
+# ``patchkit.watch`` the attribute is the function re-exported by the package.
+watch_module = importlib.import_module('patchkit.watch')
+
+OLD = 'head\n// s\nold\n// e\ntail\n'
+NEW = 'head\n// s\nnew\n// e\ntail\n'
+
+
+class _StoppableWatcher(PollingWatcher):
+    """Polls briefly instead of blocking, and raises KeyboardInterrupt once
+    the test is done so ``watch`` shuts down the way Ctrl+C would."""
+
+    stop = threading.Event()
+
+    def wait(self, timeout):
+        if self.stop.is_set():
+            raise KeyboardInterrupt
+        return super().wait(0.02 if timeout is None else timeout)
+
+
+@pytest.fixture
+def running(tree, monkeypatch):
+    """Start ``watch`` on a one-target manifest in a thread; yield its output."""
+    stop = threading.Event()
+    monkeypatch.setattr(_StoppableWatcher, 'stop', stop)
+    monkeypatch.setattr(watch_module, 'make_watcher',
+                        lambda paths, polling=False: _StoppableWatcher(paths, interval=0.01))
+    tree.write('a.tsx', OLD)
+    manifest = tree.manifest([{'file': 'a.tsx', 'start': '// s', 'end': '// e',
+                               'text': '// s\nnew\n'}])
+    lines: list[str] = []
+    codes: list[int] = []
+    thread = threading.Thread(target=lambda: codes.append(watch(
+        [manifest], None, MarkerIndex(tree.root), None, debounce=0.2, out=lines.append)))
+    thread.start()
+    try:
+        _until(lambda: tree.read('a.tsx') == NEW.encode())
+        yield manifest, lines
+    finally:
+        stop.set()
+        thread.join(5)
+    assert not thread.is_alive() and codes == [0]
+
+
+def _until(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out waiting for the watcher'
+        time.sleep(0.01)
+
+
+def test_polling_watcher_reports_changed_paths(tmp_path):
+    path = tmp_path / 'a.txt'
+    path.write_text('a')
+    watcher = PollingWatcher({path, tmp_path / 'missing'}, interval=0.01)
+    assert watcher.wait(0.05) == set()
+    path.write_text('ab')
+    assert watcher.wait(1) == {path}
+    (tmp_path / 'missing').write_text('')
+    assert watcher.wait(1) == {tmp_path / 'missing'}
+
+
+def test_an_edited_target_is_spliced_again(tree, running):
+    tree.write('a.tsx', OLD + '// more\n')
+    _until(lambda: tree.read('a.tsx') == (NEW + '// more\n').encode())
+
+
+def test_a_broken_manifest_keeps_the_previous_one(tree, running):
+    manifest, lines = running
+    manifest.write_text('{ not json', encoding='utf-8')
+    tree.write('a.tsx', OLD + '// more\n')
+    _until(lambda: tree.read('a.tsx') == (NEW + '// more\n').encode())
+    assert any('keeping the previous manifest' in line for line in lines)
+
+
+def test_a_dry_run_watch_only_reports(tree, monkeypatch):
+    stop = threading.Event()
+    monkeypatch.setattr(_StoppableWatcher, 'stop', stop)
+    monkeypatch.setattr(watch_module, 'make_watcher',
+                        lambda paths, polling=False: _StoppableWatcher(paths, interval=0.01))
+    tree.write('a.tsx', OLD)
+    manifest = tree.manifest([{'file': 'a.tsx', 'start': '// s', 'end': '// e',
+                               'text': '// s\nnew\n'}])
+    lines: list[str] = []
+    thread = threading.Thread(target=watch, args=([manifest], None, MarkerIndex(tree.root), None),
+                              kwargs={'out': lines.append, 'dry_run': True})
+    thread.start()
+    try:
+        _until(lambda: any('1 file(s) checked' in line for line in lines))
+        tree.write('a.tsx', OLD + '// more\n')
+        _until(lambda: sum('1 file(s) checked' in line for line in lines) == 2)
+    finally:
+        stop.set()
+        thread.join(5)
+    assert tree.read('a.tsx') == (OLD + '// more\n').encode()
+
+
+@pytest.mark.parametrize('args, name', [(['-j', '2'], '--jobs'), (['--json'], '--json'),
+                                        (['--stats'], '--stats'),
+                                        (['--profile', 'p.out'], '--profile')])
+def test_watch_rejects_flags_it_would_ignore(tree, capsys, args, name):
+    tree.write('a.tsx', OLD)
+    manifest = tree.manifest([{'file': 'a.tsx', 'start': '// s', 'text': '// s\n'}])
+    assert main([str(manifest), '--watch', *args]) == 2
+    assert f'--watch does not support {name}' in capsys.readouterr().out
+    assert tree.read('a.tsx') == OLD.encode()
@@ -10,6 +10,7 @@ export interface Track {
     wav?: string;
     stems?: string;
     main?: string; // Main linked asset ID
+    peaks?: string; // Waveform peak file written by peaks.py (assets.peaks_path)
   };
   stemsIncluded?: boolean;
   noteId?: string;